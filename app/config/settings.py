@@ -94,6 +94,79 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'quotes': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'quotes',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tokens',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Authentication tokens with their user are cached for up to
+# TOKEN_CACHE_TTL seconds. Use a backend shared by every worker so a
+# password change or deactivation takes effect on all of them at once.
+TOKEN_CACHE_ALIAS = 'tokens'
+TOKEN_CACHE_TTL = 60
+
+# Signed access tokens, issued by the token endpoint with
+# token_type=signed, are valid for ACCESS_TOKEN_TTL seconds and renewed
+# with a refresh token valid for REFRESH_TOKEN_TTL seconds.
+ACCESS_TOKEN_TTL = 5 * 60
+REFRESH_TOKEN_TTL = 30 * 24 * 60 * 60
+
+# Quote cache in front of the price providers. TTLs are in seconds per
+# investment type; bar aligned types expire on the next bar boundary.
+QUOTE_CACHE_ALIAS = 'quotes'
+QUOTE_CACHE_MAX_ENTRIES = 1000
+QUOTE_CACHE_TTL = {
+    'cc': 30,
+    'stock': 300,
+    'bond': 3600,
+}
+QUOTE_CACHE_BAR_ALIGNED = ['stock']
+
+# Coalesce concurrent quote fetches of the same asset. The distributed
+# mode also takes a lock in the quote cache, shared between processes.
+QUOTE_SINGLE_FLIGHT_DISTRIBUTED = False
+QUOTE_SINGLE_FLIGHT_LOCK_TIMEOUT = 10
+
+# Price provider class per investment type. PRICE_PROVIDER=fake switches
+# every type to the offline provider returning FAKE_PRICES.
+PRICE_PROVIDERS = {
+    'stock': 'investment.providers.AlphaVantageProvider',
+    'bond': 'investment.providers.AlphaVantageProvider',
+    'cc': 'investment.providers.CoinGeckoProvider',
+}
+if os.environ.get('PRICE_PROVIDER') == 'fake':
+    PRICE_PROVIDERS = dict.fromkeys(PRICE_PROVIDERS, 'investment.providers.FakePriceProvider')
+PRICE_PROVIDER_MAX_CONCURRENCY = 10
+PRICE_PROVIDER_TIMEOUT = 10
+FAKE_PRICES = {
+    'default': 100.0,
+}
+
+# Pricing mode of the investment views: 'live' fetches quotes on every
+# request, 'background' serves prices stored by `manage.py refresh_prices`.
+PRICING_MODE = os.environ.get('PRICING_MODE', 'live')
+PRICE_REFRESH_INTERVAL = 60
+PRICE_REFRESH_WORKERS = 8
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -137,6 +210,65 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = 'core.User'
 
+# Leaves tests tagged benchmark out unless run with --tag benchmark.
+TEST_RUNNER = 'config.test_runner.TestRunner'
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'investment.pagination.NewestFirstCursorPagination',
+    'PAGE_SIZE': 50,
+    # Money fields are Decimals; keep rendering them as JSON numbers.
+    'COERCE_DECIMAL_TO_STRING': False,
+    # Encode and decode JSON with orjson when it is installed.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
+
+# Upper bound for the page_size query parameter of paginated lists.
+MAX_PAGE_SIZE = 500
+
+# Rows fetched per database round trip by streaming exports.
+EXPORT_CHUNK_SIZE = 2000
+
+# Maximum number of buy and sell legs in one batch order.
+MAX_ORDER_LEGS = 100
+
+# Cash ledger compaction by `manage.py compact_ledger`: entries younger
+# than the delay (seconds) are left for the next run, and accounts with
+# fewer new entries than the minimum are not snapshotted.
+LEDGER_COMPACTION_DELAY = 60
+LEDGER_COMPACTION_MIN_ENTRIES = 100
+
+# Default lot matching method of realized gains: 'fifo', 'lifo' or 'average'.
+LOT_METHOD = 'fifo'
+
+# Transactions inserted within the delay (seconds) are matched into lots
+# again on the next run, as transactions with lower ids may still commit.
+LOT_SETTLE_DELAY = 60
+
+# Portfolio value history: default and maximum number of days per
+# request, and seconds the values of closed days stay cached.
+PORTFOLIO_HISTORY_DAYS = 30
+PORTFOLIO_HISTORY_MAX_DAYS = 1830
+PORTFOLIO_HISTORY_CACHE_TTL = 7 * 24 * 60 * 60
+
+# Portfolio risk analytics: default and maximum window in days, periods
+# used to annualize daily returns, the annual risk-free rate of the
+# Sharpe ratio and seconds results stay memoized.
+RISK_WINDOW_DAYS = 90
+RISK_MAX_WINDOW_DAYS = 1830
+RISK_PERIODS_PER_YEAR = 365
+RISK_FREE_RATE = 0.0
+RISK_CACHE_TTL = 24 * 60 * 60
+
+# Live price streams: seconds between fetches of the subscribed assets,
+# and seconds without changes after which a keep-alive is sent.
+PRICE_STREAM_INTERVAL = 5
+PRICE_STREAM_KEEPALIVE = 15
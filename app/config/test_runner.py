@@ -0,0 +1,18 @@
+"""
+Test runner for the project.
+"""
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner leaving out benchmarks unless they are asked for.
+
+    Tests tagged benchmark build large data sets and assert on wall
+    clock timings, so they only run with `manage.py test --tag benchmark`.
+    """
+
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs):
+        if 'benchmark' not in (tags or []):
+            exclude_tags = [*(exclude_tags or []), 'benchmark']
+        super().__init__(*args, tags=tags, exclude_tags=exclude_tags, **kwargs)
@@ -10,4 +10,16 @@ ALPHA_VANTAGE_API_KEY = 'KT5PD27H90VFTKJG'
 TRANSACTION_TYPE = (
     ('sell', 'Sell'),
     ('buy', 'Buy')
-)
\ No newline at end of file
+)
+LEDGER_ENTRY_TYPE = (
+    ('opening', 'Opening balance'),
+    ('deposit', 'Deposit'),
+    ('withdrawal', 'Withdrawal'),
+    ('buy', 'Buy'),
+    ('sell', 'Sell')
+)
+LOT_METHOD = (
+    ('fifo', 'First in, first out'),
+    ('lifo', 'Last in, first out'),
+    ('average', 'Average cost')
+)
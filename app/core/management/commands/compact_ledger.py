@@ -0,0 +1,55 @@
+"""
+Django command to roll cash ledger entries into balance snapshots.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import CashBalanceSnapshot, CashLedgerEntry, User
+
+
+class Command(BaseCommand):
+    """Django command to snapshot the cash balance of busy accounts."""
+    help = 'Roll cash ledger entries into new balance snapshots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=settings.LEDGER_COMPACTION_DELAY,
+            help='Only compact entries older than this many seconds.',
+        )
+        parser.add_argument(
+            '--min-entries',
+            type=int,
+            default=settings.LEDGER_COMPACTION_MIN_ENTRIES,
+            help='Only snapshot accounts with at least this many new entries.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        before = timezone.now() - timedelta(seconds=options['delay'])
+        last_snapshot = CashBalanceSnapshot.objects.filter(
+            user=OuterRef('user'),
+        ).order_by('-last_entry_id').values('last_entry_id')[:1]
+        user_ids = CashLedgerEntry.objects.filter(
+            created_at__lte=before,
+        ).annotate(
+            snapshot_entry_id=Coalesce(Subquery(last_snapshot), Value(0)),
+        ).filter(
+            id__gt=F('snapshot_entry_id'),
+        ).values('user').annotate(
+            pending=Count('id'),
+        ).filter(
+            pending__gte=options['min_entries'],
+        ).values_list('user', flat=True)
+
+        compacted = 0
+        for user in User.objects.filter(id__in=list(user_ids)).iterator():
+            if user.compact_ledger(before) is not None:
+                compacted += 1
+        self.stdout.write(self.style.SUCCESS(f'Compacted {compacted} cash ledgers.'))
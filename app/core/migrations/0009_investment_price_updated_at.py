@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-16 23:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_transactionhistory"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="investment",
+            name="price_updated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
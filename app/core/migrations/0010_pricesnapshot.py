@@ -0,0 +1,53 @@
+# Generated by Django 5.0.6 on 2026-10-16 23:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_investment_price_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "asset_type",
+                    models.CharField(
+                        choices=[
+                            ("stock", "Stock"),
+                            ("bond", "Bond"),
+                            ("cc", "Cryptocurrency"),
+                        ],
+                        max_length=255,
+                    ),
+                ),
+                ("symbol", models.CharField(max_length=255)),
+                ("price", models.FloatField()),
+                ("timestamp", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name="investment",
+            name="price_updated_at",
+        ),
+        migrations.AddConstraint(
+            model_name="pricesnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("asset_type", "symbol", "timestamp"),
+                name="unique_price_snapshot",
+            ),
+        ),
+    ]
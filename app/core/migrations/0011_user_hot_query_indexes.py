@@ -0,0 +1,62 @@
+# Generated by Django 5.0.6 on 2026-10-17 00:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_pricesnapshot"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="investment",
+            index=models.Index(fields=["user", "-id"], name="investment_user_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="investment",
+            index=models.Index(
+                fields=["type", "asset_name"], name="investment_asset_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="investment",
+            index=models.Index(
+                condition=models.Q(("sale_date__isnull", True)),
+                fields=["user", "-id"],
+                name="investment_open_user_id_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transactionhistory",
+            index=models.Index(fields=["user", "-id"], name="history_user_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="transactionhistory",
+            index=models.Index(
+                fields=["user", "sale_date"], name="history_user_sale_date_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="investment",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="investments",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transactionhistory",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.0.6 on 2026-10-17 00:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def open_ledgers(apps, schema_editor):
+    """Record each existing cash balance as an opening ledger entry."""
+    User = apps.get_model("core", "User")
+    CashLedgerEntry = apps.get_model("core", "CashLedgerEntry")
+    CashLedgerEntry.objects.bulk_create(
+        CashLedgerEntry(user_id=user_id, kind="opening", amount=cash_balance)
+        for user_id, cash_balance in User.objects.exclude(cash_balance=0).values_list(
+            "id", "cash_balance"
+        )
+    )
+
+
+def close_ledgers(apps, schema_editor):
+    """Store the ledger total of each user back on the user row."""
+    User = apps.get_model("core", "User")
+    CashLedgerEntry = apps.get_model("core", "CashLedgerEntry")
+    totals = CashLedgerEntry.objects.values("user").annotate(total=Sum("amount"))
+    for row in totals:
+        User.objects.filter(id=row["user"]).update(cash_balance=row["total"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_user_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CashBalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_entry_id", models.BigIntegerField()),
+                ("balance", models.FloatField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_snapshots",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CashLedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("opening", "Opening balance"),
+                            ("deposit", "Deposit"),
+                            ("withdrawal", "Withdrawal"),
+                            ("buy", "Buy"),
+                            ("sell", "Sell"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("amount", models.FloatField()),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="cashbalancesnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("user", "last_entry_id"), name="unique_balance_snapshot"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cashledgerentry",
+            index=models.Index(fields=["user", "id"], name="ledger_user_id_idx"),
+        ),
+        migrations.RunPython(open_ledgers, close_ledgers),
+        migrations.RemoveField(
+            model_name="user",
+            name="cash_balance",
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.6 on 2026-10-17 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_cash_ledger"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cashbalancesnapshot",
+            name="balance",
+            field=models.DecimalField(decimal_places=8, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name="cashledgerentry",
+            name="amount",
+            field=models.DecimalField(decimal_places=8, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name="investment",
+            name="current_price",
+            field=models.DecimalField(decimal_places=8, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name="investment",
+            name="purchase_price",
+            field=models.DecimalField(decimal_places=8, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name="investment",
+            name="quantity",
+            field=models.DecimalField(decimal_places=8, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name="investment",
+            name="sale_price",
+            field=models.DecimalField(
+                blank=True, decimal_places=8, max_digits=20, null=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="pricesnapshot",
+            name="price",
+            field=models.DecimalField(decimal_places=8, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name="transactionhistory",
+            name="purchase_price",
+            field=models.DecimalField(decimal_places=8, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name="transactionhistory",
+            name="quantity",
+            field=models.DecimalField(decimal_places=8, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name="transactionhistory",
+            name="sale_price",
+            field=models.DecimalField(decimal_places=8, max_digits=20),
+        ),
+    ]
@@ -0,0 +1,211 @@
+# Generated by Django 5.0.6 on 2026-10-17 00:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_history(apps, schema_editor):
+    """
+    Record a buy row for every open position.
+
+    Existing rows are all sells of deleted investments, whose foreign key
+    was set to null, so their asset names cannot be recovered and stay
+    blank. 0018_legacy_sell_buys records their buys.
+    """
+    Investment = apps.get_model("core", "Investment")
+    TransactionHistory = apps.get_model("core", "TransactionHistory")
+    TransactionHistory.objects.bulk_create(
+        TransactionHistory(
+            investment_id=investment.id,
+            user_id=investment.user_id,
+            transaction_type="buy",
+            type=investment.type,
+            asset_name=investment.asset_name,
+            quantity=investment.quantity,
+            purchase_price=investment.purchase_price,
+            sale_price=investment.purchase_price,
+            purchase_date=investment.created_at,
+        )
+        for investment in Investment.objects.order_by("id").iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_decimal_money"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transactionhistory",
+            name="asset_name",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.CreateModel(
+            name="Lot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[
+                            ("fifo", "First in, first out"),
+                            ("lifo", "Last in, first out"),
+                            ("average", "Average cost"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("stock", "Stock"),
+                            ("bond", "Bond"),
+                            ("cc", "Cryptocurrency"),
+                        ],
+                        max_length=255,
+                    ),
+                ),
+                ("asset_name", models.CharField(max_length=255)),
+                ("acquired_at", models.DateTimeField()),
+                ("quantity", models.DecimalField(decimal_places=8, max_digits=20)),
+                ("cost", models.DecimalField(decimal_places=8, max_digits=20)),
+                (
+                    "opened_by",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="core.transactionhistory",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="LotAllocation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[
+                            ("fifo", "First in, first out"),
+                            ("lifo", "Last in, first out"),
+                            ("average", "Average cost"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("quantity", models.DecimalField(decimal_places=8, max_digits=20)),
+                ("cost_basis", models.DecimalField(decimal_places=8, max_digits=20)),
+                ("proceeds", models.DecimalField(decimal_places=8, max_digits=20)),
+                (
+                    "lot",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="allocations",
+                        to="core.lot",
+                    ),
+                ),
+                (
+                    "sell",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lot_allocations",
+                        to="core.transactionhistory",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="LotCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[
+                            ("fifo", "First in, first out"),
+                            ("lifo", "Last in, first out"),
+                            ("average", "Average cost"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("last_transaction_id", models.BigIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="lot",
+            index=models.Index(
+                condition=models.Q(("quantity__gt", 0)),
+                fields=["user", "method", "type", "asset_name", "id"],
+                name="lot_open_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lotallocation",
+            index=models.Index(
+                fields=["user", "method"], name="lot_allocation_user_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="lotcheckpoint",
+            constraint=models.UniqueConstraint(
+                fields=("user", "method"), name="unique_lot_checkpoint"
+            ),
+        ),
+        migrations.RunPython(backfill_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-17 00:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_lots"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="portfolio_updated_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
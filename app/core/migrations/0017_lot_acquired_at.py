@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-17 09:12
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def date_lots_at_purchase(apps, schema_editor):
+    """Date lots by the purchase of their buy row instead of its insert."""
+    Lot = apps.get_model("core", "Lot")
+    TransactionHistory = apps.get_model("core", "TransactionHistory")
+    Lot.objects.filter(opened_by__isnull=False).update(
+        acquired_at=Subquery(
+            TransactionHistory.objects.filter(id=OuterRef("opened_by_id")).values(
+                "purchase_date"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_refresh_token"),
+    ]
+
+    operations = [
+        migrations.RunPython(date_lots_at_purchase, migrations.RunPython.noop),
+    ]
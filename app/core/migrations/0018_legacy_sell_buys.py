@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-17 11:05
+
+from django.db import migrations
+
+
+def record_legacy_buys(apps, schema_editor):
+    """
+    Record the buy of every sell from before buys were recorded.
+
+    These sells are the only rows without an asset name: their investment
+    was deleted when sold and the name was not kept, so it cannot be
+    recovered. Each gets a buy row of the same unnamed asset, quantity
+    and purchase price at its purchase date, so holdings rebuilt from
+    the history no longer go negative. The lot engine already costed the
+    sells at their purchase price, and the lots opened by these buys are
+    never matched.
+    """
+    TransactionHistory = apps.get_model("core", "TransactionHistory")
+    TransactionHistory.objects.bulk_create(
+        TransactionHistory(
+            user_id=history.user_id,
+            transaction_type="buy",
+            type=history.type,
+            asset_name=history.asset_name,
+            quantity=history.quantity,
+            purchase_price=history.purchase_price,
+            sale_price=history.purchase_price,
+            purchase_date=history.purchase_date,
+        )
+        for history in TransactionHistory.objects.filter(
+            transaction_type="sell",
+            asset_name="",
+        )
+        .order_by("id")
+        .iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_lot_acquired_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(record_legacy_buys, migrations.RunPython.noop),
+    ]
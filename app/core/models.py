@@ -4,7 +4,9 @@ Database models.
 import uuid
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Max, OuterRef, Subquery, Sum
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -12,6 +14,7 @@ from django.contrib.auth.models import (
 )
 
 from core import constants
+from core.money import ZERO, money_field, quantity_field, to_money
 
 
 class UserManager(BaseUserManager):
@@ -20,12 +23,20 @@ class UserManager(BaseUserManager):
         """Create, save and return a new user."""
         if not email:
             raise ValueError('Email required.')
+        cash_balance = kwargs.pop('cash_balance', 0)
         user = self.model(email=self.normalize_email(email), **kwargs)
         user.set_password(password)
-        user.save(using=self._db)
+        with transaction.atomic(using=self._db):
+            user.save(using=self._db)
+            if cash_balance:
+                user.credit(cash_balance, kind='opening')
 
         return user
 
+    def touch_portfolio(self, user_id):
+        """Record that the positions or transactions of a user changed."""
+        self.filter(pk=user_id).update(portfolio_updated_at=timezone.now())
+
     def create_superuser(self, email, password):
         """Create, save and return a new superuser."""
         user = self.create_user(email=email, password=password)
@@ -42,30 +53,250 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
-    cash_balance = models.FloatField(default=0.0)
+    portfolio_updated_at = models.DateTimeField(default=timezone.now)
 
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
 
+    def _unsnapshotted_entries(self):
+        """Return the latest snapshot balance and the entries recorded since."""
+        snapshot = self.balance_snapshots.order_by('-last_entry_id').first()
+        if snapshot is None:
+            return ZERO, self.ledger_entries.all()
+        return snapshot.balance, self.ledger_entries.filter(id__gt=snapshot.last_entry_id)
+
+    @property
+    def cash_balance(self):
+        """Latest balance snapshot plus the ledger entries recorded since."""
+        balance, entries = self._unsnapshotted_entries()
+        return balance + (entries.aggregate(total=Sum('amount'))['total'] or ZERO)
+
+    def post_entries(self, entries):
+        """
+        Insert cash ledger entries unless they would overdraw the balance.
+
+        Credits are plain inserts. When the entries take money out, the
+        user row is locked with SELECT ... FOR UPDATE while the balance is
+        checked so that concurrent debits cannot overdraw the account; the
+        row itself is never updated. Returns whether the entries were posted.
+        """
+        total = sum(entry.amount for entry in entries)
+        with transaction.atomic():
+            if total < 0:
+                User.objects.select_for_update().values('pk').get(pk=self.pk)
+                if self.cash_balance < -total:
+                    return False
+            CashLedgerEntry.objects.bulk_create(entries)
+        return True
+
+    def credit(self, amount, kind='deposit'):
+        """Add amount to the cash balance."""
+        return self.post_entries([CashLedgerEntry(user=self, amount=to_money(amount), kind=kind)])
+
+    def debit(self, amount, kind='withdrawal'):
+        """Take amount from the cash balance if the balance covers it."""
+        return self.post_entries([CashLedgerEntry(user=self, amount=-to_money(amount), kind=kind)])
+
+    def compact_ledger(self, before):
+        """
+        Roll the ledger entries created up to before into a new snapshot.
+
+        Entries created after before are left for a later run, so entries
+        still being committed by concurrent transactions are not skipped.
+        The cut is made by id, as balances are read by id: every entry up
+        to the last one created by before is rolled in, including entries
+        created later that were inserted with a lower id. Returns the new
+        snapshot, or None if there was nothing to compact.
+        """
+        balance, entries = self._unsnapshotted_entries()
+        last_entry_id = entries.filter(created_at__lte=before).aggregate(
+            last_entry_id=Max('id'),
+        )['last_entry_id']
+        if last_entry_id is None:
+            return None
+        total = entries.filter(id__lte=last_entry_id).aggregate(
+            total=Sum('amount'),
+        )['total']
+        new_snapshot, _ = CashBalanceSnapshot.objects.get_or_create(
+            user=self,
+            last_entry_id=last_entry_id,
+            defaults={'balance': balance + total},
+        )
+        return new_snapshot
+
+
+class CashLedgerEntry(models.Model):
+    """Database model for a movement of cash in or out of an account."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='ledger_entries',
+        db_index=False,
+    )
+    kind = models.CharField(max_length=10, choices=constants.LEDGER_ENTRY_TYPE)
+    amount = money_field()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='ledger_user_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} of {self.amount}'
+
+
+class CashBalanceSnapshot(models.Model):
+    """Database model for a user's balance as of a ledger entry."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='balance_snapshots',
+        db_index=False,
+    )
+    last_entry_id = models.BigIntegerField()
+    balance = money_field()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'last_entry_id'],
+                name='unique_balance_snapshot',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.balance} as of entry {self.last_entry_id}'
+
+
+class PriceSnapshot(models.Model):
+    """Database model for the price of an asset at a point in time."""
+    asset_type = models.CharField(max_length=255, choices=constants.INVESTMENT_TYPE_CONSTANT)
+    symbol = models.CharField(max_length=255)
+    price = money_field()
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['asset_type', 'symbol', 'timestamp'],
+                name='unique_price_snapshot',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.symbol} at {self.timestamp}'
+
+
+class InvestmentQuerySet(models.QuerySet):
+    """QuerySet for investments."""
+
+    def with_latest_price(self):
+        """Annotate investments with the latest price snapshot of their asset."""
+        snapshots = PriceSnapshot.objects.filter(
+            asset_type=OuterRef('type'),
+            symbol=OuterRef('asset_name'),
+        ).order_by('-timestamp')
+        return self.annotate(
+            latest_price=Subquery(snapshots.values('price')[:1]),
+            latest_price_at=Subquery(snapshots.values('timestamp')[:1]),
+        )
+
 
 class Investment(models.Model):
     """Database model for investments."""
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='investments')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='investments',
+        db_index=False,
+    )
     transaction_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     title = models.CharField(max_length=255, blank=True)
     asset_name = models.CharField(max_length=255)
     type = models.CharField(max_length=255, choices=constants.INVESTMENT_TYPE_CONSTANT)
-    quantity = models.FloatField()
-    purchase_price = models.FloatField()
-    current_price = models.FloatField()
-    sale_price = models.FloatField(blank=True, null=True)
+    quantity = quantity_field()
+    purchase_price = money_field()
+    current_price = money_field()
+    sale_price = money_field(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     sale_date = models.DateTimeField(null=True, blank=True)
 
+    objects = InvestmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='investment_user_id_idx'),
+            models.Index(fields=['type', 'asset_name'], name='investment_asset_idx'),
+            models.Index(
+                fields=['user', '-id'],
+                condition=models.Q(sale_date__isnull=True),
+                name='investment_open_user_id_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
+    def _load_latest_price(self):
+        """Look up the latest snapshot unless the queryset annotated it."""
+        if not hasattr(self, 'latest_price'):
+            snapshot = PriceSnapshot.objects.filter(
+                asset_type=self.type,
+                symbol=self.asset_name,
+            ).order_by('-timestamp').first()
+            self.latest_price = snapshot.price if snapshot else None
+            self.latest_price_at = snapshot.timestamp if snapshot else None
+
+    @property
+    def market_price(self):
+        """Latest snapshot price of the asset, else the stored price."""
+        self._load_latest_price()
+        return self.current_price if self.latest_price is None else self.latest_price
+
+    @property
+    def price_updated_at(self):
+        """Time of the latest snapshot price of the asset."""
+        self._load_latest_price()
+        return self.latest_price_at
+
+    def buy_transaction(self):
+        """Return an unsaved history row recording the purchase."""
+        return TransactionHistory(
+            investment=self,
+            user_id=self.user_id,
+            transaction_type='buy',
+            type=self.type,
+            asset_name=self.asset_name,
+            quantity=self.quantity,
+            purchase_price=self.purchase_price,
+            sale_price=self.purchase_price,
+            purchase_date=self.created_at,
+        )
+
+    def sell_transaction(self, quantity, sale_price):
+        """
+        Return an unsaved history row recording the sale of quantity.
+
+        A sale of the whole position reuses its transaction_id.
+        """
+        history = TransactionHistory(
+            investment=self,
+            user_id=self.user_id,
+            transaction_type='sell',
+            type=self.type,
+            asset_name=self.asset_name,
+            quantity=quantity,
+            purchase_price=self.purchase_price,
+            sale_price=sale_price,
+            purchase_date=self.created_at,
+        )
+        if quantity == self.quantity:
+            history.transaction_id = self.transaction_id
+        return history
+
 
 class TransactionHistory(models.Model):
     """Database model for transaction history."""
@@ -75,15 +306,126 @@ class TransactionHistory(models.Model):
         null=True,
         blank=True
     )
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
     transaction_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     transaction_type = models.CharField(max_length=10, choices=constants.TRANSACTION_TYPE)
     type = models.CharField(max_length=255, choices=constants.INVESTMENT_TYPE_CONSTANT)
-    quantity = models.FloatField()
-    purchase_price = models.FloatField()
-    sale_price = models.FloatField()
+    asset_name = models.CharField(max_length=255, blank=True)
+    quantity = quantity_field()
+    purchase_price = money_field()
+    sale_price = money_field()
     purchase_date = models.DateTimeField()
     sale_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='history_user_id_idx'),
+            models.Index(fields=['user', 'sale_date'], name='history_user_sale_date_idx'),
+        ]
+
     def __str__(self):
         return f'{self.transaction_id} by {self.user.name}'
+
+
+class Lot(models.Model):
+    """Database model for an open or closed cost-basis lot of an asset."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    method = models.CharField(max_length=10, choices=constants.LOT_METHOD)
+    type = models.CharField(max_length=255, choices=constants.INVESTMENT_TYPE_CONSTANT)
+    asset_name = models.CharField(max_length=255)
+    opened_by = models.ForeignKey(
+        TransactionHistory,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+    )
+    acquired_at = models.DateTimeField()
+    quantity = quantity_field()
+    cost = money_field()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'method', 'type', 'asset_name', 'id'],
+                condition=models.Q(quantity__gt=0),
+                name='lot_open_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.quantity} {self.asset_name} ({self.method})'
+
+
+class LotAllocation(models.Model):
+    """Database model for the part of a sell matched against one lot."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    method = models.CharField(max_length=10, choices=constants.LOT_METHOD)
+    sell = models.ForeignKey(
+        TransactionHistory,
+        on_delete=models.CASCADE,
+        related_name='lot_allocations',
+    )
+    lot = models.ForeignKey(
+        Lot,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='allocations',
+    )
+    quantity = quantity_field()
+    cost_basis = money_field()
+    proceeds = money_field()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'method'], name='lot_allocation_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.quantity} of {self.sell.transaction_id} ({self.method})'
+
+
+class LotCheckpoint(models.Model):
+    """Database model for the last transaction matched into lots."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    method = models.CharField(max_length=10, choices=constants.LOT_METHOD)
+    last_transaction_id = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'method'], name='unique_lot_checkpoint'),
+        ]
+
+    def __str__(self):
+        return f'{self.method} lots of {self.user} up to {self.last_transaction_id}'
+
+
+class RefreshToken(models.Model):
+    """Database model for a revocable refresh token of signed access tokens."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='refresh_tokens',
+    )
+    key_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Refresh token of {self.user_id} until {self.expires_at}'
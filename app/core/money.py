@@ -0,0 +1,46 @@
+"""
+Fixed-precision money and quantity arithmetic.
+"""
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from django.db import models
+
+
+MAX_DIGITS = 20
+MONEY_PLACES = 8
+QUANTITY_PLACES = 8
+
+ZERO = Decimal(0)
+
+
+def _quantize(value, places):
+    """Return value as a Decimal rounded to a number of decimal places."""
+    if not isinstance(value, Decimal):
+        # Going through str keeps 0.1 from turning into 0.1000000000000000055.
+        value = Decimal(str(value))
+    return value.quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_EVEN)
+
+
+def to_money(value):
+    """Return a price or cash amount at the stored precision."""
+    return _quantize(value, MONEY_PLACES)
+
+
+def to_quantity(value):
+    """Return a quantity at the stored precision."""
+    return _quantize(value, QUANTITY_PLACES)
+
+
+def total(price, quantity):
+    """Return the cash amount of a quantity bought or sold at a price."""
+    return to_money(to_money(price) * to_quantity(quantity))
+
+
+def money_field(**kwargs):
+    """Return a model field for prices and cash amounts."""
+    return models.DecimalField(max_digits=MAX_DIGITS, decimal_places=MONEY_PLACES, **kwargs)
+
+
+def quantity_field(**kwargs):
+    """Return a model field for quantities."""
+    return models.DecimalField(max_digits=MAX_DIGITS, decimal_places=QUANTITY_PLACES, **kwargs)
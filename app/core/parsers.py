@@ -0,0 +1,34 @@
+"""
+JSON parser for the API.
+"""
+import codecs
+import io
+
+from django.conf import settings
+from rest_framework import parsers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+    JSON parser decoding with orjson when it is installed.
+
+    Bodies orjson rejects are parsed again by JSONParser, so invalid
+    JSON is reported the same way and non-strict JSON still parses.
+    Bodies in other encodings than UTF-8 and installs without orjson
+    use JSONParser.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
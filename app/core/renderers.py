@@ -0,0 +1,56 @@
+"""
+JSON renderer for the API.
+"""
+from decimal import Decimal
+
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSON renderer encoding with orjson when it is installed.
+
+    Values orjson has no native type for, such as Decimals, and dates
+    and times, go through the encoder of JSONRenderer, so the output
+    matches it apart from the exponent form of very large or small
+    floats and NaN rendering as null. Indented responses, data orjson
+    cannot encode and installs without orjson use JSONRenderer.
+    """
+
+    def get_default(self):
+        """Return the orjson fallback for types it cannot encode."""
+        default = self.encoder_class().default
+
+        def encode(obj):
+            # Money values are by far the most common, check them first.
+            if type(obj) is Decimal:
+                return float(obj)
+            return default(obj)
+        return encode
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.get_default(),
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escape the separators JSONRenderer escapes for JavaScript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
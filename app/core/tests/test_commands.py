@@ -0,0 +1,52 @@
+"""
+Tests for the core management commands.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import CashBalanceSnapshot
+
+
+class CompactLedgerCommandTests(TestCase):
+    """Test the compact_ledger command."""
+
+    def create_user(self, email, deposits):
+        """Create a user with a number of old deposits of 1."""
+        user = get_user_model().objects.create_user(email=email, password='testpass123')
+        for _ in range(deposits):
+            user.credit(1.0)
+        user.ledger_entries.update(created_at=timezone.now() - timedelta(hours=1))
+        return user
+
+    def test_compact_busy_ledgers(self):
+        """Test accounts with enough new entries get a snapshot."""
+        busy = self.create_user('busy@example.com', 3)
+        quiet = self.create_user('quiet@example.com', 1)
+        out = StringIO()
+
+        call_command('compact_ledger', '--min-entries=2', stdout=out)
+
+        self.assertIn('Compacted 1 cash ledgers.', out.getvalue())
+        snapshot = CashBalanceSnapshot.objects.get()
+        self.assertEqual(snapshot.user, busy)
+        self.assertEqual(snapshot.balance, 3.0)
+        self.assertFalse(quiet.balance_snapshots.exists())
+
+    def test_compact_counts_entries_since_snapshot(self):
+        """Test entries already in a snapshot are not counted again."""
+        user = self.create_user('test@example.com', 2)
+        call_command('compact_ledger', '--min-entries=2', stdout=StringIO())
+        user.credit(1.0)
+        user.ledger_entries.update(created_at=timezone.now() - timedelta(hours=1))
+
+        call_command('compact_ledger', '--min-entries=2', stdout=StringIO())
+        self.assertEqual(user.balance_snapshots.count(), 1)
+        call_command('compact_ledger', '--min-entries=1', stdout=StringIO())
+
+        self.assertEqual(user.balance_snapshots.count(), 2)
+        self.assertEqual(user.cash_balance, 3.0)
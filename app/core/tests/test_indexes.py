@@ -0,0 +1,67 @@
+"""
+Tests for the query plans of the per-user hot queries.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Investment, TransactionHistory
+
+
+class IndexUsageTests(TestCase):
+    """Test the hot queries are served by index scans."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='Testpass123',
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        """Assert the query plan of a queryset scans the given index."""
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan)
+
+    def test_investments_by_user(self):
+        """Test listing a user's investments uses the (user, -id) index."""
+        queryset = Investment.objects.filter(user=self.user).order_by('-id')
+
+        self.assertUsesIndex(queryset, 'investment_user_id_idx')
+
+    def test_open_investments_by_user(self):
+        """Test listing open positions uses the partial index."""
+        queryset = Investment.objects.filter(
+            user=self.user,
+            sale_date__isnull=True,
+        ).order_by('-id')
+
+        self.assertUsesIndex(queryset, 'investment_open_user_id_idx')
+
+    def test_investments_by_asset(self):
+        """Test looking up holders of an asset uses the (type, asset_name) index."""
+        queryset = Investment.objects.filter(type='cc', asset_name='bitcoin')
+
+        self.assertUsesIndex(queryset, 'investment_asset_idx')
+
+    def test_transactions_by_user(self):
+        """Test listing a user's transactions uses the (user, -id) index."""
+        queryset = TransactionHistory.objects.filter(user=self.user).order_by('-id')
+
+        self.assertUsesIndex(queryset, 'history_user_id_idx')
+
+    def test_transactions_by_user_and_date(self):
+        """Test a date range of a user's transactions uses the (user, sale_date) index."""
+        queryset = TransactionHistory.objects.filter(
+            user=self.user,
+            sale_date__gte=timezone.now() - timedelta(days=30),
+        )
+
+        self.assertUsesIndex(queryset, 'history_user_sale_date_idx')
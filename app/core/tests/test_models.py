@@ -1,6 +1,8 @@
 """
 Tests for models.
 """
+from datetime import timedelta
+
 from django.utils import timezone
 from django.test import TestCase
 from django.contrib.auth import get_user_model
@@ -109,3 +111,133 @@ class ModelTests(TestCase):
         self.assertEqual(str(transaction_history),
         f'{transaction_history.transaction_id} by {user.name}'
         )
+
+    def test_user_credit_and_debit(self):
+        """Test cash balance updates are applied in the database."""
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='Testpass123',
+            cash_balance=100.0,
+        )
+        stale = get_user_model().objects.get(pk=user.pk)
+
+        user.credit(50.0)
+        self.assertTrue(stale.debit(120.0))
+
+        self.assertEqual(stale.cash_balance, 30.0)
+        self.assertFalse(user.debit(31.0))
+        self.assertEqual(user.cash_balance, 30.0)
+
+    def test_cash_movements_recorded_in_ledger(self):
+        """Test every cash movement is recorded as a ledger entry."""
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='Testpass123',
+            cash_balance=100.0,
+        )
+        user.credit(20.0)
+        user.debit(50.0, kind='buy')
+
+        entries = user.ledger_entries.order_by('id').values_list('kind', 'amount')
+        self.assertEqual(list(entries), [
+            ('opening', 100.0),
+            ('deposit', 20.0),
+            ('buy', -50.0),
+        ])
+
+    def test_cash_balance_from_snapshot(self):
+        """Test the balance is the latest snapshot plus later entries."""
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='Testpass123',
+            cash_balance=100.0,
+        )
+        user.credit(20.0)
+        snapshot = user.compact_ledger(timezone.now())
+        user.credit(5.0)
+
+        self.assertEqual(snapshot.balance, 120.0)
+        self.assertEqual(snapshot.last_entry_id, user.ledger_entries.order_by('id')[1].id)
+        self.assertEqual(user.cash_balance, 125.0)
+        user.ledger_entries.filter(id__lte=snapshot.last_entry_id).update(amount=0)
+        self.assertEqual(user.cash_balance, 125.0)
+
+    def test_compact_ledger_skips_recent_entries(self):
+        """Test entries created after the cutoff are left for later."""
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='Testpass123',
+        )
+        cutoff = timezone.now()
+        user.credit(10.0)
+
+        self.assertIsNone(user.compact_ledger(cutoff))
+        self.assertEqual(user.cash_balance, 10.0)
+
+    def test_compact_ledger_cuts_by_id(self):
+        """Test an entry created after the cutoff but inserted first is kept."""
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='Testpass123',
+        )
+        cutoff = timezone.now()
+        models.CashLedgerEntry.objects.create(
+            user=user,
+            kind='deposit',
+            amount=10,
+            created_at=cutoff + timedelta(milliseconds=1),
+        )
+        models.CashLedgerEntry.objects.create(
+            user=user,
+            kind='deposit',
+            amount=5,
+            created_at=cutoff - timedelta(milliseconds=1),
+        )
+
+        snapshot = user.compact_ledger(cutoff)
+
+        self.assertEqual(snapshot.balance, 15)
+        self.assertEqual(user.cash_balance, 15)
+
+    def test_create_price_snapshot(self):
+        """Test creating a price snapshot is successful."""
+        snapshot = models.PriceSnapshot.objects.create(
+            asset_type='cc',
+            symbol='bitcoin',
+            price=60000.0,
+        )
+
+        self.assertEqual(str(snapshot), f'bitcoin at {snapshot.timestamp}')
+
+    def test_investment_latest_price(self):
+        """Test investments are annotated with the latest snapshot price."""
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='Testpass123',
+        )
+        models.Investment.objects.create(
+            user=user,
+            asset_name='bitcoin',
+            type='cc',
+            quantity=1.0,
+            purchase_price=5.7,
+            current_price=11.2,
+        )
+        now = timezone.now()
+        models.PriceSnapshot.objects.create(
+            asset_type='cc',
+            symbol='bitcoin',
+            price=20.0,
+            timestamp=now - timedelta(hours=1),
+        )
+        models.PriceSnapshot.objects.create(
+            asset_type='cc',
+            symbol='bitcoin',
+            price=30.0,
+            timestamp=now,
+        )
+        investment = models.Investment.objects.with_latest_price().get()
+
+        self.assertEqual(investment.latest_price, 30.0)
+        self.assertEqual(investment.market_price, 30.0)
+        self.assertEqual(investment.price_updated_at, now)
@@ -0,0 +1,27 @@
+"""
+Tests for the money arithmetic helpers.
+"""
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from core import money
+
+
+class MoneyTests(SimpleTestCase):
+    """Test money and quantity arithmetic."""
+
+    def test_to_money_from_float(self):
+        """Test floats are converted by their shortest repr."""
+        self.assertEqual(money.to_money(0.1), Decimal('0.10000000'))
+        self.assertEqual(money.to_money(0.1) * 3, Decimal('0.3'))
+
+    def test_to_money_rounds_half_even(self):
+        """Test values are rounded to the stored precision."""
+        self.assertEqual(money.to_money(Decimal('1.000000005')), Decimal('1.00000000'))
+        self.assertEqual(money.to_money(Decimal('1.000000015')), Decimal('1.00000002'))
+
+    def test_total(self):
+        """Test the cash amount of a quantity at a price."""
+        self.assertEqual(money.total(228.288, 10.2), Decimal('2328.5376'))
+        self.assertEqual(money.total('0.33333333', 3), Decimal('0.99999999'))
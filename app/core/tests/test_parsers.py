@@ -0,0 +1,45 @@
+"""
+Tests for the JSON parser.
+"""
+import io
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from core.parsers import FastJSONParser
+
+
+BODY = '{"title": "Café", "quantity": 1.5, "legs": [{"id": 1}], "closed": null}'
+
+
+def parse(parser, body, encoding='utf-8'):
+    """Return the data parsed from a request body."""
+    return parser.parse(io.BytesIO(body.encode(encoding)), parser_context={'encoding': encoding})
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test the JSON parser matches JSONParser."""
+
+    def test_same_data(self):
+        """Test bodies parse to the same data as JSONParser."""
+        self.assertEqual(parse(FastJSONParser(), BODY), parse(JSONParser(), BODY))
+
+    def test_other_encoding(self):
+        """Test bodies in another encoding than UTF-8 are decoded."""
+        self.assertEqual(
+            parse(FastJSONParser(), BODY, 'latin-1'),
+            parse(JSONParser(), BODY, 'latin-1'),
+        )
+
+    def test_fallback_without_orjson(self):
+        """Test the standard library parses when orjson is not installed."""
+        with patch('core.parsers.orjson', None):
+            self.assertEqual(parse(FastJSONParser(), BODY), parse(JSONParser(), BODY))
+
+    def test_invalid_json(self):
+        """Test invalid JSON raises a parse error."""
+        with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+            parse(FastJSONParser(), '{"title": ')
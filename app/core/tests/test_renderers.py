@@ -0,0 +1,112 @@
+"""
+Tests for the JSON renderer.
+"""
+import time
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, tag
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import TransactionHistory
+from core.renderers import FastJSONRenderer, orjson
+from investment.serializers import TransactionHistorySerializer
+
+
+DATA = {
+    'price': Decimal('10.12345678'),
+    'quantity': Decimal('3'),
+    'transaction_id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+    'day': date(2024, 5, 1),
+    'title': 'Café\u2028line',
+    'assets': [{'count': 1, 'ratio': 0.25, 'open': True, 'closed_at': None}],
+    1: 'non-string key',
+}
+
+
+def best_time(render, runs=5):
+    """Return the fastest of several timed calls."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        render()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the JSON renderer matches JSONRenderer."""
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_same_output(self):
+        """Test Decimals, UUIDs, datetimes and text render like JSONRenderer."""
+        self.assertEqual(FastJSONRenderer().render(DATA), JSONRenderer().render(DATA))
+
+    def test_fallback_without_orjson(self):
+        """Test the standard library renders when orjson is not installed."""
+        with patch('core.renderers.orjson', None):
+            ret = FastJSONRenderer().render(DATA)
+
+        self.assertEqual(ret, JSONRenderer().render(DATA))
+
+    def test_indent(self):
+        """Test indented output is left to JSONRenderer."""
+        ret = FastJSONRenderer().render(DATA, 'application/json; indent=2')
+
+        self.assertEqual(ret, JSONRenderer().render(DATA, 'application/json; indent=2'))
+
+    def test_none(self):
+        """Test no data renders an empty body."""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+@tag('benchmark')
+@skipIf(orjson is None, 'orjson is not installed')
+class FastJSONRendererBenchmarkTests(TestCase):
+    """Benchmark encoding a large transaction history."""
+    rows = 10000
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        now = timezone.now()
+        TransactionHistory.objects.bulk_create(
+            TransactionHistory(
+                user=user,
+                transaction_type='buy' if i % 2 == 0 else 'sell',
+                type='cc',
+                asset_name=f'asset-{i % 100}',
+                quantity=Decimal('1.25') * (i + 1),
+                purchase_price=Decimal('10.12345678'),
+                sale_price=Decimal('11.5'),
+                purchase_date=now,
+            )
+            for i in range(self.rows)
+        )
+
+    def test_10k_transactions(self):
+        """Test orjson encodes transaction history several times faster."""
+        data = TransactionHistorySerializer(
+            TransactionHistory.objects.order_by('-id'),
+            many=True,
+        ).data
+
+        stdlib_time = best_time(lambda: JSONRenderer().render(data))
+        fast_time = best_time(lambda: FastJSONRenderer().render(data))
+
+        print(
+            f'\nencoded {self.rows} transactions: JSONRenderer '
+            f'{stdlib_time * 1000:.1f} ms, FastJSONRenderer {fast_time * 1000:.1f} ms '
+            f'({stdlib_time / fast_time:.1f}x)'
+        )
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertGreater(stdlib_time / fast_time, 2)
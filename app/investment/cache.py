@@ -0,0 +1,146 @@
+"""
+Quote cache for the investment app.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+Quote = namedtuple('Quote', ['price', 'fetched_at', 'expires_at'])
+
+
+class QuoteCache:
+    """
+    Cache of asset prices keyed by (investment_type, identifier).
+
+    Prices are stored in the Django cache named by QUOTE_CACHE_ALIAS, so
+    a shared backend serves every worker. Each process also keeps a
+    bounded LRU of recently used quotes in front of that backend.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def backend(self):
+        """Return the Django cache the quotes are stored in."""
+        return caches[settings.QUOTE_CACHE_ALIAS]
+
+    def make_key(self, investment_type, identifier):
+        """Return the cache key for a quote."""
+        return f'quote:{investment_type}:{quote(identifier, safe="")}'
+
+    def make_batch_key(self, investment_type, identifiers):
+        """Return the key of a lookup of several quotes, for coalescing."""
+        names = ','.join(quote(identifier, safe='') for identifier in sorted(identifiers))
+        return f'quotes:{investment_type}:{hashlib.sha1(names.encode()).hexdigest()}'
+
+    def get_ttl(self, investment_type, now):
+        """Return for how many seconds a new quote stays fresh."""
+        ttl = settings.QUOTE_CACHE_TTL[investment_type]
+        if investment_type in settings.QUOTE_CACHE_BAR_ALIGNED:
+            ttl -= now % ttl
+        return ttl
+
+    def get_quote(self, investment_type, identifier, record=True):
+        """
+        Return a cached Quote or None when there is no fresh quote.
+
+        Lookups made with record=False do not touch the hit and miss
+        counters, which is used to re-check the cache before a fetch.
+        """
+        key = self.make_key(investment_type, identifier)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += record
+                    return entry
+                del self._entries[key]
+
+        entry = self.backend.get(key)
+        with self._lock:
+            if entry is None or entry.expires_at <= now:
+                self.misses += record
+                return None
+            self._remember(key, entry)
+            self.hits += record
+        return entry
+
+    def get(self, investment_type, identifier, record=True):
+        """Return a cached price or None when there is no fresh quote."""
+        entry = self.get_quote(investment_type, identifier, record=record)
+        return None if entry is None else entry.price
+
+    def get_quotes(self, investment_type, identifiers):
+        """Return a dict of identifier to Quote for the cached quotes."""
+        quotes = {}
+        for identifier in identifiers:
+            entry = self.get_quote(investment_type, identifier)
+            if entry is not None:
+                quotes[identifier] = entry
+        return quotes
+
+    def set(self, investment_type, identifier, price):
+        """Store a freshly fetched price for an asset and return its Quote."""
+        key = self.make_key(investment_type, identifier)
+        now = time.time()
+        ttl = self.get_ttl(investment_type, now)
+        entry = Quote(price, datetime.fromtimestamp(now, tz=timezone.utc), now + ttl)
+
+        self.backend.set(key, entry, timeout=math.ceil(ttl))
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def set_many(self, investment_type, prices):
+        """Store fresh prices given as a dict of identifier to price."""
+        return {
+            identifier: self.set(investment_type, identifier, price)
+            for identifier, price in prices.items()
+        }
+
+    def clear(self):
+        """Drop every cached quote and reset the counters."""
+        self.backend.clear()
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Return the counters used to size the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_entries': settings.QUOTE_CACHE_MAX_ENTRIES,
+            }
+
+    def _remember(self, key, entry):
+        """Keep an entry in the local LRU, evicting the oldest ones."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.QUOTE_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+quote_cache = QuoteCache()
@@ -0,0 +1,90 @@
+"""
+Conditional GET support for the investment API.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Subquery
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from core.models import PriceSnapshot
+
+
+def live_price_period():
+    """
+    Return the start of the current live pricing period.
+
+    With live pricing a list is priced from quotes at most as old as the
+    shortest quote cache TTL, so its prices may change once per period.
+    """
+    ttl = min(settings.QUOTE_CACHE_TTL.values())
+    now = int(time.time())
+    return now - now % ttl
+
+
+def portfolio_versions(user, prices=True):
+    """
+    Return when the user's portfolio last changed and the id and time of
+    the latest price snapshot, in one query.
+
+    The price snapshot is left out, as None, when prices is false.
+    """
+    users = get_user_model().objects.filter(pk=user.pk)
+    if not prices:
+        return users.values_list('portfolio_updated_at', flat=True).get(), None, None
+    latest = PriceSnapshot.objects.order_by('-id')
+    return users.annotate(
+        price_id=Subquery(latest.values('id')[:1]),
+        price_at=Subquery(latest.values('timestamp')[:1]),
+    ).values_list('portfolio_updated_at', 'price_id', 'price_at').get()
+
+
+class ConditionalListMixin:
+    """
+    Answer list requests with 304 Not Modified when nothing changed.
+
+    The ETag and Last-Modified of a list are derived from the user's
+    portfolio_updated_at and, for lists with depends_on_prices, from the
+    latest price snapshot, read in a single query. Unchanged lists are
+    answered without building the page, serializing it or pricing it.
+    """
+    depends_on_prices = False
+
+    def get_list_versions(self):
+        """Return the parts of the list's version and when it last changed."""
+        updated_at, price_id, price_at = portfolio_versions(
+            self.request.user,
+            prices=self.depends_on_prices,
+        )
+        versions = [updated_at.timestamp(), price_id]
+        last_modified = max(filter(None, [updated_at, price_at])).timestamp()
+        if self.depends_on_prices and settings.PRICING_MODE == 'live':
+            period = live_price_period()
+            versions.append(period)
+            last_modified = max(last_modified, period)
+        return versions, last_modified
+
+    def list(self, request, *args, **kwargs):
+        versions, last_modified = self.get_list_versions()
+        key = '|'.join(map(str, [
+            request.user.pk,
+            request.get_full_path(),
+            request.accepted_media_type,
+            *versions,
+        ]))
+        etag = quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified),
+        )
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ['Accept', 'Authorization'])
+        return response
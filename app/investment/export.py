@@ -0,0 +1,90 @@
+"""
+Streaming export of transaction history.
+"""
+import csv
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+
+EXPORT_FIELDS = [
+    'id',
+    'investment',
+    'user',
+    'transaction_id',
+    'transaction_type',
+    'type',
+    'asset_name',
+    'quantity',
+    'purchase_price',
+    'sale_price',
+    'purchase_date',
+    'sale_date',
+]
+
+# The "field": prefixes of NDJSON objects, in EXPORT_FIELDS order.
+NDJSON_KEYS = [json.dumps(field) + ': ' for field in EXPORT_FIELDS]
+
+
+class Echo:
+    """File-like object returning what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    """
+    Format a database value the way the API serializers output it.
+
+    Decimals are kept as their exact text rather than made floats, so
+    amounts keep every stored digit.
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def encode_value(value):
+    """Return the JSON text of a database value, Decimals as exact numbers."""
+    if isinstance(value, Decimal):
+        return str(value)
+    return json.dumps(format_value(value))
+
+
+def stream_csv(rows):
+    """Yield a CSV header and one CSV line per row of EXPORT_FIELDS values."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([format_value(value) for value in row])
+
+
+def stream_ndjson(rows):
+    """Yield one JSON object line per row of EXPORT_FIELDS values."""
+    for row in rows:
+        yield '{' + ', '.join(map(str.__add__, NDJSON_KEYS, map(encode_value, row))) + '}\n'
+
+
+async def iterate_async(lines, chunk_size):
+    """
+    Yield the lines of a blocking iterator from an async iterator.
+
+    The lines are read chunk_size at a time in the thread the database
+    is used from, so an ASGI server streams the export in constant
+    memory instead of reading it into a list first.
+    """
+    lines = iter(lines)
+    next_chunk = sync_to_async(lambda: list(islice(lines, chunk_size)))
+    while chunk := await next_chunk():
+        for line in chunk:
+            yield line
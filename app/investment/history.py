@@ -0,0 +1,177 @@
+"""
+Historical portfolio value for the investment app.
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, DateField, F, Q, Sum, Value, When, Window
+from django.db.models.functions import FirstValue, TruncDate
+from django.utils import timezone
+
+from core.models import PriceSnapshot, TransactionHistory
+
+
+def _day_start(day):
+    """Return the start of a day in the current time zone."""
+    return datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+
+
+def _transactions(user):
+    """Return the user's transactions annotated with their trade time."""
+    return TransactionHistory.objects.filter(user=user).annotate(
+        traded_at=Case(
+            When(transaction_type='buy', then=F('purchase_date')),
+            default=F('sale_date'),
+        ),
+    )
+
+
+def _daily_last_prices(queryset, timestamp, asset_fields, price, first_day):
+    """
+    Return the last price of each asset per day, in one query.
+
+    Rows before first_day fall in a single bucket dated the day before,
+    so the price each asset entered the range with comes back too.
+    """
+    bucket = Case(
+        When(**{f'{timestamp}__lt': _day_start(first_day)}, then=Value(first_day - timedelta(days=1))),
+        default=TruncDate(timestamp),
+        output_field=DateField(),
+    )
+    return queryset.annotate(
+        bucket=bucket,
+        last_price=Window(
+            FirstValue(price),
+            partition_by=[F(field) for field in asset_fields] + [bucket],
+            order_by=F(timestamp).desc(),
+        ),
+    ).values_list(*asset_fields, 'bucket', 'last_price').distinct()
+
+
+def _price_matrix(assets, days, end, transactions):
+    """
+    Return a days x assets matrix of the price at the end of each day.
+
+    Prices are the last stored snapshot of the day, else the last price
+    the user traded at, carried forward over days without either.
+    """
+    columns = {asset: column for column, asset in enumerate(assets)}
+    first = days[0].toordinal() - 1
+    observed = np.full((len(days) + 1, len(assets)), np.nan)
+
+    trades = _daily_last_prices(
+        transactions.filter(traded_at__lt=end),
+        'traded_at', ['type', 'asset_name'], 'sale_price', days[0],
+    )
+    snapshots = _daily_last_prices(
+        PriceSnapshot.objects.filter(
+            timestamp__lt=end,
+            symbol__in={asset_name for _, asset_name in assets},
+        ),
+        'timestamp', ['asset_type', 'symbol'], 'price', days[0],
+    )
+    # Snapshots are written last so they win over trades of the same day.
+    for rows in (trades, snapshots):
+        rows = [row for row in rows if (row[0], row[1]) in columns]
+        if rows:
+            observed[
+                [row[2].toordinal() - first for row in rows],
+                [columns[(row[0], row[1])] for row in rows],
+            ] = [float(row[3]) for row in rows]
+
+    # Forward fill: index of the last observed row at or before each row.
+    index = np.where(~np.isnan(observed), np.arange(len(days) + 1)[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    prices = observed[index, np.arange(len(assets))]
+    return np.nan_to_num(prices[1:])
+
+
+def position_matrices(user, days):
+    """
+    Return the assets and their holdings and prices on consecutive days.
+
+    Holdings are rebuilt from the buy and sell history as a days x assets
+    matrix: the quantity held before the first day plus the cumulative
+    sum of the trades of each day. Prices are the matching matrix of end
+    of day prices. Positions closed before the first day are left out,
+    and so are assets sold without a recorded buy, such as sells from
+    before buys were recorded, rather than held short.
+    The last day ends now if it is today.
+    """
+    start = _day_start(days[0])
+    end = min(_day_start(days[-1] + timedelta(days=1)), timezone.now())
+    transactions = _transactions(user)
+
+    opening = {
+        (row['type'], row['asset_name']): row['bought'] - row['sold']
+        for row in transactions.filter(traded_at__lt=start).values('type', 'asset_name').annotate(
+            bought=Sum('quantity', filter=Q(transaction_type='buy'), default=0),
+            sold=Sum('quantity', filter=~Q(transaction_type='buy'), default=0),
+        )
+        if row['bought'] > row['sold']
+    }
+    trades = list(
+        transactions.filter(traded_at__gte=start, traded_at__lt=end)
+        .values_list('type', 'asset_name', 'traded_at', 'transaction_type', 'quantity')
+    )
+    assets = sorted(set(opening) | {(row[0], row[1]) for row in trades})
+    if not assets:
+        return assets, np.zeros((len(days), 0)), np.zeros((len(days), 0))
+    columns = {asset: column for column, asset in enumerate(assets)}
+
+    holdings = np.zeros((len(days), len(assets)))
+    for asset, quantity in opening.items():
+        holdings[0, columns[asset]] = float(quantity)
+    if trades:
+        tz = timezone.get_current_timezone()
+        np.add.at(
+            holdings,
+            (
+                [row[2].astimezone(tz).date().toordinal() - days[0].toordinal() for row in trades],
+                [columns[(row[0], row[1])] for row in trades],
+            ),
+            [float(row[4]) if row[3] == 'buy' else -float(row[4]) for row in trades],
+        )
+    holdings = np.cumsum(holdings, axis=0)
+
+    return assets, holdings, _price_matrix(assets, days, end, transactions)
+
+
+def portfolio_values(user, days):
+    """
+    Return the portfolio value at the end of each of consecutive days.
+
+    The values are the row sums of the holdings times the price matrix.
+    """
+    _, holdings, prices = position_matrices(user, days)
+    return (holdings * prices).sum(axis=1)
+
+
+def portfolio_history(user, first_day, last_day):
+    """
+    Return (day, value) pairs of the portfolio value from first_day.
+
+    Values of closed days do not change any more and are cached, so a
+    call computes the days from the first uncached one, usually just
+    today. Days after today are left out.
+    """
+    today = timezone.localdate()
+    days = [
+        first_day + timedelta(days=n)
+        for n in range((min(last_day, today) - first_day).days + 1)
+    ]
+    keys = {day: f'portfolio-value:{user.pk}:{day.isoformat()}' for day in days}
+    cached = cache.get_many([keys[day] for day in days if day < today])
+    values = {day: cached[keys[day]] for day in days if keys[day] in cached}
+
+    missing = [day for day in days if day not in values]
+    if missing:
+        span = days[days.index(missing[0]):]
+        values.update(zip(span, portfolio_values(user, span).tolist()))
+        cache.set_many(
+            {keys[day]: values[day] for day in span if day < today},
+            settings.PORTFOLIO_HISTORY_CACHE_TTL,
+        )
+    return [(day, values[day]) for day in days]
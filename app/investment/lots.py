@@ -0,0 +1,204 @@
+"""
+Cost-basis lot accounting for the investment app.
+"""
+from collections import defaultdict, deque
+from datetime import timedelta
+from itertools import takewhile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from core import money
+from core.models import Lot, LotAllocation, LotCheckpoint, TransactionHistory
+
+
+class LotBook:
+    """
+    Open lots of one account, matched in memory with one cost method.
+
+    Buys open a lot, or for the average method add to the one open lot
+    of the asset. Sells take quantity from the oldest (fifo), newest
+    (lifo) or only (average) open lot first, moving a proportional part
+    of the lot's cost. Sells without enough open lots, such as positions
+    opened before buys were recorded, fall back to their own purchase
+    price for the unmatched quantity.
+    """
+
+    def __init__(self, user, method, lots):
+        self.user = user
+        self.method = method
+        self.open = defaultdict(deque)
+        for lot in lots:
+            self.open[(lot.type, lot.asset_name)].append(lot)
+        self.new_lots = []
+        self.changed = {}
+        self.allocations = []
+
+    def buy(self, history):
+        """Add a buy transaction to the open lots of its asset."""
+        lots = self.open[(history.type, history.asset_name)]
+        cost = money.total(history.purchase_price, history.quantity)
+        if self.method == 'average' and lots:
+            lot = lots[0]
+            lot.quantity += history.quantity
+            lot.cost += cost
+            self._changed(lot)
+            return
+        lot = Lot(
+            user=self.user,
+            method=self.method,
+            type=history.type,
+            asset_name=history.asset_name,
+            opened_by=history,
+            acquired_at=history.purchase_date,
+            quantity=history.quantity,
+            cost=cost,
+        )
+        lots.append(lot)
+        self.new_lots.append(lot)
+
+    def sell(self, history):
+        """Match a sell transaction against the open lots of its asset."""
+        lots = self.open[(history.type, history.asset_name)]
+        remaining = history.quantity
+        while remaining > 0 and lots:
+            lot = lots[-1] if self.method == 'lifo' else lots[0]
+            quantity = min(remaining, lot.quantity)
+            cost = money.to_money(lot.cost * quantity / lot.quantity)
+            lot.quantity -= quantity
+            lot.cost -= cost
+            if lot.quantity == 0 and self.method == 'lifo':
+                lots.pop()
+            elif lot.quantity == 0:
+                lots.popleft()
+            self._changed(lot)
+            self._allocate(history, lot, quantity, cost)
+            remaining -= quantity
+        if remaining > 0:
+            self._allocate(
+                history,
+                None,
+                remaining,
+                money.total(history.purchase_price, remaining),
+            )
+
+    def match(self, transactions):
+        """Add buy and sell transactions in order."""
+        for history in transactions:
+            if history.transaction_type == 'buy':
+                self.buy(history)
+            else:
+                self.sell(history)
+
+    def _changed(self, lot):
+        """Remember a stored lot to update."""
+        if lot.pk is not None:
+            self.changed[lot.pk] = lot
+
+    def _allocate(self, history, lot, quantity, cost):
+        """Record the part of a sell matched against a lot."""
+        self.allocations.append(LotAllocation(
+            user=self.user,
+            method=self.method,
+            sell=history,
+            lot=lot,
+            quantity=quantity,
+            cost_basis=cost,
+            proceeds=money.total(history.sale_price, quantity),
+        ))
+
+    def save(self):
+        """Write the new and changed lots and the allocations."""
+        Lot.objects.bulk_create(self.new_lots)
+        Lot.objects.bulk_update(self.changed.values(), ['quantity', 'cost'])
+        LotAllocation.objects.bulk_create(self.allocations)
+        self.new_lots = []
+        self.changed = {}
+        self.allocations = []
+
+
+def process_lots(user, method):
+    """
+    Match the user's transactions since the last checkpoint into lots.
+
+    Only the open lots of the assets traded since the checkpoint are
+    loaded, so the cost is proportional to the new transactions rather
+    than to the whole history. A transaction can commit after one with
+    a higher id, so the checkpoint only moves over transactions inserted
+    more than LOT_SETTLE_DELAY seconds ago. The transactions from the
+    first newer one on are matched in memory and again by a later call.
+    Returns the unsaved allocations of these pending transactions.
+    """
+    settled_before = timezone.now() - timedelta(seconds=settings.LOT_SETTLE_DELAY)
+    with transaction.atomic():
+        checkpoint, _ = LotCheckpoint.objects.select_for_update().get_or_create(
+            user=user,
+            method=method,
+        )
+        transactions = list(
+            TransactionHistory.objects.filter(
+                user=user,
+                id__gt=checkpoint.last_transaction_id,
+            ).order_by('id')
+        )
+        if not transactions:
+            return []
+
+        assets = {(history.type, history.asset_name) for history in transactions}
+        lots = Lot.objects.filter(
+            user=user,
+            method=method,
+            quantity__gt=0,
+            asset_name__in={asset_name for _, asset_name in assets},
+        ).order_by('id')
+        book = LotBook(
+            user,
+            method,
+            (lot for lot in lots if (lot.type, lot.asset_name) in assets),
+        )
+        settled = list(takewhile(lambda history: history.sale_date <= settled_before, transactions))
+        if settled:
+            book.match(settled)
+            book.save()
+            checkpoint.last_transaction_id = settled[-1].id
+            checkpoint.save(update_fields=['last_transaction_id'])
+        book.match(transactions[len(settled):])
+    return book.allocations
+
+
+def realized_gains(user, method):
+    """Return the realized gains of a user per asset, matched by method."""
+    pending = process_lots(user, method)
+    assets = {
+        (row['type'], row['asset_name']): row
+        for row in LotAllocation.objects.filter(user=user, method=method)
+        .values(type=F('sell__type'), asset_name=F('sell__asset_name'))
+        .annotate(
+            quantity=Sum('quantity'),
+            proceeds=Sum('proceeds'),
+            cost_basis=Sum('cost_basis'),
+        )
+    }
+    for allocation in pending:
+        key = (allocation.sell.type, allocation.sell.asset_name)
+        row = assets.setdefault(key, {
+            'type': key[0],
+            'asset_name': key[1],
+            'quantity': money.ZERO,
+            'proceeds': money.ZERO,
+            'cost_basis': money.ZERO,
+        })
+        row['quantity'] += allocation.quantity
+        row['proceeds'] += allocation.proceeds
+        row['cost_basis'] += allocation.cost_basis
+    assets = [assets[key] for key in sorted(assets)]
+    for row in assets:
+        row['realized_gain'] = row['proceeds'] - row['cost_basis']
+
+    return {
+        'method': method,
+        'realized_gain': sum((row['realized_gain'] for row in assets), money.ZERO),
+        'assets': assets,
+    }
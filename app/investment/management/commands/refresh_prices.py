@@ -0,0 +1,57 @@
+"""
+Django command to refresh stored prices of held assets.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from investment.utils import refresh_asset_prices
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Django command to periodically refresh asset prices."""
+    help = 'Refresh the price snapshots of every held asset.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Refresh prices once and exit.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.PRICE_REFRESH_INTERVAL,
+            help='Seconds to wait between refreshes.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.PRICE_REFRESH_WORKERS,
+            help='Maximum number of concurrent quote fetches.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        while True:
+            started = time.monotonic()
+            try:
+                updated = refresh_asset_prices(max_workers=options['workers'])
+            except Exception:
+                if options['once']:
+                    raise
+                # Keep the worker alive, the next refresh may succeed.
+                logger.exception('Error while refreshing asset prices')
+            else:
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    self.style.SUCCESS(f'Refreshed {updated} asset prices in {elapsed:.2f}s.')
+                )
+            if options['once']:
+                break
+            time.sleep(max(options['interval'] - (time.monotonic() - started), 0))
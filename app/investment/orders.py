@@ -0,0 +1,131 @@
+"""
+Batch order execution for the investment app.
+"""
+import logging
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from core import money
+from core.models import CashLedgerEntry, Investment, TransactionHistory
+from investment.utils import get_current_quotes, record_snapshots
+
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientFunds(Exception):
+    """Raised when the cash balance cannot cover a batch of orders."""
+
+
+def _price_assets(assets):
+    """Return quotes for a set of (type, asset_name), one batch per type."""
+    by_type = defaultdict(list)
+    for investment_type, asset_name in assets:
+        by_type[investment_type].append(asset_name)
+
+    quotes = {}
+    for investment_type, asset_names in by_type.items():
+        try:
+            quotes[investment_type] = get_current_quotes(investment_type, asset_names)
+        except ValueError as e:
+            logger.error(f"Error while retrieving current prices for {investment_type}: {e}")
+            quotes[investment_type] = {}
+    return quotes
+
+
+def execute_orders(user, legs):
+    """
+    Execute a batch of buy and sell legs for a user.
+
+    All distinct assets are priced with one quote batch per investment
+    type and the cash balance is checked once for the whole batch. The
+    positions sold are then locked and sold in the quantity they hold at
+    that point, so concurrent sells of the same positions are not paid
+    twice. The filled legs, their history rows in leg order and their
+    ledger entries are written with bulk inserts and one delete inside a
+    single transaction. Returns the per-leg results, in the order of the
+    legs.
+
+    Raises InsufficientFunds if the cash balance plus the proceeds of
+    the sells does not cover the buys.
+    """
+    sell_ids = [leg['investment'] for leg in legs if leg['side'] == 'sell']
+    positions = Investment.objects.with_latest_price().filter(
+        user=user,
+        id__in=sell_ids,
+    ).in_bulk()
+
+    assets = {(leg['type'], leg['asset_name']) for leg in legs if leg['side'] == 'buy'}
+    assets.update((position.type, position.asset_name) for position in positions.values())
+    quotes = _price_assets(assets)
+
+    with transaction.atomic():
+        # Quotes are fetched before taking the locks; the quantities sold
+        # are read from the locked rows.
+        locked = Investment.objects.select_for_update().filter(
+            user=user,
+            id__in=positions,
+        ).in_bulk()
+
+        results = []
+        buys = []
+        history = []
+        entries = []
+        sold_ids = set()
+        for index, leg in enumerate(legs):
+            result = {'index': index, 'side': leg['side']}
+            results.append(result)
+
+            if leg['side'] == 'buy':
+                quote = quotes[leg['type']].get(leg['asset_name'])
+                if quote is None:
+                    result.update(status='rejected', detail='Price unavailable.')
+                    continue
+                price = quote.price
+                investment = Investment(
+                    user=user,
+                    title=leg.get('title', ''),
+                    asset_name=leg['asset_name'],
+                    type=leg['type'],
+                    quantity=leg['quantity'],
+                    purchase_price=price,
+                    current_price=price,
+                )
+                amount = money.total(price, leg['quantity'])
+                entries.append(CashLedgerEntry(user=user, amount=-amount, kind='buy'))
+                buys.append((result, investment))
+                history.append(investment)
+            else:
+                position = locked.get(leg['investment'])
+                if position is None or position.id in sold_ids:
+                    result.update(status='rejected', detail='Investment not found.')
+                    continue
+                quote = quotes[position.type].get(position.asset_name)
+                if quote is None:
+                    price = positions[position.id].market_price
+                else:
+                    price = quote.price
+                amount = money.total(price, position.quantity)
+                entries.append(CashLedgerEntry(user=user, amount=amount, kind='sell'))
+                sold_ids.add(position.id)
+                history.append(position.sell_transaction(position.quantity, price))
+                result['investment'] = position.id
+
+            result.update(status='filled', price=price, amount=amount)
+
+        if not user.post_entries(entries):
+            raise InsufficientFunds()
+        Investment.objects.bulk_create([investment for _, investment in buys])
+        TransactionHistory.objects.bulk_create([
+            item.buy_transaction() if isinstance(item, Investment) else item
+            for item in history
+        ])
+        Investment.objects.filter(id__in=sold_ids).delete()
+        get_user_model().objects.touch_portfolio(user.pk)
+    record_snapshots(quotes)
+
+    for result, investment in buys:
+        result['investment'] = investment.id
+    return results
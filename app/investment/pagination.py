@@ -0,0 +1,17 @@
+"""
+Pagination for the investment API.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    """
+    Keyset pagination over rows newest first.
+
+    Pages are selected with WHERE id < cursor instead of an offset, so
+    deep pages cost the same as the first one.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
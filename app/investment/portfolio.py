@@ -0,0 +1,58 @@
+"""
+Portfolio analytics for the investment app.
+"""
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from core import money
+from core.models import Investment, TransactionHistory
+
+
+def portfolio_summary(user):
+    """
+    Return market value, cost basis, P&L and allocation of a portfolio.
+
+    Open positions are aggregated per type in one query, valued at the
+    latest price snapshot of their asset. Realized P&L is aggregated
+    from the sell transactions in a second query.
+    """
+    allocation = list(
+        Investment.objects.with_latest_price()
+        .filter(user=user)
+        .values('type')
+        .annotate(
+            market_value=Sum(
+                F('quantity') * Coalesce('latest_price', 'current_price'),
+                output_field=money.money_field(),
+            ),
+            cost_basis=Sum(
+                F('quantity') * F('purchase_price'),
+                output_field=money.money_field(),
+            ),
+        )
+        .order_by('type')
+    )
+    realized = TransactionHistory.objects.filter(
+        user=user,
+        transaction_type='sell',
+    ).aggregate(
+        realized_pnl=Coalesce(
+            Sum((F('sale_price') - F('purchase_price')) * F('quantity')),
+            Value(money.ZERO),
+            output_field=money.money_field(),
+        ),
+    )
+
+    market_value = sum((row['market_value'] for row in allocation), money.ZERO)
+    cost_basis = sum((row['cost_basis'] for row in allocation), money.ZERO)
+    for row in allocation:
+        row['unrealized_pnl'] = row['market_value'] - row['cost_basis']
+        row['weight'] = float(row['market_value'] / market_value) if market_value else 0.0
+
+    return {
+        'market_value': market_value,
+        'cost_basis': cost_basis,
+        'unrealized_pnl': market_value - cost_basis,
+        'realized_pnl': realized['realized_pnl'],
+        'allocation': allocation,
+    }
@@ -0,0 +1,224 @@
+"""
+Price providers for the investment app.
+"""
+import asyncio
+import logging
+import threading
+from functools import lru_cache
+
+import aiohttp
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from pycoingecko import CoinGeckoAPI
+from requests.adapters import HTTPAdapter
+
+from core.constants import ALPHA_VANTAGE_API_KEY
+
+
+logger = logging.getLogger(__name__)
+
+ALPHA_VANTAGE_URL = 'https://www.alphavantage.co/query'
+
+
+def parse_intraday_close(symbol, data):
+    """Return the latest 5 minute close from an Alpha Vantage response."""
+    if "Time Series (5min)" in data:
+        latest_timestamp = max(data["Time Series (5min)"].keys())
+        latest_data = data["Time Series (5min)"][latest_timestamp]
+        return float(latest_data['4. close'])
+    else:
+        raise ValueError(f"Key 'Time Series (5min)' not found in response for {symbol}: {data}")
+
+
+class PriceProvider:
+    """Base class for a source of asset prices."""
+
+    def get_quotes(self, symbols):
+        """
+        Return a dict of symbol to price.
+
+        Symbols that could not be priced are left out of the result.
+        """
+        raise NotImplementedError
+
+    def get_quote(self, symbol):
+        """Return the price of a single symbol."""
+        quotes = self.get_quotes([symbol])
+        if symbol in quotes:
+            return quotes[symbol]
+        else:
+            raise ValueError(f"Price for {symbol} not found")
+
+
+class AlphaVantageProvider(PriceProvider):
+    """Stock and bond prices from Alpha Vantage over a pooled session."""
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.mount(
+            'https://',
+            HTTPAdapter(pool_maxsize=settings.PRICE_PROVIDER_MAX_CONCURRENCY),
+        )
+
+    def get_intraday(self, symbol):
+        """Return the raw intraday time series response for a symbol."""
+        response = self.session.get(
+            ALPHA_VANTAGE_URL,
+            params={
+                'function': 'TIME_SERIES_INTRADAY',
+                'symbol': symbol,
+                'interval': '5min',
+                'outputsize': 'compact',
+                'apikey': ALPHA_VANTAGE_API_KEY,
+            },
+            timeout=settings.PRICE_PROVIDER_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def get_quotes(self, symbols):
+        quotes = {}
+        for symbol in symbols:
+            try:
+                quotes[symbol] = parse_intraday_close(symbol, self.get_intraday(symbol))
+            except (requests.RequestException, ValueError) as e:
+                logger.error(f"Error while retrieving current price for {symbol}: {e}")
+        return quotes
+
+
+class CoinGeckoProvider(PriceProvider):
+    """Cryptocurrency prices from CoinGecko, batched into one request."""
+
+    def __init__(self):
+        self.client = CoinGeckoAPI()
+
+    def get_quotes(self, symbols):
+        data = self.client.get_price(ids=','.join(symbols), vs_currencies='usd')
+        return {
+            symbol: data[symbol]['usd']
+            for symbol in symbols
+            if symbol in data
+        }
+
+
+class AsyncPriceProvider(PriceProvider):
+    """
+    Base class for providers fetching one symbol per request with asyncio.
+
+    Requests of all symbols are fanned out at once on an event loop owned
+    by the provider, at most PRICE_PROVIDER_MAX_CONCURRENCY at a time, and
+    share one long-lived aiohttp session.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    async def fetch_quote(self, session, symbol):
+        """Return the price of a symbol."""
+        raise NotImplementedError
+
+    async def get_quotes_async(self, symbols):
+        """Fetch prices of all symbols concurrently."""
+        semaphore = asyncio.Semaphore(settings.PRICE_PROVIDER_MAX_CONCURRENCY)
+        session = self._get_session()
+
+        async def fetch(symbol):
+            async with semaphore:
+                try:
+                    return symbol, await self.fetch_quote(session, symbol)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    logger.error(f"Error while retrieving current price for {symbol}: {e}")
+                    return symbol, None
+
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+        return {symbol: price for symbol, price in results if price is not None}
+
+    def get_quotes(self, symbols):
+        future = asyncio.run_coroutine_threadsafe(
+            self.get_quotes_async(symbols),
+            self._get_loop(),
+        )
+        return future.result()
+
+    def close(self):
+        """Close the shared session and stop the event loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = None
+        loop.call_soon_threadsafe(loop.stop)
+
+    def _get_loop(self):
+        """Return the provider's event loop, starting it on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        return self._loop
+
+    def _get_session(self):
+        """Return the session shared by all requests of the provider."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=settings.PRICE_PROVIDER_MAX_CONCURRENCY),
+                timeout=aiohttp.ClientTimeout(total=settings.PRICE_PROVIDER_TIMEOUT),
+            )
+        return self._session
+
+
+class AsyncAlphaVantageProvider(AsyncPriceProvider):
+    """Stock and bond prices from Alpha Vantage fetched concurrently."""
+
+    async def fetch_quote(self, session, symbol):
+        params = {
+            'function': 'TIME_SERIES_INTRADAY',
+            'symbol': symbol,
+            'interval': '5min',
+            'outputsize': 'compact',
+            'apikey': ALPHA_VANTAGE_API_KEY,
+        }
+        async with session.get(ALPHA_VANTAGE_URL, params=params) as response:
+            response.raise_for_status()
+            data = await response.json()
+        return parse_intraday_close(symbol, data)
+
+
+class FakePriceProvider(PriceProvider):
+    """Offline provider returning prices from the FAKE_PRICES setting."""
+
+    def get_quotes(self, symbols):
+        prices = settings.FAKE_PRICES
+        return {
+            symbol: prices.get(symbol, prices['default'])
+            for symbol in symbols
+        }
+
+
+@lru_cache(maxsize=None)
+def load_provider(path):
+    """Return the shared provider instance for a dotted class path."""
+    return import_string(path)()
+
+
+def get_provider(investment_type):
+    """Return the price provider configured for an investment type."""
+    try:
+        path = settings.PRICE_PROVIDERS[investment_type]
+    except KeyError:
+        raise ValueError(f"Unknown investment type {investment_type}.")
+    return load_provider(path)
+
+
+@receiver(setting_changed)
+def reset_providers(setting, **kwargs):
+    """Drop provider instances when provider settings change."""
+    if setting in ('PRICE_PROVIDERS', 'PRICE_PROVIDER_MAX_CONCURRENCY', 'PRICE_PROVIDER_TIMEOUT'):
+        load_provider.cache_clear()
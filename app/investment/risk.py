@@ -0,0 +1,146 @@
+"""
+Portfolio risk analytics for the investment app.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from core.models import PriceSnapshot, TransactionHistory
+from investment.history import position_matrices
+
+
+def _returns(prices):
+    """
+    Return the daily simple returns of the columns of a price matrix.
+
+    Days without a previous price, before an asset was first priced,
+    count as a return of zero.
+    """
+    previous = prices[:-1]
+    return np.divide(
+        prices[1:] - previous,
+        previous,
+        out=np.zeros_like(previous),
+        where=previous > 0,
+    )
+
+
+def _portfolio_returns(holdings, prices):
+    """
+    Return the daily returns of a portfolio of changing holdings.
+
+    Each day's return is the change in value of the positions held at
+    the end of the previous day, so buys and sells are not counted as
+    gains or losses.
+    """
+    previous = (holdings[:-1] * prices[:-1]).sum(axis=1)
+    change = (holdings[:-1] * (prices[1:] - prices[:-1])).sum(axis=1)
+    return np.divide(change, previous, out=np.zeros_like(previous), where=previous > 0)
+
+
+def risk_metrics(returns):
+    """
+    Return the annualized volatility, maximum drawdown, Sharpe ratio and
+    correlation matrix of the columns of a days x series returns matrix.
+
+    All series are computed together with array operations. Metrics of
+    series without any variance are NaN.
+    """
+    periods = settings.RISK_PERIODS_PER_YEAR
+    mean = returns.mean(axis=0)
+    std = returns.std(axis=0, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = std * np.sqrt(periods)
+        sharpe = (mean * periods - settings.RISK_FREE_RATE) / volatility
+        sharpe[std == 0] = np.nan
+
+        growth = np.cumprod(1 + returns, axis=0)
+        growth = np.vstack([np.ones(returns.shape[1]), growth])
+        max_drawdown = (1 - growth / np.maximum.accumulate(growth, axis=0)).max(axis=0)
+
+        scores = (returns - mean) / np.where(std > 0, std, np.nan)
+        correlation = np.clip(scores.T @ scores / (len(returns) - 1), -1, 1)
+    return volatility, max_drawdown, sharpe, correlation
+
+
+def _floats(values):
+    """Return an array as a list of floats with None for NaN."""
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
+
+def portfolio_version(user):
+    """
+    Return a value that changes whenever the risk inputs of a user change.
+
+    It changes with the user's portfolio_updated_at, each new price
+    snapshot of an asset the user traded and each new day, read in one
+    query. Snapshots of other assets leave it unchanged.
+    """
+    latest = PriceSnapshot.objects.filter(Exists(
+        TransactionHistory.objects.filter(
+            user=user,
+            type=OuterRef('asset_type'),
+            asset_name=OuterRef('symbol'),
+        )
+    )).order_by('-id')
+    updated_at, price_id = get_user_model().objects.filter(pk=user.pk).annotate(
+        price_id=Subquery(latest.values('id')[:1]),
+    ).values_list('portfolio_updated_at', 'price_id').get()
+    return f'{updated_at.timestamp()}:{price_id}:{timezone.localdate().isoformat()}'
+
+
+def _compute_risk(user, window):
+    """Return the risk analytics of the user's portfolio over a window."""
+    today = timezone.localdate()
+    days = [today - timedelta(days=n) for n in range(window - 1, -1, -1)]
+    assets, holdings, prices = position_matrices(user, days)
+
+    held = (holdings > 0).any(axis=0)
+    assets = [asset for asset, keep in zip(assets, held) if keep]
+    holdings, prices = holdings[:, held], prices[:, held]
+
+    returns = np.column_stack([_returns(prices), _portfolio_returns(holdings, prices)])
+    volatility, max_drawdown, sharpe, correlation = risk_metrics(returns)
+    volatility, max_drawdown, sharpe = _floats(volatility), _floats(max_drawdown), _floats(sharpe)
+
+    return {
+        'window': window,
+        'start': days[0],
+        'end': days[-1],
+        'portfolio': {
+            'volatility': volatility[-1],
+            'max_drawdown': max_drawdown[-1],
+            'sharpe_ratio': sharpe[-1],
+        },
+        'assets': [
+            {
+                'type': asset_type,
+                'asset_name': asset_name,
+                'volatility': volatility[column],
+                'max_drawdown': max_drawdown[column],
+                'sharpe_ratio': sharpe[column],
+            }
+            for column, (asset_type, asset_name) in enumerate(assets)
+        ],
+        'correlation': [_floats(row) for row in correlation[:-1, :-1]],
+    }
+
+
+def portfolio_risk(user, window):
+    """
+    Return the risk analytics of the user's portfolio over a window of days.
+
+    Results are memoized per user, window and portfolio version, so
+    repeated requests with unchanged inputs are served from the cache.
+    """
+    key = f'portfolio-risk:{user.pk}:{window}:{portfolio_version(user)}'
+    risk = cache.get(key)
+    if risk is None:
+        risk = _compute_risk(user, window)
+        cache.set(key, risk, settings.RISK_CACHE_TTL)
+    return risk
@@ -1,13 +1,62 @@
 """
 Serializers for the investment API.
 """
-from rest_framework import serializers
+from datetime import timezone as dt_timezone
+from functools import partial
+from operator import itemgetter
 
+from django.conf import settings
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import ISO_8601, relations, serializers
+from rest_framework.settings import api_settings
+
+from core import constants, money
 from core.models import Investment, TransactionHistory
 
 
-class InvestmentSerializer(serializers.ModelSerializer):
+class MoneyField(serializers.DecimalField):
+    """Serializer field for prices and cash amounts."""
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            max_digits=money.MAX_DIGITS,
+            decimal_places=money.MONEY_PLACES,
+            **kwargs,
+        )
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Model serializer narrowed to the output fields passed as `fields`.
+
+    Meta.source_columns lists the model fields read by sources that are
+    not model fields themselves.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_columns(self):
+        """Return the model fields the output fields read, for .only()."""
+        model_fields = {field.name for field in self.Meta.model._meta.concrete_fields}
+        source_columns = getattr(self.Meta, 'source_columns', {})
+        columns = set()
+        for field in self.fields.values():
+            if field.source in source_columns:
+                columns.update(source_columns[field.source])
+            elif field.source in model_fields:
+                columns.add(field.source)
+        return sorted(columns)
+
+
+class InvestmentSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for the investment object."""
+    current_price = MoneyField(source='market_price', read_only=True)
+    price_updated_at = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = Investment
@@ -21,6 +70,7 @@ class InvestmentSerializer(serializers.ModelSerializer):
             'quantity',
             'purchase_price',
             'current_price',
+            'price_updated_at',
             'created_at',
             'sale_date',
         ]
@@ -29,12 +79,17 @@ class InvestmentSerializer(serializers.ModelSerializer):
             'transaction_id',
             'user',
             'current_price',
+            'price_updated_at',
             'created_at',
             'sale_date',
         ]
         extra_kwargs = {
             'purchase_price': {'required': False}
         }
+        source_columns = {
+            'market_price': ['current_price', 'type', 'asset_name'],
+            'price_updated_at': ['type', 'asset_name'],
+        }
 
     def validate_quantity(self, value):
         """Validate that quantity is a positive number."""
@@ -66,7 +121,7 @@ class InvestmentSerializer(serializers.ModelSerializer):
         return Investment.objects.create(**validated_data)
     
 
-class TransactionHistorySerializer(serializers.ModelSerializer):
+class TransactionHistorySerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serialize for transaction history objects."""
 
     class Meta:
@@ -78,6 +133,7 @@ class TransactionHistorySerializer(serializers.ModelSerializer):
             'transaction_id',
             'transaction_type',
             'type',
+            'asset_name',
             'quantity',
             'purchase_price',
             'sale_price',
@@ -97,3 +153,298 @@ class TransactionHistorySerializer(serializers.ModelSerializer):
             'purchase_date',
             'sale_date',
         ]
+
+
+def format_datetime(tz, value):
+    """Format an aware datetime the way an ISO 8601 DateTimeField does."""
+    if value is None:
+        return None
+    if value.tzinfo is not tz:
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def row_converter(field):
+    """
+    Return a function converting a row value the way a field would.
+
+    Returns None for fields outputting database values as they are.
+    Datetimes are converted by format_datetime, bound to the current
+    time zone when rows are serialized. Fields without a faster
+    equivalent keep their to_representation.
+    """
+    if isinstance(field, serializers.DateTimeField):
+        if getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() == ISO_8601:
+            return format_datetime
+    elif isinstance(field, serializers.UUIDField):
+        if field.uuid_format == 'hex_verbose':
+            return lambda value: None if value is None else str(value)
+    elif isinstance(field, serializers.DecimalField):
+        # Stored values already have the field's decimal places.
+        if not getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING):
+            return None
+    elif isinstance(field, relations.PrimaryKeyRelatedField):
+        if field.pk_field is None:
+            return None
+    elif isinstance(field, (
+        serializers.BooleanField,
+        serializers.CharField,
+        serializers.ChoiceField,
+        serializers.IntegerField,
+    )):
+        return None
+    return field.to_representation
+
+
+class RowSerializer:
+    """
+    Read-only serializer of `.values()` rows for list responses.
+
+    The output matches serializer_class, but each row is encoded with
+    the converters picked once per class from the serializer's fields,
+    instead of running DRF fields on model instances. Sources map
+    output fields to row keys where those differ, and extra_keys lists
+    the other row keys an output field needs. Passing `fields` narrows
+    the output and the columns selected to those fields; rows always
+    carry the primary key, which cursor pagination reads.
+    """
+    serializer_class = None
+    sources = {}
+    extra_keys = {}
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.fields = fields
+
+    @classmethod
+    def get_encoders(cls, fields=None):
+        """Return (field name, row key, converter) of each output field."""
+        if '_encoders' not in cls.__dict__:
+            cls._encoders = [
+                (name, cls.sources.get(name, name), row_converter(field))
+                for name, field in cls.serializer_class().fields.items()
+                if not field.write_only
+            ]
+        if fields is None:
+            return cls._encoders
+        return [encoder for encoder in cls._encoders if encoder[0] in fields]
+
+    @classmethod
+    def get_queryset(cls, queryset, fields=None):
+        """Return the rows of a queryset with the keys the encoders read."""
+        keys = [queryset.model._meta.pk.name]
+        for name, key, _ in cls.get_encoders(fields):
+            keys.extend(cls.extra_keys.get(name, []))
+            keys.append(key)
+        return queryset.values(*dict.fromkeys(keys))
+
+    @property
+    def data(self):
+        encoders = self.get_encoders(self.fields)
+        names = [name for name, _, _ in encoders]
+        keys = [key for _, key, _ in encoders]
+        values = itemgetter(*keys)
+        if len(keys) == 1:
+            # itemgetter of one key returns the value instead of a tuple.
+            def values(row, key=keys[0]):
+                return (row[key],)
+        # Looking up the time zone per value would cost as much as the rest.
+        tz = timezone.get_current_timezone()
+        if str(tz) == 'UTC':
+            # Database datetimes come back in UTC and need no conversion.
+            tz = dt_timezone.utc
+        converters = [
+            (name, partial(convert, tz) if convert is format_datetime else convert)
+            for name, _, convert in encoders
+            if convert is not None
+        ]
+        data = []
+        for row in self.rows:
+            item = dict(zip(names, values(row)))
+            for name, convert in converters:
+                item[name] = convert(item[name])
+            data.append(item)
+        return data
+
+
+class InvestmentRowSerializer(RowSerializer):
+    """Fast path of InvestmentSerializer for investment lists."""
+    serializer_class = InvestmentSerializer
+    sources = {
+        'current_price': 'quoted_price',
+        'price_updated_at': 'latest_price_at',
+    }
+    # Live quotes are looked up by asset.
+    extra_keys = {
+        'current_price': ['type', 'asset_name'],
+        'price_updated_at': ['type', 'asset_name'],
+    }
+
+    @classmethod
+    def get_queryset(cls, queryset, fields=None):
+        """Return rows of a with_latest_price() queryset, priced like market_price."""
+        return super().get_queryset(
+            queryset.annotate(quoted_price=Coalesce('latest_price', 'current_price')),
+            fields,
+        )
+
+    @classmethod
+    def is_quoted(cls, fields=None):
+        """Return whether the given output fields include prices."""
+        return fields is None or not set(fields).isdisjoint(cls.extra_keys)
+
+    @staticmethod
+    def set_quotes(rows, quotes):
+        """Price rows with quotes keyed by (investment_type, asset_name)."""
+        for row in rows:
+            quote = quotes.get((row['type'], row['asset_name']))
+            if quote is not None:
+                row['quoted_price'] = quote.price
+                row['latest_price_at'] = quote.fetched_at
+
+
+class TransactionHistoryRowSerializer(RowSerializer):
+    """Fast path of TransactionHistorySerializer for transaction lists."""
+    serializer_class = TransactionHistorySerializer
+
+
+class SellSerializer(serializers.Serializer):
+    """Serializer for selling part or all of an investment."""
+    quantity = serializers.DecimalField(
+        max_digits=money.MAX_DIGITS,
+        decimal_places=money.QUANTITY_PLACES,
+    )
+
+    def validate_quantity(self, value):
+        """Validate that quantity is a positive number."""
+        if value <= 0:
+            raise serializers.ValidationError("Quantity must be a positive value.")
+        return value
+
+
+class OrderLegSerializer(serializers.Serializer):
+    """Serializer for one buy or sell leg of a batch order."""
+    side = serializers.ChoiceField(choices=constants.TRANSACTION_TYPE)
+    investment = serializers.IntegerField(required=False)
+    title = serializers.CharField(required=False, allow_blank=True, max_length=255)
+    asset_name = serializers.CharField(required=False, max_length=255)
+    type = serializers.ChoiceField(choices=constants.INVESTMENT_TYPE_CONSTANT, required=False)
+    quantity = serializers.DecimalField(
+        max_digits=money.MAX_DIGITS,
+        decimal_places=money.QUANTITY_PLACES,
+        required=False,
+    )
+
+    def validate(self, attrs):
+        """Validate the fields required by the side of the leg."""
+        if attrs['side'] == 'buy':
+            required = ['asset_name', 'type', 'quantity']
+        else:
+            required = ['investment']
+        missing = [field for field in required if field not in attrs]
+        if missing:
+            raise serializers.ValidationError(
+                {field: f"This field is required for {attrs['side']} orders." for field in missing}
+            )
+        if attrs['side'] == 'buy' and attrs['quantity'] <= 0:
+            raise serializers.ValidationError({'quantity': 'Quantity must be a positive value.'})
+        return attrs
+
+
+class BatchOrderSerializer(serializers.Serializer):
+    """Serializer for a batch of buy and sell orders."""
+    orders = OrderLegSerializer(many=True, allow_empty=False)
+
+    def validate_orders(self, value):
+        """Validate the number of legs in the batch."""
+        if len(value) > settings.MAX_ORDER_LEGS:
+            raise serializers.ValidationError(
+                f'A batch can have at most {settings.MAX_ORDER_LEGS} orders.'
+            )
+        return value
+
+
+class PortfolioAllocationSerializer(serializers.Serializer):
+    """Serializer for the allocation of a portfolio to one investment type."""
+    type = serializers.CharField()
+    market_value = MoneyField()
+    cost_basis = MoneyField()
+    unrealized_pnl = MoneyField()
+    weight = serializers.FloatField()
+
+
+class PortfolioSummarySerializer(serializers.Serializer):
+    """Serializer for the portfolio summary."""
+    market_value = MoneyField()
+    cost_basis = MoneyField()
+    unrealized_pnl = MoneyField()
+    realized_pnl = MoneyField()
+    allocation = PortfolioAllocationSerializer(many=True)
+
+
+class RealizedGainAssetSerializer(serializers.Serializer):
+    """Serializer for the realized gain of one asset."""
+    type = serializers.CharField()
+    asset_name = serializers.CharField()
+    quantity = serializers.DecimalField(
+        max_digits=money.MAX_DIGITS,
+        decimal_places=money.QUANTITY_PLACES,
+    )
+    proceeds = MoneyField()
+    cost_basis = MoneyField()
+    realized_gain = MoneyField()
+
+
+class RealizedGainsSerializer(serializers.Serializer):
+    """Serializer for the realized gains of a portfolio."""
+    method = serializers.ChoiceField(choices=constants.LOT_METHOD)
+    realized_gain = MoneyField()
+    assets = RealizedGainAssetSerializer(many=True)
+
+
+class PortfolioHistoryPointSerializer(serializers.Serializer):
+    """Serializer for the portfolio value at the end of one day."""
+    date = serializers.DateField()
+    value = serializers.FloatField()
+
+
+class PortfolioHistorySerializer(serializers.Serializer):
+    """Serializer for the daily value history of a portfolio."""
+    interval = serializers.CharField()
+    points = PortfolioHistoryPointSerializer(many=True)
+
+    def to_representation(self, instance):
+        data = {
+            'from': instance['from'].isoformat(),
+            'to': instance['to'].isoformat(),
+        }
+        data.update(super().to_representation(instance))
+        return data
+
+
+class RiskMetricsSerializer(serializers.Serializer):
+    """Serializer for the risk metrics of an asset or a portfolio."""
+    volatility = serializers.FloatField(allow_null=True)
+    max_drawdown = serializers.FloatField(allow_null=True)
+    sharpe_ratio = serializers.FloatField(allow_null=True)
+
+
+class AssetRiskSerializer(RiskMetricsSerializer):
+    """Serializer for the risk metrics of one asset."""
+    type = serializers.CharField()
+    asset_name = serializers.CharField()
+
+
+class PortfolioRiskSerializer(serializers.Serializer):
+    """Serializer for the risk analytics of a portfolio."""
+    window = serializers.IntegerField()
+    start = serializers.DateField()
+    end = serializers.DateField()
+    portfolio = RiskMetricsSerializer()
+    assets = AssetRiskSerializer(many=True)
+    # Rows and columns follow assets; passed through as is since the
+    # matrix of a large portfolio has hundreds of thousands of entries.
+    correlation = serializers.JSONField()
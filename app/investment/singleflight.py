@@ -0,0 +1,90 @@
+"""
+Request coalescing for the investment app.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+class _Call:
+    """A call in flight and the outcome shared with its waiters."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+
+    Concurrent callers asking for a key that is already being loaded
+    wait for that call and share its result or its error. With
+    QUOTE_SINGLE_FLIGHT_DISTRIBUTED enabled, the call also takes a lock
+    in the quote cache so only one process loads a key at a time; the
+    others wait for the lock and then run the call themselves, which is
+    expected to find the freshly cached result.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Call fn for the key, or wait for the call already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if settings.QUOTE_SINGLE_FLIGHT_DISTRIBUTED:
+                call.result = self._do_locked(key, fn, *args, **kwargs)
+            else:
+                call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _do_locked(self, key, fn, *args, **kwargs):
+        """Call fn while holding the cross-process lock for the key."""
+        cache = caches[settings.QUOTE_CACHE_ALIAS]
+        lock_key = f'lock:{key}'
+        token = uuid.uuid4().hex
+        timeout = settings.QUOTE_SINGLE_FLIGHT_LOCK_TIMEOUT
+
+        deadline = time.monotonic() + timeout
+        while not cache.add(lock_key, token, timeout=timeout):
+            if time.monotonic() >= deadline:
+                return fn(*args, **kwargs)
+            time.sleep(LOCK_POLL_INTERVAL)
+            if cache.get(lock_key) is None:
+                return fn(*args, **kwargs)
+
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+
+quote_flight = SingleFlight()
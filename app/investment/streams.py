@@ -0,0 +1,155 @@
+"""
+Live price streams for the investment app.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from investment.utils import get_current_quotes
+
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_prices(assets):
+    """
+    Fetch the current prices of (investment_type, symbol) assets.
+
+    Assets are priced with one batch per investment type through the
+    quote cache. Assets that could not be priced are left out.
+    """
+    symbols = defaultdict(list)
+    for investment_type, symbol in assets:
+        symbols[investment_type].append(symbol)
+
+    prices = {}
+    for investment_type, type_symbols in symbols.items():
+        try:
+            quotes = await sync_to_async(get_current_quotes)(investment_type, type_symbols)
+        except (KeyError, ValueError) as e:
+            logger.error(f"Error while retrieving current prices for {investment_type}: {e}")
+            continue
+        prices.update(
+            ((investment_type, symbol), quote.price) for symbol, quote in quotes.items()
+        )
+    return prices
+
+
+class PriceHub:
+    """
+    Fan out live prices to the subscribers of each asset.
+
+    Subscribers get an asyncio queue receiving dicts of asset to price
+    with the prices that changed. While anyone is subscribed, one task
+    per event loop fetches every subscribed asset once per interval, so
+    the number of upstream fetches depends on the assets subscribed to,
+    not on the number of subscribers.
+    """
+
+    def __init__(self, fetch=fetch_prices, interval=None):
+        self.fetch = fetch
+        self.interval = interval
+        self.subscribers = defaultdict(set)
+        self.prices = {}
+        self._task = None
+
+    def subscribe(self, assets):
+        """Return a queue of the price changes of the given assets."""
+        queue = asyncio.Queue()
+        for asset in assets:
+            self.subscribers[asset].add(queue)
+        known = {asset: self.prices[asset] for asset in assets if asset in self.prices}
+        if known:
+            queue.put_nowait(known)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        """Stop sending price changes to a queue."""
+        for asset in list(self.subscribers):
+            self.subscribers[asset].discard(queue)
+            if not self.subscribers[asset]:
+                del self.subscribers[asset]
+                self.prices.pop(asset, None)
+
+    async def poll(self):
+        """Fetch every subscribed asset once and push the changed prices."""
+        prices = await self.fetch(list(self.subscribers))
+        changes = defaultdict(dict)
+        for asset, price in prices.items():
+            if asset not in self.subscribers or self.prices.get(asset) == price:
+                continue
+            self.prices[asset] = price
+            for queue in self.subscribers[asset]:
+                changes[queue][asset] = price
+        for queue, queue_changes in changes.items():
+            queue.put_nowait(queue_changes)
+
+    async def _run(self):
+        """Poll the subscribed assets until nobody is subscribed."""
+        while self.subscribers:
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception('Error while polling live prices')
+            await asyncio.sleep(self.interval or settings.PRICE_STREAM_INTERVAL)
+
+
+price_hub = PriceHub()
+
+
+def format_event(event, data):
+    """Return a server-sent event with a JSON payload."""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def valuation(holdings, prices, assets):
+    """Return the value of the given assets and of the whole portfolio."""
+    return {
+        'positions': [
+            {
+                'type': investment_type,
+                'asset_name': asset_name,
+                'quantity': float(holdings[(investment_type, asset_name)]),
+                'price': float(prices[(investment_type, asset_name)]),
+                'value': float(
+                    holdings[(investment_type, asset_name)] * prices[(investment_type, asset_name)]
+                ),
+            }
+            for investment_type, asset_name in sorted(assets)
+        ],
+        'portfolio_value': float(
+            sum(quantity * prices[asset] for asset, quantity in holdings.items())
+        ),
+    }
+
+
+async def stream_portfolio(holdings, prices, hub=None):
+    """
+    Yield server-sent events with the live valuation of a portfolio.
+
+    Takes dicts of asset to quantity held and to last known price. The
+    first event is a snapshot of every position, then each price change
+    of the hub is sent as a delta of the changed positions. A comment
+    is sent when nothing changed for PRICE_STREAM_KEEPALIVE seconds.
+    """
+    hub = hub or price_hub
+    prices = dict(prices)
+    queue = hub.subscribe(list(holdings))
+    try:
+        yield format_event('snapshot', valuation(holdings, prices, holdings))
+        while True:
+            try:
+                changes = await asyncio.wait_for(queue.get(), settings.PRICE_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            prices.update(changes)
+            yield format_event('prices', valuation(holdings, prices, changes))
+    finally:
+        hub.unsubscribe(queue)
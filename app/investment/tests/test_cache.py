@@ -0,0 +1,128 @@
+"""
+Tests for the quote cache.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from unittest.mock import patch
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from investment.cache import quote_cache
+from investment.utils import get_current_price, get_current_prices
+
+
+QUOTE_CACHE_STATS_URL = reverse('investment:quote-cache-stats')
+
+
+class QuoteCacheTests(TestCase):
+    """Test caching of asset quotes."""
+
+    def setUp(self):
+        quote_cache.clear()
+
+    def test_get_missing_quote(self):
+        """Test getting an uncached quote counts a miss."""
+        price = quote_cache.get('cc', 'bitcoin')
+
+        self.assertIsNone(price)
+        self.assertEqual(quote_cache.stats()['misses'], 1)
+
+    def test_set_and_get_quote(self):
+        """Test a stored quote is returned and counted as a hit."""
+        quote_cache.set('cc', 'bitcoin', 60000.0)
+        price = quote_cache.get('cc', 'bitcoin')
+
+        self.assertEqual(price, 60000.0)
+        self.assertEqual(quote_cache.stats()['hits'], 1)
+
+    def test_quote_is_keyed_by_type(self):
+        """Test quotes of different investment types do not collide."""
+        quote_cache.set('stock', 'ABC', 10.0)
+
+        self.assertIsNone(quote_cache.get('bond', 'ABC'))
+
+    @patch('investment.cache.time.time')
+    def test_quote_expires_after_ttl(self, mock_time):
+        """Test a quote is dropped once its TTL has passed."""
+        mock_time.return_value = 1000.0
+        quote_cache.set('cc', 'bitcoin', 60000.0)
+        mock_time.return_value = 1029.0
+        self.assertEqual(quote_cache.get('cc', 'bitcoin'), 60000.0)
+
+        mock_time.return_value = 1031.0
+        self.assertIsNone(quote_cache.get('cc', 'bitcoin'))
+
+    def test_stock_ttl_is_bar_aligned(self):
+        """Test a stock quote expires on the next 5 minute bar."""
+        self.assertEqual(quote_cache.get_ttl('stock', 1200.0), 300)
+        self.assertEqual(quote_cache.get_ttl('stock', 1410.0), 90)
+        self.assertEqual(quote_cache.get_ttl('bond', 1410.0), 3600)
+
+    @override_settings(QUOTE_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_quote_evicted(self):
+        """Test the local cache is bounded and evicts the LRU quote."""
+        quote_cache.set('cc', 'bitcoin', 1.0)
+        quote_cache.set('cc', 'ethereum', 2.0)
+        quote_cache.get('cc', 'bitcoin')
+        quote_cache.set('cc', 'solana', 3.0)
+
+        stats = quote_cache.stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertNotIn(quote_cache.make_key('cc', 'ethereum'), quote_cache._entries)
+        self.assertIn(quote_cache.make_key('cc', 'bitcoin'), quote_cache._entries)
+
+    @patch('investment.utils.fetch_current_price')
+    def test_current_price_fetched_once(self, mock_fetch):
+        """Test repeated price lookups hit the provider once."""
+        mock_fetch.return_value = 60000.0
+        for _ in range(3):
+            price = get_current_price('cc', 'bitcoin')
+
+        self.assertEqual(price, 60000.0)
+        mock_fetch.assert_called_once_with('cc', 'bitcoin')
+
+    @patch('investment.utils.fetch_current_prices')
+    def test_current_prices_fetch_only_missing(self, mock_fetch):
+        """Test batch lookups only fetch quotes missing from the cache."""
+        quote_cache.set('cc', 'bitcoin', 60000.0)
+        mock_fetch.return_value = {'ethereum': 3000.0}
+        prices = get_current_prices('cc', ['bitcoin', 'ethereum'])
+
+        self.assertEqual(prices, {'bitcoin': 60000.0, 'ethereum': 3000.0})
+        mock_fetch.assert_called_once_with('cc', ['ethereum'])
+
+
+class QuoteCacheStatsApiTests(TestCase):
+    """Test the quote cache counters API."""
+
+    def setUp(self):
+        quote_cache.clear()
+        self.client = APIClient()
+
+    def test_stats_require_staff(self):
+        """Test non staff users cannot read the counters."""
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user=user)
+        res = self.client.get(QUOTE_CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_retrieve_stats(self):
+        """Test staff users can read the counters."""
+        admin = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user=admin)
+        quote_cache.get('cc', 'bitcoin')
+        res = self.client.get(QUOTE_CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['misses'], 1)
+        self.assertEqual(res.data['hits'], 0)
@@ -0,0 +1,166 @@
+"""
+Tests for the investment management commands.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import Mock, patch
+
+import requests
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import serializers, status
+
+from core.models import Investment, PriceSnapshot
+from investment.cache import quote_cache
+from investment.management.commands import refresh_prices
+
+
+INVESTMENT_URL = reverse('investment:investment-list')
+
+
+def create_investment(user, **kwargs):
+    """Create and return an investment with a stored price."""
+    defaults = {
+        'asset_name': 'bitcoin',
+        'type': 'cc',
+        'quantity': 1,
+        'purchase_price': 10.0,
+        'current_price': 10.0,
+    }
+    defaults.update(kwargs)
+    return Investment.objects.create(user=user, **defaults)
+
+
+class RefreshPricesCommandTests(TestCase):
+    """Test the refresh_prices command."""
+
+    def setUp(self):
+        quote_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+
+    @patch('investment.utils.fetch_current_prices')
+    def test_refresh_prices_once(self, mock_fetch):
+        """Test every distinct asset is fetched once and persisted."""
+        prices = {
+            'cc': {'bitcoin': 60000.0, 'ethereum': 3000.0},
+            'stock': {'AAPL': Decimal('228.28')},
+        }
+        mock_fetch.side_effect = lambda investment_type, names: {
+            name: prices[investment_type][name] for name in names
+        }
+        create_investment(self.user)
+        create_investment(self.other_user)
+        create_investment(self.user, asset_name='ethereum')
+        create_investment(self.user, asset_name='AAPL', type='stock')
+
+        out = StringIO()
+        call_command('refresh_prices', '--once', '--workers=2', stdout=out)
+
+        self.assertIn('Refreshed 3 asset prices', out.getvalue())
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertEqual(PriceSnapshot.objects.count(), 3)
+        for investment in Investment.objects.with_latest_price():
+            self.assertEqual(
+                investment.market_price,
+                prices[investment.type][investment.asset_name],
+            )
+            self.assertEqual(investment.current_price, 10.0)
+            self.assertIsNotNone(investment.price_updated_at)
+
+    @patch('investment.utils.fetch_current_prices')
+    def test_refresh_prices_skips_failed_quotes(self, mock_fetch):
+        """Test a failing provider leaves the stored price untouched."""
+        mock_fetch.side_effect = ValueError('Upstream unavailable')
+        investment = create_investment(self.user)
+
+        call_command('refresh_prices', '--once', stdout=StringIO())
+
+        self.assertFalse(PriceSnapshot.objects.exists())
+        self.assertEqual(investment.market_price, 10.0)
+        self.assertIsNone(investment.price_updated_at)
+
+    @patch('investment.utils.fetch_current_prices')
+    def test_refresh_prices_survives_connection_errors(self, mock_fetch):
+        """Test an unreachable provider only skips its batch."""
+        mock_fetch.side_effect = requests.ConnectionError('Network unreachable')
+        create_investment(self.user)
+
+        out = StringIO()
+        call_command('refresh_prices', '--once', stdout=out)
+
+        self.assertIn('Refreshed 0 asset prices', out.getvalue())
+        self.assertFalse(PriceSnapshot.objects.exists())
+
+    @patch('investment.management.commands.refresh_prices.refresh_asset_prices')
+    def test_refresh_prices_loop_continues_after_error(self, mock_refresh):
+        """Test a failed refresh is logged and the worker keeps running."""
+        mock_refresh.side_effect = [RuntimeError('Database unavailable'), 2]
+        clock = Mock(monotonic=Mock(return_value=0), sleep=Mock(side_effect=[None, StopIteration]))
+
+        out = StringIO()
+        with patch.object(refresh_prices, 'time', clock):
+            with self.assertLogs(refresh_prices.logger, 'ERROR'), self.assertRaises(StopIteration):
+                call_command('refresh_prices', '--interval=1', stdout=out)
+
+        self.assertEqual(mock_refresh.call_count, 2)
+        self.assertIn('Refreshed 2 asset prices', out.getvalue())
+
+
+@override_settings(PRICING_MODE='background')
+class BackgroundPricingApiTests(TestCase):
+    """Test investment views serving stored prices."""
+
+    def setUp(self):
+        quote_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @patch('investment.utils.fetch_current_prices')
+    def test_list_serves_stored_price(self, mock_fetch):
+        """Test listing investments does not fetch quotes."""
+        create_investment(self.user, current_price=42.0)
+        res = self.client.get(INVESTMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        mock_fetch.assert_not_called()
+        self.assertEqual(res.data['results'][0]['current_price'], 42.0)
+        self.assertIsNone(res.data['results'][0]['price_updated_at'])
+
+    @patch('investment.utils.fetch_current_prices')
+    def test_list_serves_latest_snapshot(self, mock_fetch):
+        """Test investments are priced from the latest snapshot of their asset."""
+        create_investment(self.user, current_price=42.0)
+        old = PriceSnapshot.objects.create(asset_type='cc', symbol='bitcoin', price=50000.0)
+        latest = PriceSnapshot.objects.create(
+            asset_type='cc',
+            symbol='bitcoin',
+            price=60000.0,
+            timestamp=old.timestamp + timedelta(minutes=1),
+        )
+        PriceSnapshot.objects.create(asset_type='stock', symbol='bitcoin', price=1.0)
+        res = self.client.get(INVESTMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        mock_fetch.assert_not_called()
+        self.assertEqual(res.data['results'][0]['current_price'], 60000.0)
+        self.assertEqual(
+            res.data['results'][0]['price_updated_at'],
+            serializers.DateTimeField().to_representation(latest.timestamp),
+        )
@@ -0,0 +1,177 @@
+"""
+Tests for conditional GET of investment and transaction lists.
+"""
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Investment, PriceSnapshot
+
+
+INVESTMENT_URL = reverse('investment:investment-list')
+TRANSACTION_HISTORY = reverse('investment:transaction-history-list')
+
+
+def investment_detail_url(investment_id):
+    """Create and return investment detail url."""
+    return reverse('investment:investment-detail', args=[investment_id])
+
+
+def sell_url(investment_id):
+    """Create and return an investment sell URL."""
+    return reverse('investment:investment-sell', args=[investment_id])
+
+
+@override_settings(PRICING_MODE='background')
+class ConditionalListApiTests(TestCase):
+    """Test unchanged lists are answered with 304 Not Modified."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.investment = Investment.objects.create(
+            user=self.user,
+            asset_name='bitcoin',
+            type='cc',
+            quantity=2,
+            purchase_price=10,
+            current_price=10,
+        )
+
+    def get(self, url, etag, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_lists_not_modified(self):
+        """Test a matching ETag gets a 304 from a single query."""
+        for url in [INVESTMENT_URL, TRANSACTION_HISTORY]:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertIn('Authorization', res['Vary'])
+
+            with self.assertNumQueries(1):
+                not_modified = self.get(url, res['ETag'])
+
+            self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(not_modified['ETag'], res['ETag'])
+            self.assertEqual(not_modified.content, b'')
+
+    def test_if_modified_since(self):
+        """Test a Last-Modified date in the future of changes gets a 304."""
+        res = self.client.get(INVESTMENT_URL)
+
+        res = self.client.get(INVESTMENT_URL, HTTP_IF_MODIFIED_SINCE=res['Last-Modified'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_query_params_in_etag(self):
+        """Test pages of the same list have different ETags."""
+        etag = self.client.get(INVESTMENT_URL)['ETag']
+
+        res = self.get(INVESTMENT_URL, etag, page_size=1)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_sell_changes_lists(self):
+        """Test a sell changes both lists."""
+        etags = {url: self.client.get(url)['ETag'] for url in [INVESTMENT_URL, TRANSACTION_HISTORY]}
+
+        self.client.post(sell_url(self.investment.id), {'quantity': 1})
+
+        for url, etag in etags.items():
+            res = self.get(url, etag)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(res['ETag'], etag)
+
+    @patch('investment.views.get_current_price', return_value=10)
+    def test_one_bump_per_write(self, mock_price):
+        """Test each write updates the user row once."""
+        self.user.credit(100)
+        requests = [
+            lambda: self.client.post(reverse('investment:investment-buy'), {
+                'asset_name': 'ethereum',
+                'type': 'cc',
+                'quantity': 2,
+            }),
+            lambda: self.client.post(INVESTMENT_URL, {
+                'asset_name': 'ethereum',
+                'type': 'cc',
+                'quantity': 1,
+            }),
+            lambda: self.client.patch(investment_detail_url(self.investment.id), {'title': 'x'}),
+            lambda: self.client.post(sell_url(self.investment.id), {'quantity': 1}),
+            lambda: self.client.delete(investment_detail_url(self.investment.id)),
+        ]
+        for request in requests:
+            with CaptureQueriesContext(connection) as queries:
+                res = request()
+            self.assertLess(res.status_code, 300)
+            updates = [
+                query for query in queries
+                if query['sql'].startswith('UPDATE "core_user"')
+            ]
+            self.assertEqual(len(updates), 1)
+
+    def test_price_refresh_changes_investments(self):
+        """Test a new price snapshot only changes the investment list."""
+        etags = {url: self.client.get(url)['ETag'] for url in [INVESTMENT_URL, TRANSACTION_HISTORY]}
+
+        PriceSnapshot.objects.create(asset_type='cc', symbol='bitcoin', price=12)
+
+        res = self.get(INVESTMENT_URL, etags[INVESTMENT_URL])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['current_price'], 12)
+        res = self.get(TRANSACTION_HISTORY, etags[TRANSACTION_HISTORY])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_other_user_changes_ignored(self):
+        """Test changes to another user's portfolio keep the ETag."""
+        etag = self.client.get(TRANSACTION_HISTORY)['ETag']
+        other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        Investment.objects.create(
+            user=other_user,
+            asset_name='bitcoin',
+            type='cc',
+            quantity=1,
+            purchase_price=10,
+            current_price=10,
+        ).buy_transaction().save()
+
+        res = self.get(TRANSACTION_HISTORY, etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(PRICING_MODE='live')
+    @patch('investment.views.quote_assets', return_value={})
+    @patch('investment.conditional.live_price_period')
+    def test_live_pricing_period(self, mock_period, mock_refresh):
+        """Test live priced lists change, and are priced, once per quote period."""
+        period_start = (int(time.time()) // 30 + 1) * 30
+        mock_period.return_value = period_start
+        res = self.client.get(INVESTMENT_URL)
+        self.assertEqual(mock_refresh.call_count, 1)
+
+        res = self.get(INVESTMENT_URL, res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(mock_refresh.call_count, 1)
+
+        mock_period.return_value = period_start + 30
+        res = self.get(INVESTMENT_URL, res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Last-Modified'], http_date(period_start + 30))
+        self.assertEqual(mock_refresh.call_count, 2)
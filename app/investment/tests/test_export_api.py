@@ -0,0 +1,164 @@
+"""
+Tests for the transaction history export API.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import TransactionHistory
+from investment.export import EXPORT_FIELDS, stream_csv, stream_ndjson
+from investment.serializers import TransactionHistorySerializer
+
+
+TRANSACTION_EXPORT_URL = reverse('investment:transaction-history-export')
+
+
+def create_transaction(user, sale_date, **kwargs):
+    """Create and return a sell transaction sold at a given date."""
+    defaults = {
+        'transaction_type': 'sell',
+        'type': 'cc',
+        'quantity': 1.5,
+        'purchase_price': 10.0,
+        'sale_price': 12.25,
+        'purchase_date': datetime(2024, 1, 1, tzinfo=dt_timezone.utc),
+    }
+    defaults.update(kwargs)
+    transaction = TransactionHistory.objects.create(user=user, **defaults)
+    TransactionHistory.objects.filter(id=transaction.id).update(sale_date=sale_date)
+    transaction.refresh_from_db()
+    return transaction
+
+
+def read_stream(res):
+    """Return the decoded body of a streaming response."""
+    return b''.join(res.streaming_content).decode()
+
+
+class ExportStreamTests(SimpleTestCase):
+    """Test the export lines written for database rows."""
+
+    def test_exact_decimals(self):
+        """Test amounts are exported with every stored digit."""
+        amount = Decimal('12345678901.12345678')
+        row = [amount if field == 'sale_price' else None for field in EXPORT_FIELDS]
+
+        lines = list(stream_csv([row]))
+        self.assertEqual(next(csv.DictReader(lines))['sale_price'], '12345678901.12345678')
+
+        line = next(stream_ndjson([row]))
+        self.assertEqual(json.loads(line, parse_float=Decimal)['sale_price'], amount)
+        self.assertEqual(json.loads(line)['investment'], None)
+
+
+class PublicExportApiTests(TestCase):
+    """Test unauthenticated export requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to export transactions."""
+        res = APIClient().get(TRANSACTION_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateExportApiTests(TestCase):
+    """Test authenticated export requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.early = create_transaction(
+            self.user,
+            datetime(2024, 3, 1, 12, 30, tzinfo=dt_timezone.utc),
+        )
+        self.late = create_transaction(
+            self.user,
+            datetime(2024, 6, 1, 8, 0, 0, 123456, tzinfo=dt_timezone.utc),
+        )
+
+    def test_export_csv(self):
+        """Test exporting transactions as CSV matches the API output."""
+        res = self.client.get(TRANSACTION_EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(read_stream(res))))
+        expected = TransactionHistorySerializer([self.early, self.late], many=True).data
+        self.assertEqual(len(rows), 2)
+        for row, item in zip(rows, expected):
+            self.assertEqual(row['transaction_id'], item['transaction_id'])
+            self.assertEqual(row['sale_date'], item['sale_date'])
+            self.assertEqual(float(row['sale_price']), item['sale_price'])
+
+    def test_export_ndjson(self):
+        """Test exporting transactions as NDJSON matches the API output."""
+        res = self.client.get(TRANSACTION_EXPORT_URL, {'format': 'ndjson'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in read_stream(res).splitlines()]
+        expected = TransactionHistorySerializer([self.early, self.late], many=True).data
+        self.assertEqual(rows, [dict(item) for item in expected])
+
+    async def test_export_asgi(self):
+        """Test exports are streamed asynchronously under ASGI."""
+        expected = await sync_to_async(
+            lambda: read_stream(self.client.get(TRANSACTION_EXPORT_URL, {'format': 'ndjson'}))
+        )()
+        token = await Token.objects.aget(user=self.user)
+
+        res = await AsyncClient().get(
+            TRANSACTION_EXPORT_URL,
+            {'format': 'ndjson'},
+            headers={'Authorization': f'Token {token.key}'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.is_async)
+        body = b''.join([chunk async for chunk in res.streaming_content]).decode()
+        self.assertEqual(body, expected)
+
+    def test_export_date_range(self):
+        """Test from and to limit the exported transactions."""
+        res = self.client.get(
+            TRANSACTION_EXPORT_URL,
+            {'format': 'ndjson', 'from': '2024-02-01', 'to': '2024-03-01'},
+        )
+
+        rows = [json.loads(line) for line in read_stream(res).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.early.id])
+
+    def test_export_limited_to_user(self):
+        """Test only the user's own transactions are exported."""
+        other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        create_transaction(other_user, datetime(2024, 4, 1, tzinfo=dt_timezone.utc))
+        res = self.client.get(TRANSACTION_EXPORT_URL, {'format': 'ndjson'})
+
+        rows = [json.loads(line) for line in read_stream(res).splitlines()]
+        self.assertEqual({row['user'] for row in rows}, {self.user.id})
+
+    def test_export_invalid_date(self):
+        """Test an invalid date is rejected."""
+        for value in ['yesterday', '2024-13-45']:
+            res = self.client.get(TRANSACTION_EXPORT_URL, {'format': 'csv', 'from': value})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
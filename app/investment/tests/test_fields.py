@@ -0,0 +1,151 @@
+"""
+Tests for sparse fieldsets of investment and transaction responses.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Investment, PriceSnapshot
+from investment.serializers import InvestmentSerializer
+from investment.views import InvestmentViewSet
+
+
+INVESTMENT_URL = reverse('investment:investment-list')
+TRANSACTION_HISTORY = reverse('investment:transaction-history-list')
+
+
+def investment_detail_url(investment_id):
+    """Create and return investment detail url."""
+    return reverse('investment:investment-detail', args=[investment_id])
+
+
+@override_settings(PRICING_MODE='background')
+class SparseFieldsApiTests(TestCase):
+    """Test narrowing responses with ?fields=."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        for asset_name in ['bitcoin', 'ethereum']:
+            investment = Investment.objects.create(
+                user=self.user,
+                title=f'{asset_name} position',
+                asset_name=asset_name,
+                type='cc',
+                quantity=2,
+                purchase_price=10,
+                current_price=10,
+            )
+            investment.buy_transaction().save()
+        self.investment = investment
+        PriceSnapshot.objects.create(
+            asset_type='cc',
+            symbol='bitcoin',
+            price=Decimal('12.5'),
+            timestamp=timezone.now() - timedelta(minutes=5),
+        )
+
+    def get(self, url, fields):
+        """Return the response and the SQL of a request for some fields."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {'fields': fields})
+        return res, ' '.join(query['sql'] for query in queries)
+
+    def test_list_investments(self):
+        """Test listed investments have the selected fields only."""
+        full = self.client.get(INVESTMENT_URL).data['results']
+
+        res, sql = self.get(INVESTMENT_URL, 'quantity,asset_name,current_price')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            {
+                'asset_name': row['asset_name'],
+                'quantity': row['quantity'],
+                'current_price': row['current_price'],
+            }
+            for row in full
+        ])
+        self.assertEqual(res.data['results'][1]['current_price'], Decimal('12.5'))
+        self.assertNotIn('"title"', sql)
+        self.assertNotIn('"created_at"', sql)
+
+    @patch.object(
+        InvestmentViewSet,
+        'get_serializer_class',
+        autospec=True,
+        return_value=InvestmentSerializer,
+    )
+    def test_fields_parsed_once(self, mock_serializer_class):
+        """Test ?fields= is checked once per request, plus once for the columns."""
+        res = self.client.get(INVESTMENT_URL, {'fields': 'quantity,current_price'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(mock_serializer_class.call_count, 2)
+
+    def test_list_without_prices(self):
+        """Test price lookups are left out with the price fields."""
+        res, sql = self.get(INVESTMENT_URL, 'title')
+
+        self.assertEqual(
+            res.data['results'],
+            [{'title': 'ethereum position'}, {'title': 'bitcoin position'}],
+        )
+        self.assertNotIn('pricesnapshot', sql)
+        self.assertNotIn('"current_price"', sql)
+
+    def test_list_next_page(self):
+        """Test cursor pagination works without the id field."""
+        res = self.client.get(INVESTMENT_URL, {'fields': 'asset_name', 'page_size': 1})
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(res.data['results'], [{'asset_name': 'bitcoin'}])
+
+    def test_retrieve_investment(self):
+        """Test a retrieved investment loads and has the selected fields only."""
+        res, sql = self.get(investment_detail_url(self.investment.id), 'id,title')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'id': self.investment.id, 'title': 'ethereum position'})
+        self.assertNotIn('"quantity"', sql)
+
+    def test_list_transactions(self):
+        """Test listed transactions have the selected fields only."""
+        res, sql = self.get(TRANSACTION_HISTORY, 'asset_name, transaction_type')
+
+        self.assertEqual(res.data['results'], [
+            {'transaction_type': 'buy', 'asset_name': 'ethereum'},
+            {'transaction_type': 'buy', 'asset_name': 'bitcoin'},
+        ])
+        self.assertNotIn('"purchase_price"', sql)
+
+    def test_unknown_field(self):
+        """Test unknown fields are rejected."""
+        res = self.client.get(INVESTMENT_URL, {'fields': 'asset_name,password'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', str(res.data['fields']))
+
+    @override_settings(PRICING_MODE='live')
+    @patch('investment.views.quote_assets', return_value={})
+    def test_live_prices_only_with_price_fields(self, mock_quote):
+        """Test live quotes are fetched only when prices are selected."""
+        self.client.get(INVESTMENT_URL, {'fields': 'asset_name'})
+        self.assertFalse(mock_quote.called)
+
+        self.client.get(INVESTMENT_URL, {'fields': 'asset_name,current_price'})
+        self.assertTrue(mock_quote.called)
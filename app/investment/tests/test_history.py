@@ -0,0 +1,146 @@
+"""
+Tests for the portfolio value history API.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import PriceSnapshot, TransactionHistory
+
+
+PORTFOLIO_HISTORY_URL = reverse('investment:portfolio-history')
+
+
+def create_user(**kwargs):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**kwargs)
+
+
+def create_transaction(user, transaction_type, quantity, price, days_ago):
+    """Create and return a bitcoin transaction made a number of days ago."""
+    traded_at = timezone.now() - timedelta(days=days_ago)
+    history = TransactionHistory.objects.create(
+        user=user,
+        transaction_type=transaction_type,
+        type='cc',
+        asset_name='bitcoin',
+        quantity=quantity,
+        purchase_price=price,
+        sale_price=price,
+        purchase_date=traded_at,
+    )
+    TransactionHistory.objects.filter(id=history.id).update(sale_date=traded_at)
+    return history
+
+
+class PortfolioHistoryApiTests(TestCase):
+    """Test the portfolio value history API."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(email='test@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.localdate()
+        create_transaction(self.user, 'buy', 2, 100, days_ago=10)
+        create_transaction(self.user, 'buy', 1, 100, days_ago=5)
+        create_transaction(self.user, 'sell', 1, 150, days_ago=2)
+        PriceSnapshot.objects.create(
+            asset_type='cc',
+            symbol='bitcoin',
+            price=130,
+            timestamp=timezone.now() - timedelta(days=7),
+        )
+
+    def get_values(self, **params):
+        res = self.client.get(PORTFOLIO_HISTORY_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [point['value'] for point in res.data['points']]
+
+    def test_auth_required(self):
+        """Test auth is required to get the portfolio history."""
+        res = APIClient().get(PORTFOLIO_HISTORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_daily_values(self):
+        """Test values follow holdings and the last known price of each day."""
+        start = self.today - timedelta(days=12)
+
+        res = self.client.get(PORTFOLIO_HISTORY_URL, {'from': start.isoformat()})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['from'], start.isoformat())
+        self.assertEqual(res.data['to'], self.today.isoformat())
+        self.assertEqual(res.data['points'][0]['date'], start.isoformat())
+        self.assertEqual(
+            [point['value'] for point in res.data['points']],
+            [0, 0, 200, 200, 200, 260, 260, 300, 300, 300, 300, 300, 300],
+        )
+
+    def test_opening_holdings(self):
+        """Test a range starting after trades starts from their holdings."""
+        start = self.today - timedelta(days=6)
+
+        values = self.get_values(**{'from': start.isoformat(), 'to': start.isoformat()})
+
+        self.assertEqual(values, [260])
+
+    def test_sell_without_buy(self):
+        """Test a sell without a recorded buy is not held short."""
+        user = create_user(email='other@example.com', password='testpass123')
+        create_transaction(user, 'sell', 2, 150, days_ago=40)
+        self.client.force_authenticate(user=user)
+
+        values = self.get_values(**{'from': (self.today - timedelta(days=3)).isoformat()})
+
+        self.assertEqual(values, [0, 0, 0, 0])
+
+    def test_weekly_interval(self):
+        """Test weekly points are sampled back from the last day."""
+        res = self.client.get(PORTFOLIO_HISTORY_URL, {
+            'from': (self.today - timedelta(days=12)).isoformat(),
+            'interval': '1w',
+        })
+
+        self.assertEqual(
+            [point['date'] for point in res.data['points']],
+            [(self.today - timedelta(days=7)).isoformat(), self.today.isoformat()],
+        )
+
+    def test_closed_days_cached(self):
+        """Test only the open day is recomputed once closed days are cached."""
+        params = {'from': (self.today - timedelta(days=12)).isoformat()}
+        first = self.get_values(**params)
+        TransactionHistory.objects.filter(user=self.user).delete()
+
+        second = self.get_values(**params)
+
+        self.assertEqual(second[:-1], first[:-1])
+        self.assertEqual(second[-1], 0)
+
+    def test_future_days_left_out(self):
+        """Test days after today are not returned."""
+        values = self.get_values(to=(self.today + timedelta(days=3)).isoformat())
+
+        self.assertEqual(len(values), 30 - 3)
+
+    def test_invalid_params(self):
+        """Test invalid dates, ranges and intervals are rejected."""
+        for params in [
+            {'from': 'yesterday'},
+            {'to': '2024-02-30'},
+            {'from': self.today.isoformat(), 'to': (self.today - timedelta(days=1)).isoformat()},
+            {'from': '1900-01-01'},
+            {'interval': '1h'},
+        ]:
+            res = self.client.get(PORTFOLIO_HISTORY_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
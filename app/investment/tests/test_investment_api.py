@@ -1,6 +1,8 @@
 """
 Test for the investment API.
 """
+from decimal import Decimal
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -10,13 +12,16 @@ from unittest.mock import patch
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from core.models import Investment, TransactionHistory
+from core import money
+from core.models import Investment, PriceSnapshot, TransactionHistory
 
 from investment.serializers import (
     InvestmentSerializer,
     TransactionHistorySerializer,
 )
+from investment.cache import quote_cache
 from investment.utils import get_current_price
+from investment.views import InvestmentViewSet
 
 
 INVESTMENT_URL = reverse('investment:investment-list')
@@ -29,6 +34,11 @@ def investment_detail_url(investment_id):
     return reverse('investment:investment-detail', args=[investment_id])
 
 
+def investment_sell_url(investment_id):
+    """Create and return investment sell url."""
+    return reverse('investment:investment-sell', args=[investment_id])
+
+
 def create_investment(user, **kwargs):
     """Create and return a sample investment."""
     defaults = {
@@ -39,7 +49,8 @@ def create_investment(user, **kwargs):
     }
     defaults.update(**kwargs)
 
-    defaults['current_price'] = get_current_price(defaults['type'], defaults['asset_name'])
+    if 'current_price' not in defaults:
+        defaults['current_price'] = get_current_price(defaults['type'], defaults['asset_name'])
     defaults['purchase_price'] = defaults['current_price']
 
     investment = Investment.objects.create(user=user, **defaults)
@@ -85,6 +96,14 @@ class PrivateInvestmentApiTests(TestCase):
     """Test authenticated API requests."""
 
     def setUp(self):
+        quote_cache.clear()
+        # Price crypto assets without calling CoinGecko.
+        patcher = patch(
+            'investment.providers.CoinGeckoProvider.get_quotes',
+            side_effect=lambda symbols: dict.fromkeys(symbols, 60000.0),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
         self.client = APIClient()
         self.user = create_user(
             email='test@example.com',
@@ -104,7 +123,7 @@ class PrivateInvestmentApiTests(TestCase):
         serializer = InvestmentSerializer(investments, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_investment_limited_to_user(self):
         """Test retrieving investments for user."""
@@ -122,15 +141,77 @@ class PrivateInvestmentApiTests(TestCase):
         serializer = InvestmentSerializer(investments, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(res.data['results'], serializer.data)
 
 
-    @patch('investment.utils.TimeSeries')
-    def test_buy_investment_successful_stock(self, MockTimeSeries):
+    @patch('investment.providers.CoinGeckoProvider.get_quotes')
+    def test_retrieve_investments_prices_each_asset_once(self, mock_get_quotes):
+        """Test listing investments fetches one quote batch for all crypto assets."""
+        mock_get_quotes.return_value = {
+            'bitcoin': 60000.0,
+            'ethereum': 3000.0,
+        }
+        for asset_name in ['bitcoin', 'bitcoin', 'bitcoin', 'ethereum', 'ethereum']:
+            Investment.objects.create(
+                user=self.user,
+                asset_name=asset_name,
+                type='cc',
+                quantity=1,
+                purchase_price=10.0,
+                current_price=10.0,
+            )
+        res = self.client.get(INVESTMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        mock_get_quotes.assert_called_once()
+        self.assertCountEqual(mock_get_quotes.call_args.args[0], ['bitcoin', 'ethereum'])
+        self.assertEqual(PriceSnapshot.objects.count(), 2)
+        for item in res.data['results']:
+            expected = 60000.0 if item['asset_name'] == 'bitcoin' else 3000.0
+            self.assertEqual(item['current_price'], expected)
+
+    @patch('investment.providers.CoinGeckoProvider.get_quotes')
+    def test_retrieve_investments_records_one_snapshot_per_quote(self, mock_get_quotes):
+        """Test repeated listings store a cached quote only once."""
+        mock_get_quotes.return_value = {'bitcoin': 60000.0}
+        for _ in range(3):
+            Investment.objects.create(
+                user=self.user,
+                asset_name='bitcoin',
+                type='cc',
+                quantity=1,
+                purchase_price=10.0,
+                current_price=10.0,
+            )
+        self.client.get(INVESTMENT_URL)
+        self.client.get(INVESTMENT_URL)
+
+        mock_get_quotes.assert_called_once()
+        self.assertEqual(PriceSnapshot.objects.count(), 1)
+
+    @patch('investment.providers.CoinGeckoProvider.get_quotes')
+    def test_retrieve_investments_keeps_price_when_quote_missing(self, mock_get_quotes):
+        """Test a missing quote keeps the stored price of a position."""
+        mock_get_quotes.return_value = {}
+        investment = Investment.objects.create(
+            user=self.user,
+            asset_name='unknown-coin',
+            type='cc',
+            quantity=1,
+            purchase_price=10.0,
+            current_price=12.5,
+        )
+        res = self.client.get(INVESTMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['current_price'], 12.5)
+        self.assertEqual(investment.market_price, 12.5)
+
+    @patch('investment.providers.AlphaVantageProvider.get_intraday')
+    def test_buy_investment_successful_stock(self, mock_get_intraday):
         """Test buying a stock investment successfully deducts from cash balance."""
-        mock_instance = MockTimeSeries.return_value
-        mock_instance.get_intraday.return_value = ({
+        mock_get_intraday.return_value = {
             "Meta Data": {
                 "1. Information": "Intraday (5min) open, high, low, close prices and volume",
                 "2. Symbol": "AAPL",
@@ -148,7 +229,7 @@ class PrivateInvestmentApiTests(TestCase):
                     "5. volume": "16275"
                 }
             }
-        }, None)
+        }
 
         start_balance = self.user.cash_balance
         payload = {
@@ -183,6 +264,11 @@ class PrivateInvestmentApiTests(TestCase):
         self.user.refresh_from_db()
         expected_balance = start_balance - investment.current_price
         self.assertEqual(self.user.cash_balance, expected_balance)
+        history = TransactionHistory.objects.get(user=self.user)
+        self.assertEqual(history.transaction_type, 'buy')
+        self.assertEqual(history.investment, investment)
+        self.assertEqual(history.asset_name, 'bitcoin')
+        self.assertEqual(history.purchase_price, investment.purchase_price)
         for k, v in payload.items():
             self.assertEqual(getattr(investment, k), v)
 
@@ -262,9 +348,9 @@ class PrivateInvestmentApiTests(TestCase):
             'title': 'update',
             'asset_name': 'update',
             'type': 'bond',
-            'quantity': 12.1,
-            'purchase_price': 13.1,
-            'current_price': 9.21,
+            'quantity': Decimal('12.1'),
+            'purchase_price': Decimal('13.1'),
+            'current_price': Decimal('9.21'),
         }
         url = investment_detail_url(investment.id)
         res = self.client.put(url, payload)
@@ -282,7 +368,7 @@ class PrivateInvestmentApiTests(TestCase):
         """Test deleting an investment is successful and updates cash balance."""
         test_balance = self.user.cash_balance
         investment = create_investment(user=self.user)
-        all_costs = investment.current_price * investment.quantity
+        all_costs = money.total(investment.current_price, investment.quantity)
         expected_cash_balance = test_balance + all_costs
         self.user.sale_price = all_costs
         url = investment_detail_url(investment.id)
@@ -295,6 +381,91 @@ class PrivateInvestmentApiTests(TestCase):
         self.assertEqual(self.user.cash_balance, expected_cash_balance)
         self.assertEqual(self.user.sale_price, all_costs)
 
+    def test_delete_after_concurrent_sell(self):
+        """Test deleting sells only what is left after a concurrent sell."""
+        start_balance = self.user.cash_balance
+        investment = create_investment(user=self.user, quantity=10)
+        get_object = InvestmentViewSet.get_object
+
+        def sell_after_read(view):
+            instance = get_object(view)
+            if view.action == 'destroy':
+                self.client.post(investment_sell_url(investment.id), {'quantity': '6'})
+            return instance
+
+        with patch.object(InvestmentViewSet, 'get_object', sell_after_read):
+            res = self.client.delete(investment_detail_url(investment.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Investment.objects.filter(id=investment.id).exists())
+        self.user.refresh_from_db()
+        self.assertEqual(
+            self.user.cash_balance,
+            start_balance + money.total(investment.current_price, 10),
+        )
+        sold = TransactionHistory.objects.filter(transaction_type='sell')
+        self.assertEqual(sorted(sold.values_list('quantity', flat=True)), [4, 6])
+
+    def test_sell_part_of_investment(self):
+        """Test a partial sell decrements the position in place."""
+        start_balance = self.user.cash_balance
+        investment = create_investment(user=self.user, quantity=10.5)
+        res = self.client.post(investment_sell_url(investment.id), {'quantity': '4.25'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        investment.refresh_from_db()
+        self.assertEqual(investment.quantity, Decimal('6.25'))
+        self.assertEqual(res.data['quantity'], Decimal('6.25'))
+        amount = money.total(investment.current_price, Decimal('4.25'))
+        self.assertEqual(res.data['amount'], amount)
+        self.assertEqual(self.user.cash_balance, start_balance + amount)
+        history = TransactionHistory.objects.get(user=self.user)
+        self.assertEqual(history.investment, investment)
+        self.assertEqual(history.quantity, Decimal('4.25'))
+        self.assertNotEqual(history.transaction_id, investment.transaction_id)
+
+    def test_sell_whole_investment(self):
+        """Test selling the whole quantity closes the position."""
+        investment = create_investment(user=self.user, quantity=10.5)
+        self.client.post(investment_sell_url(investment.id), {'quantity': '4.25'})
+        res = self.client.post(investment_sell_url(investment.id), {'quantity': '6.25'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['quantity'], Decimal('0'))
+        self.assertFalse(Investment.objects.filter(id=investment.id).exists())
+        history = TransactionHistory.objects.order_by('id')
+        self.assertEqual(history.count(), 2)
+        self.assertEqual(history.last().transaction_id, investment.transaction_id)
+
+    def test_sell_more_than_held(self):
+        """Test selling more than the position holds is rejected."""
+        start_balance = self.user.cash_balance
+        investment = create_investment(user=self.user, quantity=10.5)
+        res = self.client.post(investment_sell_url(investment.id), {'quantity': '10.75'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        investment.refresh_from_db()
+        self.assertEqual(investment.quantity, Decimal('10.5'))
+        self.assertFalse(TransactionHistory.objects.exists())
+        self.assertEqual(self.user.cash_balance, start_balance)
+
+    def test_sell_invalid_quantity(self):
+        """Test a non-positive sell quantity is rejected."""
+        investment = create_investment(user=self.user)
+        res = self.client.post(investment_sell_url(investment.id), {'quantity': '0'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', res.data)
+
+    def test_sell_other_users_investment(self):
+        """Test selling another user's investment is not found."""
+        other_user = create_user(email='other@example.com', password='testpass123')
+        investment = create_investment(user=other_user)
+        res = self.client.post(investment_sell_url(investment.id), {'quantity': '1'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Investment.objects.filter(id=investment.id).exists())
+
     def test_retrieve_transactions_history(self):
         """Test retrieving a list of transactions history."""
         investment = create_investment(user=self.user)
@@ -307,7 +478,7 @@ class PrivateInvestmentApiTests(TestCase):
         serializer = TransactionHistorySerializer(transactions, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_transactions_history_limited_to_user(self):
         """Test retrieving transactions history for user."""
@@ -328,8 +499,8 @@ class PrivateInvestmentApiTests(TestCase):
         serializer = TransactionHistorySerializer(transactions, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_create_transaction_history_while_selling_investment(self):
         """Test creating a transaction history entry while selling an investment."""
@@ -0,0 +1,253 @@
+"""
+Tests for cost-basis lot accounting.
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Lot, LotAllocation, LotCheckpoint, TransactionHistory
+from investment.lots import process_lots, realized_gains
+
+
+REALIZED_GAINS_URL = reverse('investment:realized-gains')
+
+
+def create_user(**kwargs):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**kwargs)
+
+
+def create_transaction(user, transaction_type, quantity, price, **kwargs):
+    """Create and return a buy or sell transaction of bitcoin."""
+    defaults = {
+        'type': 'cc',
+        'asset_name': 'bitcoin',
+        'purchase_price': price,
+        'sale_price': price,
+        'purchase_date': timezone.now(),
+    }
+    defaults.update(kwargs)
+    return TransactionHistory.objects.create(
+        user=user,
+        transaction_type=transaction_type,
+        quantity=quantity,
+        **defaults,
+    )
+
+
+@override_settings(LOT_SETTLE_DELAY=0)
+class LotEngineTests(TestCase):
+    """Test matching sells against lots."""
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='testpass123')
+        create_transaction(self.user, 'buy', 10, 100)
+        create_transaction(self.user, 'buy', 10, 200)
+        create_transaction(self.user, 'sell', 15, 300, purchase_price=100)
+
+    def test_fifo(self):
+        """Test sells are matched against the oldest lots first."""
+        gains = realized_gains(self.user, 'fifo')
+
+        self.assertEqual(gains['realized_gain'], Decimal('2500'))
+        self.assertEqual(gains['assets'], [{
+            'type': 'cc',
+            'asset_name': 'bitcoin',
+            'quantity': Decimal('15'),
+            'proceeds': Decimal('4500'),
+            'cost_basis': Decimal('2000'),
+            'realized_gain': Decimal('2500'),
+        }])
+        lots = Lot.objects.filter(method='fifo').order_by('id')
+        self.assertEqual([lot.quantity for lot in lots], [Decimal('0'), Decimal('5')])
+        self.assertEqual(lots[1].cost, Decimal('1000'))
+
+    def test_lifo(self):
+        """Test sells are matched against the newest lots first."""
+        gains = realized_gains(self.user, 'lifo')
+
+        self.assertEqual(gains['realized_gain'], Decimal('2000'))
+        lots = Lot.objects.filter(method='lifo').order_by('id')
+        self.assertEqual([lot.quantity for lot in lots], [Decimal('5'), Decimal('0')])
+
+    def test_average(self):
+        """Test sells are matched at the average cost of the position."""
+        gains = realized_gains(self.user, 'average')
+
+        self.assertEqual(gains['realized_gain'], Decimal('2250'))
+        lot = Lot.objects.get(method='average')
+        self.assertEqual(lot.quantity, Decimal('5'))
+        self.assertEqual(lot.cost, Decimal('750'))
+
+    def test_incremental(self):
+        """Test only the transactions since the checkpoint are processed."""
+        self.assertEqual(process_lots(self.user, 'fifo'), [])
+        self.assertEqual(LotAllocation.objects.filter(method='fifo').count(), 2)
+        sell = create_transaction(self.user, 'sell', 5, 400, purchase_price=200)
+
+        with self.assertNumQueries(8):
+            process_lots(self.user, 'fifo')
+        self.assertEqual(LotCheckpoint.objects.get(method='fifo').last_transaction_id, sell.id)
+        self.assertEqual(LotAllocation.objects.filter(method='fifo').count(), 3)
+        self.assertEqual(realized_gains(self.user, 'fifo')['realized_gain'], Decimal('3500'))
+        self.assertFalse(Lot.objects.filter(method='fifo', quantity__gt=0).exists())
+
+    def test_lot_acquired_at_purchase(self):
+        """Test lots are dated when the position was bought, not recorded."""
+        bought_at = timezone.now() - timedelta(days=400)
+        buy = create_transaction(self.user, 'buy', 1, 100, purchase_date=bought_at)
+
+        process_lots(self.user, 'fifo')
+
+        self.assertEqual(Lot.objects.get(opened_by=buy).acquired_at, bought_at)
+
+    def test_unmatched_sell_uses_own_purchase_price(self):
+        """Test quantity sold beyond the open lots keeps its own cost."""
+        create_transaction(self.user, 'sell', 7, 300, purchase_price=250)
+
+        gains = realized_gains(self.user, 'fifo')
+
+        self.assertEqual(gains['realized_gain'], Decimal('2500') + 5 * 100 + 2 * 50)
+        unmatched = LotAllocation.objects.get(method='fifo', lot__isnull=True)
+        self.assertEqual(unmatched.quantity, Decimal('2'))
+        self.assertEqual(unmatched.cost_basis, Decimal('500'))
+
+    def test_lots_per_asset_and_user(self):
+        """Test lots are only matched within one asset of one user."""
+        other_user = create_user(email='other@example.com', password='testpass123')
+        create_transaction(other_user, 'buy', 100, 1)
+        create_transaction(self.user, 'buy', 100, 1, asset_name='ethereum')
+        create_transaction(self.user, 'sell', 5, 2, asset_name='ethereum', purchase_price=1)
+
+        gains = realized_gains(self.user, 'fifo')
+
+        self.assertEqual([row['asset_name'] for row in gains['assets']], ['bitcoin', 'ethereum'])
+        self.assertEqual(gains['assets'][1]['realized_gain'], Decimal('5'))
+        self.assertFalse(Lot.objects.filter(user=other_user).exists())
+
+
+class LotSettleDelayTests(TestCase):
+    """Test transactions are only checkpointed once settled."""
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='testpass123')
+        self.buy = create_transaction(self.user, 'buy', 10, 100)
+
+    def settle(self):
+        """Backdate every transaction past the settle delay."""
+        TransactionHistory.objects.update(sale_date=timezone.now() - timedelta(minutes=5))
+
+    def test_recent_transactions_counted_not_saved(self):
+        """Test recent transactions count in gains but are matched again later."""
+        sell = create_transaction(self.user, 'sell', 4, 300, purchase_price=100)
+
+        gains = realized_gains(self.user, 'fifo')
+
+        self.assertEqual(gains['realized_gain'], Decimal('800'))
+        self.assertEqual(LotCheckpoint.objects.get(method='fifo').last_transaction_id, 0)
+        self.assertFalse(LotAllocation.objects.exists())
+
+        self.settle()
+        self.assertEqual(realized_gains(self.user, 'fifo')['realized_gain'], Decimal('800'))
+        self.assertEqual(LotCheckpoint.objects.get(method='fifo').last_transaction_id, sell.id)
+        self.assertEqual(LotAllocation.objects.count(), 1)
+
+    def test_late_commit_with_lower_id(self):
+        """Test a transaction committing after a higher id is not skipped."""
+        create_transaction(self.user, 'sell', 4, 300, purchase_price=100, id=self.buy.id + 10)
+        realized_gains(self.user, 'fifo')
+        # Got its id before the sell above, but committed after it was read.
+        create_transaction(self.user, 'sell', 1, 200, purchase_price=100, id=self.buy.id + 5)
+        self.settle()
+
+        gains = realized_gains(self.user, 'fifo')
+
+        self.assertEqual(gains['realized_gain'], Decimal('900'))
+        self.assertEqual(LotAllocation.objects.count(), 2)
+
+
+class RealizedGainsApiTests(TestCase):
+    """Test the realized gains API."""
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_auth_required(self):
+        """Test auth is required to get realized gains."""
+        res = APIClient().get(REALIZED_GAINS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_realized_gains(self):
+        """Test gains are matched with the requested method."""
+        create_transaction(self.user, 'buy', 1, 100)
+        create_transaction(self.user, 'buy', 1, 200)
+        create_transaction(self.user, 'sell', 1, 250, purchase_price=200)
+
+        res = self.client.get(REALIZED_GAINS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['method'], 'fifo')
+        self.assertEqual(res.data['realized_gain'], Decimal('150'))
+
+        res = self.client.get(REALIZED_GAINS_URL, {'method': 'lifo'})
+        self.assertEqual(res.data['realized_gain'], Decimal('50'))
+
+    def test_invalid_method(self):
+        """Test an unknown lot method is rejected."""
+        res = self.client.get(REALIZED_GAINS_URL, {'method': 'hifo'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@tag('benchmark')
+@override_settings(LOT_SETTLE_DELAY=0)
+class LotEngineBenchmarkTests(TestCase):
+    """Benchmark incremental lot matching on a large account."""
+    transactions = 20000
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='testpass123')
+        now = timezone.now()
+        TransactionHistory.objects.bulk_create(
+            TransactionHistory(
+                user=self.user,
+                transaction_type='buy' if i % 2 == 0 else 'sell',
+                type='cc',
+                asset_name=f'asset-{i // 2 % 100}',
+                quantity=2 if i % 2 == 0 else 1,
+                purchase_price=100,
+                sale_price=100 + i % 7,
+                purchase_date=now,
+            )
+            for i in range(self.transactions)
+        )
+
+    def test_incremental_gains(self):
+        """Test gains after a new sell cost a few milliseconds, not a replay."""
+        started = time.perf_counter()
+        process_lots(self.user, 'fifo')
+        replay = time.perf_counter() - started
+
+        create_transaction(self.user, 'sell', 1, 150, asset_name='asset-3')
+        started = time.perf_counter()
+        with self.assertNumQueries(9):
+            gains = realized_gains(self.user, 'fifo')
+        incremental = time.perf_counter() - started
+
+        print(
+            f'\nlots of {self.transactions} transactions: full replay {replay * 1000:.0f} ms, '
+            f'incremental {incremental * 1000:.1f} ms'
+        )
+        self.assertEqual(len(gains['assets']), 100)
+        self.assertEqual(LotAllocation.objects.filter(lot__isnull=True).count(), 0)
+        self.assertLess(incremental, replay / 10)
@@ -0,0 +1,211 @@
+"""
+Tests for the batch order API.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Investment, TransactionHistory
+from investment.cache import quote_cache
+
+
+ORDERS_URL = reverse('investment:investment-orders')
+
+def sell_url(investment_id):
+    """Create and return an investment sell URL."""
+    return reverse('investment:investment-sell', args=[investment_id])
+
+
+def investment_detail_url(investment_id):
+    """Create and return investment detail url."""
+    return reverse('investment:investment-detail', args=[investment_id])
+
+
+PRICES = {
+    'cc': {'bitcoin': 100.0, 'ethereum': 10.0},
+    'stock': {'AAPL': 50.0},
+}
+
+
+def fake_prices(investment_type, identifiers):
+    """Return prices of the known assets."""
+    return {
+        identifier: PRICES[investment_type][identifier]
+        for identifier in identifiers
+        if identifier in PRICES[investment_type]
+    }
+
+
+def create_investment(user, **kwargs):
+    """Create and return an investment."""
+    defaults = {
+        'asset_name': 'bitcoin',
+        'type': 'cc',
+        'quantity': 2,
+        'purchase_price': 80.0,
+        'current_price': 80.0,
+    }
+    defaults.update(kwargs)
+    return Investment.objects.create(user=user, **defaults)
+
+
+@override_settings(PRICING_MODE='background')
+@patch('investment.utils.fetch_current_prices', side_effect=fake_prices)
+class BatchOrderApiTests(TestCase):
+    """Test executing batch orders."""
+
+    def setUp(self):
+        quote_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            cash_balance=1000.0,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_batch_buy_and_sell(self, mock_fetch):
+        """Test buys and sells are filled and cash is settled once."""
+        position = create_investment(self.user)
+        payload = {'orders': [
+            {'side': 'buy', 'asset_name': 'bitcoin', 'type': 'cc', 'quantity': 3},
+            {'side': 'buy', 'asset_name': 'ethereum', 'type': 'cc', 'quantity': 5},
+            {'side': 'buy', 'asset_name': 'AAPL', 'type': 'stock', 'quantity': 4, 'title': 'Apple'},
+            {'side': 'sell', 'investment': position.id},
+        ]}
+        res = self.client.post(ORDERS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in res.data['results']], ['filled'] * 4)
+        self.assertEqual(res.data['results'][3]['amount'], 200.0)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cash_balance, 1000.0 - 300.0 - 50.0 - 200.0 + 200.0)
+        self.assertEqual(res.data['cash_balance'], self.user.cash_balance)
+        self.assertFalse(Investment.objects.filter(id=position.id).exists())
+        self.assertEqual(Investment.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Investment.objects.get(asset_name='AAPL').title, 'Apple')
+        sale = TransactionHistory.objects.get(user=self.user, transaction_type='sell')
+        self.assertEqual(sale.transaction_id, position.transaction_id)
+        self.assertEqual(sale.sale_price, 100.0)
+        history = TransactionHistory.objects.order_by('id')
+        self.assertEqual(
+            [(row.transaction_type, row.asset_name) for row in history],
+            [('buy', 'bitcoin'), ('buy', 'ethereum'), ('buy', 'AAPL'), ('sell', 'bitcoin')],
+        )
+
+    def test_assets_priced_once_per_type(self, mock_fetch):
+        """Test each investment type is priced with one quote batch."""
+        payload = {'orders': [
+            {'side': 'buy', 'asset_name': 'bitcoin', 'type': 'cc', 'quantity': 1},
+            {'side': 'buy', 'asset_name': 'bitcoin', 'type': 'cc', 'quantity': 1},
+            {'side': 'buy', 'asset_name': 'ethereum', 'type': 'cc', 'quantity': 1},
+        ]}
+        res = self.client.post(ORDERS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        mock_fetch.assert_called_once()
+        self.assertCountEqual(mock_fetch.call_args.args[1], ['bitcoin', 'ethereum'])
+
+    def test_rejected_legs_reported(self, mock_fetch):
+        """Test legs that cannot be filled are reported and skipped."""
+        other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        other_position = create_investment(other_user)
+        payload = {'orders': [
+            {'side': 'buy', 'asset_name': 'unknown-coin', 'type': 'cc', 'quantity': 1},
+            {'side': 'sell', 'investment': other_position.id},
+            {'side': 'buy', 'asset_name': 'ethereum', 'type': 'cc', 'quantity': 1},
+        ]}
+        res = self.client.post(ORDERS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['status'] for r in res.data['results']],
+            ['rejected', 'rejected', 'filled'],
+        )
+        self.assertTrue(Investment.objects.filter(id=other_position.id).exists())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cash_balance, 990.0)
+
+    def test_sell_changed_while_pricing(self, mock_fetch):
+        """Test a position sold in part while the batch is priced is paid once."""
+        position = create_investment(self.user, quantity=10, current_price=100.0)
+
+        def sell_while_pricing(investment_type, identifiers):
+            res = self.client.post(sell_url(position.id), {'quantity': 6})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return fake_prices(investment_type, identifiers)
+
+        mock_fetch.side_effect = sell_while_pricing
+        res = self.client.post(
+            ORDERS_URL,
+            {'orders': [{'side': 'sell', 'investment': position.id}]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['amount'], 400.0)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cash_balance, 1000.0 + 600.0 + 400.0)
+        self.assertEqual(
+            sum(TransactionHistory.objects.filter(transaction_type='sell').values_list(
+                'quantity', flat=True,
+            )),
+            10,
+        )
+
+    def test_sell_removed_while_pricing(self, mock_fetch):
+        """Test a position sold in full while the batch is priced is rejected."""
+        position = create_investment(self.user, quantity=10, current_price=100.0)
+
+        def sell_while_pricing(investment_type, identifiers):
+            res = self.client.delete(investment_detail_url(position.id))
+            self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+            return fake_prices(investment_type, identifiers)
+
+        mock_fetch.side_effect = sell_while_pricing
+        res = self.client.post(
+            ORDERS_URL,
+            {'orders': [{'side': 'sell', 'investment': position.id}]},
+            format='json',
+        )
+
+        self.assertEqual(res.data['results'][0]['status'], 'rejected')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cash_balance, 1000.0 + 1000.0)
+
+    def test_insufficient_funds_rejects_batch(self, mock_fetch):
+        """Test nothing is written when cash does not cover the batch."""
+        payload = {'orders': [
+            {'side': 'buy', 'asset_name': 'bitcoin', 'type': 'cc', 'quantity': 6},
+            {'side': 'buy', 'asset_name': 'bitcoin', 'type': 'cc', 'quantity': 5},
+        ]}
+        res = self.client.post(ORDERS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Investment.objects.exists())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cash_balance, 1000.0)
+
+    def test_invalid_legs(self, mock_fetch):
+        """Test legs missing required fields are rejected."""
+        payload = {'orders': [
+            {'side': 'buy', 'asset_name': 'bitcoin', 'type': 'cc'},
+            {'side': 'sell'},
+            {'side': 'buy', 'asset_name': 'bitcoin', 'type': 'cc', 'quantity': -1},
+        ]}
+        res = self.client.post(ORDERS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = res.data['orders']
+        self.assertIn('quantity', errors[0])
+        self.assertIn('investment', errors[1])
+        self.assertIn('quantity', errors[2])
+        mock_fetch.assert_not_called()
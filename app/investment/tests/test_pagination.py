@@ -0,0 +1,144 @@
+"""
+Tests for paginating investments and transaction history.
+"""
+import statistics
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Investment, TransactionHistory
+from investment.pagination import NewestFirstCursorPagination
+
+
+INVESTMENT_URL = reverse('investment:investment-list')
+TRANSACTION_HISTORY = reverse('investment:transaction-history-list')
+
+
+def create_investments(user, count):
+    """Create investments in bulk."""
+    Investment.objects.bulk_create(
+        Investment(
+            user=user,
+            asset_name='bitcoin',
+            type='cc',
+            quantity=1,
+            purchase_price=10.0,
+            current_price=10.0,
+        )
+        for _ in range(count)
+    )
+
+
+def create_transactions(user, count):
+    """Create sell transactions in bulk."""
+    TransactionHistory.objects.bulk_create(
+        TransactionHistory(
+            user=user,
+            transaction_type='sell',
+            type='cc',
+            quantity=1,
+            purchase_price=10.0,
+            sale_price=12.0,
+            purchase_date=timezone.now(),
+        )
+        for _ in range(count)
+    )
+
+
+@override_settings(PRICING_MODE='background')
+class PaginationApiTests(TestCase):
+    """Test cursor pagination of list endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_investments_paginated_newest_first(self):
+        """Test investment pages follow each other without gaps."""
+        create_investments(self.user, 5)
+        ids = list(Investment.objects.order_by('-id').values_list('id', flat=True))
+
+        res = self.client.get(INVESTMENT_URL, {'page_size': 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        seen = [item['id'] for item in res.data['results']]
+        self.assertIsNone(res.data['previous'])
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            seen.extend(item['id'] for item in res.data['results'])
+
+        self.assertEqual(seen, ids)
+
+    def test_transactions_paginated_newest_first(self):
+        """Test transaction history pages follow each other without gaps."""
+        create_transactions(self.user, 5)
+        ids = list(TransactionHistory.objects.order_by('-id').values_list('id', flat=True))
+
+        res = self.client.get(TRANSACTION_HISTORY, {'page_size': 3})
+        first_page = [item['id'] for item in res.data['results']]
+        res = self.client.get(res.data['next'])
+        second_page = [item['id'] for item in res.data['results']]
+
+        self.assertEqual(first_page, ids[:3])
+        self.assertEqual(second_page, ids[3:])
+        self.assertIsNone(res.data['next'])
+
+    @patch.object(NewestFirstCursorPagination, 'max_page_size', 2)
+    def test_page_size_capped(self):
+        """Test the requested page size is capped at the maximum."""
+        create_transactions(self.user, 5)
+        res = self.client.get(TRANSACTION_HISTORY, {'page_size': 1000})
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_invalid_cursor(self):
+        """Test an invalid cursor is rejected."""
+        res = self.client.get(TRANSACTION_HISTORY, {'cursor': 'invalid'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@tag('benchmark')
+@override_settings(PRICING_MODE='background')
+class PaginationBenchmarkTests(TestCase):
+    """Benchmark page latency against page depth."""
+    pages = 1000
+    page_size = 10
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        create_transactions(self.user, self.pages * self.page_size)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_latency_flat_across_pages(self):
+        """Test the last pages are served about as fast as the first ones."""
+        latencies = []
+        url = f'{TRANSACTION_HISTORY}?page_size={self.page_size}'
+        while url:
+            started = time.perf_counter()
+            res = self.client.get(url)
+            latencies.append(time.perf_counter() - started)
+            url = res.data['next']
+
+        self.assertEqual(len(latencies), self.pages)
+        first = statistics.median(latencies[:50])
+        last = statistics.median(latencies[-50:])
+        print(
+            f'\ncursor pagination: page 1-50 median {first * 1000:.2f} ms, '
+            f'page {self.pages - 49}-{self.pages} median {last * 1000:.2f} ms'
+        )
+        self.assertLess(last, first * 2)
@@ -0,0 +1,194 @@
+"""
+Tests for the portfolio API.
+"""
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, tag
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Investment, PriceSnapshot, TransactionHistory
+from investment.serializers import InvestmentSerializer
+
+
+PORTFOLIO_SUMMARY_URL = reverse('investment:portfolio-summary')
+
+
+def create_user(**kwargs):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**kwargs)
+
+
+def create_investment(user, **kwargs):
+    """Create and return an investment with explicit prices."""
+    defaults = {
+        'asset_name': 'bitcoin',
+        'type': 'cc',
+        'quantity': 1,
+        'purchase_price': 10.0,
+        'current_price': 10.0,
+    }
+    defaults.update(kwargs)
+    return Investment.objects.create(user=user, **defaults)
+
+
+def create_sale(user, **kwargs):
+    """Create and return a sell transaction."""
+    defaults = {
+        'transaction_type': 'sell',
+        'type': 'cc',
+        'quantity': 1,
+        'purchase_price': 10.0,
+        'sale_price': 10.0,
+        'purchase_date': timezone.now(),
+    }
+    defaults.update(kwargs)
+    return TransactionHistory.objects.create(user=user, **defaults)
+
+
+class PublicPortfolioApiTests(TestCase):
+    """Test unauthenticated portfolio API requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to call the summary."""
+        res = APIClient().get(PORTFOLIO_SUMMARY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivatePortfolioApiTests(TestCase):
+    """Test authenticated portfolio API requests."""
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_empty_portfolio_summary(self):
+        """Test the summary of a portfolio without positions."""
+        res = self.client.get(PORTFOLIO_SUMMARY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'market_value': 0.0,
+            'cost_basis': 0.0,
+            'unrealized_pnl': 0.0,
+            'realized_pnl': 0.0,
+            'allocation': [],
+        })
+
+    def test_portfolio_summary(self):
+        """Test valuation, P&L and allocation by type."""
+        create_investment(self.user, quantity=2, purchase_price=100.0, current_price=100.0)
+        create_investment(self.user, quantity=1, purchase_price=200.0, current_price=200.0)
+        create_investment(
+            self.user,
+            asset_name='AAPL',
+            type='stock',
+            quantity=10,
+            purchase_price=20.0,
+            current_price=25.0,
+        )
+        PriceSnapshot.objects.create(asset_type='cc', symbol='bitcoin', price=300.0)
+        create_sale(self.user, quantity=2, purchase_price=50.0, sale_price=80.0)
+        create_sale(self.user, transaction_type='buy', quantity=5, sale_price=1000.0)
+        other_user = create_user(email='other@example.com', password='testpass123')
+        create_investment(other_user, quantity=100)
+        create_sale(other_user, sale_price=1000.0)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(PORTFOLIO_SUMMARY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['market_value'], 1150.0)
+        self.assertEqual(res.data['cost_basis'], 600.0)
+        self.assertEqual(res.data['unrealized_pnl'], 550.0)
+        self.assertEqual(res.data['realized_pnl'], 60.0)
+        self.assertEqual(res.data['allocation'], [
+            {
+                'type': 'cc',
+                'market_value': 900.0,
+                'cost_basis': 400.0,
+                'unrealized_pnl': 500.0,
+                'weight': 900.0 / 1150.0,
+            },
+            {
+                'type': 'stock',
+                'market_value': 250.0,
+                'cost_basis': 200.0,
+                'unrealized_pnl': 50.0,
+                'weight': 250.0 / 1150.0,
+            },
+        ])
+
+    def test_summary_has_no_rounding_error(self):
+        """Test sums of decimal prices are exact."""
+        for _ in range(10):
+            create_investment(self.user, purchase_price='0.1', current_price='0.1')
+        create_sale(self.user, quantity=3, purchase_price='0.1', sale_price='0.2')
+
+        res = self.client.get(PORTFOLIO_SUMMARY_URL)
+
+        self.assertEqual(res.data['market_value'], Decimal('1'))
+        self.assertEqual(res.data['realized_pnl'], Decimal('0.3'))
+
+
+@tag('benchmark')
+class DecimalBenchmarkTests(TestCase):
+    """Benchmark the cost of decimal money fields."""
+    positions = 5000
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='testpass123')
+        Investment.objects.bulk_create(
+            Investment(
+                user=self.user,
+                asset_name=f'asset-{i % 50}',
+                type='cc',
+                quantity=Decimal('0.12345678'),
+                purchase_price=Decimal('1234.56789012'),
+                current_price=Decimal('1234.56789012'),
+            )
+            for i in range(self.positions)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_aggregate_in_sql(self):
+        """Test the summary aggregates in SQL faster than summing in Python."""
+        started = time.perf_counter()
+        with self.assertNumQueries(2):
+            res = self.client.get(PORTFOLIO_SUMMARY_URL)
+        sql_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        python_total = sum(
+            quantity * price
+            for quantity, price in Investment.objects.values_list('quantity', 'current_price')
+        )
+        python_elapsed = time.perf_counter() - started
+
+        print(
+            f'\nportfolio summary of {self.positions} positions: SQL {sql_elapsed * 1000:.1f} ms, '
+            f'Python Decimal sum {python_elapsed * 1000:.1f} ms'
+        )
+        # SQLite evaluates decimal arithmetic in floating point, PostgreSQL exactly.
+        self.assertAlmostEqual(res.data['market_value'], python_total, delta=Decimal('0.01'))
+        self.assertLess(sql_elapsed, python_elapsed)
+
+    def test_serialization_budget(self):
+        """Test serializing a page of decimal investments stays within budget."""
+        page = list(Investment.objects.with_latest_price()[:500])
+
+        started = time.perf_counter()
+        data = InvestmentSerializer(page, many=True).data
+        elapsed = time.perf_counter() - started
+
+        print(f'\nserialized {len(data)} decimal investments in {elapsed * 1000:.1f} ms')
+        self.assertEqual(data[0]['quantity'], Decimal('0.12345678'))
+        self.assertLess(elapsed, 0.5)
@@ -0,0 +1,134 @@
+"""
+Tests for the price providers.
+"""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from investment.cache import quote_cache
+from investment.providers import (
+    AlphaVantageProvider,
+    AsyncPriceProvider,
+    CoinGeckoProvider,
+    FakePriceProvider,
+    get_provider,
+)
+from investment.utils import get_current_price, get_current_prices
+
+
+FAKE_PROVIDERS = {
+    'stock': 'investment.providers.FakePriceProvider',
+    'bond': 'investment.providers.FakePriceProvider',
+    'cc': 'investment.providers.FakePriceProvider',
+}
+
+
+def intraday_response(close):
+    """Return an Alpha Vantage intraday response with one bar."""
+    return {
+        'Time Series (5min)': {
+            '2024-07-11 19:50:00': {'4. close': '1.0000'},
+            '2024-07-11 19:55:00': {'4. close': close},
+        }
+    }
+
+
+class SlowAsyncProvider(AsyncPriceProvider):
+    """Async provider tracking how many requests run at once."""
+
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch_quote(self, session, symbol):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.02)
+        self.in_flight -= 1
+        if symbol == 'unknown':
+            raise ValueError(f'Price for {symbol} not found')
+        return float(len(symbol))
+
+
+class PriceProviderTests(SimpleTestCase):
+    """Test the price providers."""
+
+    def setUp(self):
+        quote_cache.clear()
+
+    @override_settings(FAKE_PRICES={'default': 100.0, 'bitcoin': 60000.0})
+    def test_fake_provider_quotes(self):
+        """Test the fake provider returns configured and default prices."""
+        quotes = FakePriceProvider().get_quotes(['bitcoin', 'AAPL'])
+
+        self.assertEqual(quotes, {'bitcoin': 60000.0, 'AAPL': 100.0})
+
+    @override_settings(PRICE_PROVIDERS=FAKE_PROVIDERS, FAKE_PRICES={'default': 7.5})
+    def test_provider_picked_from_settings(self):
+        """Test prices come from the provider configured in settings."""
+        self.assertIsInstance(get_provider('cc'), FakePriceProvider)
+        self.assertEqual(get_current_price('stock', 'AAPL'), 7.5)
+        self.assertEqual(get_current_prices('cc', ['bitcoin']), {'bitcoin': 7.5})
+
+    def test_provider_is_long_lived(self):
+        """Test the same provider instance is reused between calls."""
+        self.assertIs(get_provider('stock'), get_provider('bond'))
+        self.assertIs(get_provider('cc'), get_provider('cc'))
+
+    def test_unknown_investment_type(self):
+        """Test an unknown investment type raises ValueError."""
+        with self.assertRaises(ValueError):
+            get_provider('gold')
+
+    def test_missing_quote_raises_error(self):
+        """Test asking a single missing quote raises ValueError."""
+        provider = CoinGeckoProvider()
+        provider.client = MagicMock()
+        provider.client.get_price.return_value = {}
+
+        with self.assertRaises(ValueError):
+            provider.get_quote('unknown')
+
+    def test_coingecko_batches_symbols(self):
+        """Test CoinGecko quotes of many symbols use one request."""
+        provider = CoinGeckoProvider()
+        provider.client = MagicMock()
+        provider.client.get_price.return_value = {
+            'bitcoin': {'usd': 60000.0},
+            'ethereum': {'usd': 3000.0},
+        }
+        quotes = provider.get_quotes(['bitcoin', 'ethereum', 'unknown'])
+
+        self.assertEqual(quotes, {'bitcoin': 60000.0, 'ethereum': 3000.0})
+        provider.client.get_price.assert_called_once_with(
+            ids='bitcoin,ethereum,unknown',
+            vs_currencies='usd',
+        )
+
+    @patch('investment.providers.AlphaVantageProvider.get_intraday')
+    def test_alpha_vantage_quotes(self, mock_get_intraday):
+        """Test Alpha Vantage quotes use the latest close and skip errors."""
+        responses = {
+            'AAPL': intraday_response('228.2880'),
+            'BAD': {'Error Message': 'Invalid API call.'},
+        }
+        mock_get_intraday.side_effect = lambda symbol: responses[symbol]
+        quotes = AlphaVantageProvider().get_quotes(['AAPL', 'BAD'])
+
+        self.assertEqual(quotes, {'AAPL': 228.288})
+
+    @override_settings(PRICE_PROVIDER_MAX_CONCURRENCY=3)
+    def test_async_provider_caps_concurrency(self):
+        """Test the async provider fans out with a concurrency cap."""
+        provider = SlowAsyncProvider()
+        symbols = [f'symbol-{i}' for i in range(20)] + ['unknown']
+        try:
+            quotes = provider.get_quotes(symbols)
+        finally:
+            provider.close()
+
+        self.assertEqual(len(quotes), 20)
+        self.assertNotIn('unknown', quotes)
+        self.assertEqual(provider.max_in_flight, 3)
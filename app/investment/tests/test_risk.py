@@ -0,0 +1,161 @@
+"""
+Tests for the portfolio risk analytics API.
+"""
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, tag
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import PriceSnapshot, TransactionHistory
+from investment.risk import risk_metrics
+
+
+PORTFOLIO_RISK_URL = reverse('investment:portfolio-risk')
+
+
+def create_user(**kwargs):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**kwargs)
+
+
+def create_buy(user, asset_name, quantity, price, days_ago):
+    """Create and return a crypto buy made a number of days ago."""
+    return TransactionHistory.objects.create(
+        user=user,
+        transaction_type='buy',
+        type='cc',
+        asset_name=asset_name,
+        quantity=quantity,
+        purchase_price=price,
+        sale_price=price,
+        purchase_date=timezone.now() - timedelta(days=days_ago),
+    )
+
+
+def create_prices(asset_name, prices):
+    """Create one crypto price snapshot per day, ending today."""
+    now = timezone.now()
+    PriceSnapshot.objects.bulk_create(
+        PriceSnapshot(
+            asset_type='cc',
+            symbol=asset_name,
+            price=price,
+            timestamp=now - timedelta(days=len(prices) - 1 - day),
+        )
+        for day, price in enumerate(prices)
+    )
+
+
+class RiskMetricsTests(SimpleTestCase):
+    """Test the risk metrics of returns matrices."""
+
+    def test_metrics(self):
+        """Test metrics match their definitions column by column."""
+        returns = np.array([
+            [0.10, 0.05, 0.0],
+            [-0.20, -0.10, 0.0],
+            [0.05, 0.02, 0.0],
+            [0.10, 0.04, 0.0],
+        ])
+        with self.settings(RISK_PERIODS_PER_YEAR=4, RISK_FREE_RATE=0.01):
+            volatility, max_drawdown, sharpe, correlation = risk_metrics(returns)
+
+        std = returns[:, 0].std(ddof=1)
+        self.assertAlmostEqual(volatility[0], std * 2)
+        self.assertAlmostEqual(sharpe[0], (returns[:, 0].mean() * 4 - 0.01) / (std * 2))
+        self.assertAlmostEqual(max_drawdown[0], 0.2)
+        self.assertAlmostEqual(max_drawdown[1], 0.1)
+        np.testing.assert_allclose(correlation[:2, :2], np.corrcoef(returns[:, :2].T))
+        self.assertEqual(volatility[2], 0)
+        self.assertTrue(np.isnan(sharpe[2]))
+        self.assertTrue(np.isnan(correlation[2]).all())
+
+
+class PortfolioRiskApiTests(TestCase):
+    """Test the portfolio risk analytics API."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(email='test@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        create_buy(self.user, 'bitcoin', 1, 100, days_ago=20)
+        create_buy(self.user, 'ethereum', 4, 50, days_ago=20)
+        create_prices('bitcoin', [100, 110, 99, 120, 132])
+        create_prices('ethereum', [50, 55, 50, 60, 66])
+
+    def test_auth_required(self):
+        """Test auth is required to get the portfolio risk."""
+        res = APIClient().get(PORTFOLIO_RISK_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_portfolio_risk(self):
+        """Test per-asset and portfolio metrics over the window."""
+        res = self.client.get(PORTFOLIO_RISK_URL, {'window': 5})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['window'], 5)
+        self.assertEqual(res.data['end'], timezone.localdate().isoformat())
+        self.assertEqual(
+            [asset['asset_name'] for asset in res.data['assets']],
+            ['bitcoin', 'ethereum'],
+        )
+        bitcoin = res.data['assets'][0]
+        self.assertAlmostEqual(bitcoin['max_drawdown'], 0.1)
+        self.assertGreater(bitcoin['volatility'], 0)
+        correlation = np.array(res.data['correlation'])
+        self.assertEqual(correlation.shape, (2, 2))
+        self.assertGreater(correlation[0, 1], 0.9)
+        # The portfolio drops from 330 to 299 on the third day.
+        self.assertAlmostEqual(res.data['portfolio']['max_drawdown'], 31 / 330)
+
+    def test_memoized_per_version(self):
+        """Test requests are served from the cache until the user's inputs change."""
+        first = self.client.get(PORTFOLIO_RISK_URL, {'window': 5}).data
+
+        with self.assertNumQueries(1):
+            second = self.client.get(PORTFOLIO_RISK_URL, {'window': 5}).data
+        self.assertEqual(second, first)
+
+        PriceSnapshot.objects.create(asset_type='cc', symbol='dogecoin', price=1)
+        with self.assertNumQueries(1):
+            self.client.get(PORTFOLIO_RISK_URL, {'window': 5})
+
+        PriceSnapshot.objects.create(asset_type='cc', symbol='bitcoin', price=66)
+        third = self.client.get(PORTFOLIO_RISK_URL, {'window': 5}).data
+        self.assertGreater(third['assets'][0]['max_drawdown'], 0.4)
+
+    def test_invalid_window(self):
+        """Test invalid windows are rejected."""
+        for window in ['abc', '2', '100000']:
+            res = self.client.get(PORTFOLIO_RISK_URL, {'window': window})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, window)
+
+
+@tag('benchmark')
+class RiskMetricsBenchmarkTests(SimpleTestCase):
+    """Benchmark the risk metrics of a large portfolio."""
+
+    def test_500_assets(self):
+        """Test a year of 500 assets computes well under a second."""
+        rng = np.random.default_rng(0)
+        returns = rng.normal(0, 0.02, size=(365, 501))
+
+        started = time.perf_counter()
+        volatility, max_drawdown, sharpe, correlation = risk_metrics(returns)
+        elapsed = time.perf_counter() - started
+
+        print(f'\nrisk metrics of 500 assets over 365 days: {elapsed * 1000:.1f} ms')
+        self.assertEqual(correlation.shape, (501, 501))
+        np.testing.assert_allclose(correlation, np.corrcoef(returns.T), atol=1e-12)
+        self.assertLess(elapsed, 0.5)
@@ -0,0 +1,146 @@
+"""
+Tests for the fast path serializers of list responses.
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, tag
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Investment, PriceSnapshot, TransactionHistory
+from investment.cache import Quote
+from investment.serializers import (
+    InvestmentRowSerializer,
+    InvestmentSerializer,
+    TransactionHistoryRowSerializer,
+    TransactionHistorySerializer,
+)
+
+
+def create_investments(user, count):
+    """Create investments in bulk."""
+    Investment.objects.bulk_create(
+        Investment(
+            user=user,
+            title=f'Position {i}',
+            asset_name='bitcoin' if i % 2 else 'ethereum',
+            type='cc',
+            quantity=Decimal('1.25') * (i + 1),
+            purchase_price=Decimal('10.12345678'),
+            current_price=Decimal('11.5'),
+        )
+        for i in range(count)
+    )
+
+
+def render(data):
+    """Return the JSON bytes of serialized data."""
+    return JSONRenderer().render(data)
+
+
+class RowSerializerTests(TestCase):
+    """Test row serializers output the same bytes as model serializers."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        create_investments(self.user, 4)
+        PriceSnapshot.objects.create(
+            asset_type='cc',
+            symbol='bitcoin',
+            price=Decimal('12.00000001'),
+            timestamp=timezone.now() - timedelta(minutes=5),
+        )
+        for investment in Investment.objects.all()[:2]:
+            investment.buy_transaction().save()
+            investment.sell_transaction(investment.quantity, Decimal('13')).save()
+
+    def test_investments_identical(self):
+        """Test investment rows match InvestmentSerializer, priced or not."""
+        queryset = Investment.objects.with_latest_price().order_by('-id')
+
+        expected = render(InvestmentSerializer(queryset, many=True).data)
+        rows = InvestmentRowSerializer.get_queryset(queryset)
+
+        self.assertEqual(render(InvestmentRowSerializer(rows).data), expected)
+
+    def test_transactions_identical(self):
+        """Test transaction rows match TransactionHistorySerializer."""
+        queryset = TransactionHistory.objects.order_by('-id')
+
+        expected = render(TransactionHistorySerializer(queryset, many=True).data)
+        rows = TransactionHistoryRowSerializer.get_queryset(queryset)
+
+        self.assertEqual(render(TransactionHistoryRowSerializer(rows).data), expected)
+
+    def test_local_time_zone_identical(self):
+        """Test datetimes are converted to the current time zone like DRF."""
+        queryset = TransactionHistory.objects.order_by('-id')
+
+        with timezone.override('America/New_York'):
+            expected = render(TransactionHistorySerializer(queryset, many=True).data)
+            rows = TransactionHistoryRowSerializer.get_queryset(queryset)
+            data = render(TransactionHistoryRowSerializer(rows).data)
+
+        self.assertEqual(data, expected)
+        self.assertNotIn(b'Z"', data)
+
+    def test_live_quotes_identical(self):
+        """Test rows priced with live quotes match priced instances."""
+        fetched_at = timezone.now()
+        quotes = {('cc', 'ethereum'): Quote(Decimal('20.5'), fetched_at, None)}
+        investments = list(Investment.objects.with_latest_price().order_by('-id'))
+        for investment in investments:
+            if investment.asset_name == 'ethereum':
+                investment.latest_price = Decimal('20.5')
+                investment.latest_price_at = fetched_at
+
+        rows = list(InvestmentRowSerializer.get_queryset(
+            Investment.objects.with_latest_price().order_by('-id')
+        ))
+        InvestmentRowSerializer.set_quotes(rows, quotes)
+
+        self.assertEqual(
+            render(InvestmentRowSerializer(rows).data),
+            render(InvestmentSerializer(investments, many=True).data),
+        )
+
+
+@tag('benchmark')
+class RowSerializerBenchmarkTests(TestCase):
+    """Benchmark serializing a large investment list."""
+    rows = 10000
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        create_investments(self.user, self.rows)
+
+    def test_10k_investments(self):
+        """Test row serialization is at least 5x faster than the model serializer."""
+        queryset = Investment.objects.with_latest_price().order_by('-id')
+        investments = list(queryset)
+        rows = list(InvestmentRowSerializer.get_queryset(queryset))
+
+        started = time.perf_counter()
+        expected = InvestmentSerializer(investments, many=True).data
+        model_time = time.perf_counter() - started
+        started = time.perf_counter()
+        data = InvestmentRowSerializer(rows).data
+        row_time = time.perf_counter() - started
+
+        print(
+            f'\nserialized {self.rows} investments: InvestmentSerializer '
+            f'{model_time * 1000:.0f} ms, rows {row_time * 1000:.0f} ms '
+            f'({model_time / row_time:.1f}x)'
+        )
+        self.assertEqual(render(data), render(expected))
+        self.assertGreater(model_time / row_time, 5)
@@ -0,0 +1,147 @@
+"""
+Tests for coalescing concurrent quote lookups.
+"""
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+from unittest.mock import patch
+
+from investment.cache import quote_cache
+from investment.singleflight import SingleFlight
+from investment.utils import get_current_price, get_current_quotes, load_current_price
+
+
+CALLERS = 100
+
+
+class FakeProvider:
+    """Slow price provider counting its upstream calls."""
+
+    def __init__(self, price=60000.0, error=None):
+        self.price = price
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, investment_type, identifier):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.2)
+        if self.error is not None:
+            raise self.error
+        return self.price
+
+
+def run_concurrently(fn, callers=CALLERS):
+    """Run fn from many threads at once, return results and errors."""
+    barrier = threading.Barrier(callers)
+    results = []
+    errors = []
+
+    def target():
+        barrier.wait()
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=target) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Test concurrent callers share one in-flight fetch."""
+
+    def setUp(self):
+        quote_cache.clear()
+
+    def test_concurrent_callers_share_one_upstream_call(self):
+        """Test 100 concurrent lookups of a symbol make one upstream call."""
+        provider = FakeProvider()
+        with patch('investment.utils.fetch_current_price', side_effect=provider):
+            results, errors = run_concurrently(
+                lambda: get_current_price('cc', 'bitcoin')
+            )
+
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [60000.0] * CALLERS)
+
+    def test_concurrent_lists_share_one_upstream_call(self):
+        """Test 100 concurrent batch lookups of the same symbols make one upstream call."""
+        provider = FakeProvider()
+
+        def fetch_prices(investment_type, identifiers):
+            return dict.fromkeys(identifiers, provider(investment_type, identifiers))
+
+        with patch('investment.utils.fetch_current_prices', side_effect=fetch_prices):
+            results, errors = run_concurrently(
+                lambda: get_current_quotes('cc', ['bitcoin', 'ethereum'])
+            )
+
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            [{identifier: quote.price for identifier, quote in quotes.items()} for quotes in results],
+            [{'bitcoin': 60000.0, 'ethereum': 60000.0}] * CALLERS,
+        )
+
+    def test_concurrent_callers_share_error(self):
+        """Test a failed fetch raises the same error for every waiter."""
+        error = ValueError('Price for bitcoin not found')
+        provider = FakeProvider(error=error)
+        with patch('investment.utils.fetch_current_price', side_effect=provider):
+            results, errors = run_concurrently(
+                lambda: get_current_price('cc', 'bitcoin')
+            )
+
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), CALLERS)
+        self.assertTrue(all(e is error for e in errors))
+
+    def test_different_keys_are_not_coalesced(self):
+        """Test lookups of different symbols fetch independently."""
+        provider = FakeProvider()
+        with patch('investment.utils.fetch_current_price', side_effect=provider):
+            get_current_price('cc', 'bitcoin')
+            get_current_price('cc', 'ethereum')
+
+        self.assertEqual(provider.calls, 2)
+
+    @override_settings(QUOTE_SINGLE_FLIGHT_DISTRIBUTED=True)
+    def test_distributed_lock_waits_for_other_process(self):
+        """Test a lock held by another process makes the caller wait for its quote."""
+        flight = SingleFlight()
+        key = quote_cache.make_key('cc', 'bitcoin')
+        lock_key = f'lock:{key}'
+        quote_cache.backend.add(lock_key, 'other-process', timeout=10)
+
+        def release():
+            time.sleep(0.2)
+            quote_cache.set('cc', 'bitcoin', 61000.0)
+            quote_cache.backend.delete(lock_key)
+
+        releaser = threading.Thread(target=release)
+        releaser.start()
+        provider = FakeProvider()
+        with patch('investment.utils.fetch_current_price', side_effect=provider):
+            price = flight.do(key, load_current_price, 'cc', 'bitcoin')
+        releaser.join()
+
+        self.assertEqual(price, 61000.0)
+        self.assertEqual(provider.calls, 0)
+
+    @override_settings(QUOTE_SINGLE_FLIGHT_DISTRIBUTED=True)
+    def test_distributed_lock_released_after_call(self):
+        """Test the cross-process lock is released once the call is done."""
+        flight = SingleFlight()
+        result = flight.do('quote:cc:bitcoin', lambda: 1.0)
+
+        self.assertEqual(result, 1.0)
+        self.assertIsNone(quote_cache.backend.get('lock:quote:cc:bitcoin'))
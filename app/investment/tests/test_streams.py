@@ -0,0 +1,180 @@
+"""
+Tests for live price streams.
+"""
+import asyncio
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import Investment
+from investment.streams import PriceHub
+
+
+PRICE_STREAM_URL = reverse('investment:price-stream')
+
+BITCOIN = ('cc', 'bitcoin')
+ETHEREUM = ('cc', 'ethereum')
+
+
+class FakeFeed:
+    """In-process price feed recording each upstream fetch."""
+
+    def __init__(self, prices):
+        self.prices = dict(prices)
+        self.fetches = []
+
+    async def __call__(self, assets):
+        self.fetches.append(sorted(assets))
+        return {asset: self.prices[asset] for asset in assets if asset in self.prices}
+
+
+def parse_event(chunk):
+    """Return the name and payload of a server-sent event."""
+    lines = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+    return lines['event'], json.loads(lines['data'])
+
+
+class PriceHubTests(SimpleTestCase):
+    """Test fanning out prices to subscribers."""
+
+    async def test_one_fetch_per_asset_for_all_subscribers(self):
+        """Test many subscribers of an asset share each upstream fetch."""
+        feed = FakeFeed({BITCOIN: Decimal('100'), ETHEREUM: Decimal('10')})
+        hub = PriceHub(fetch=feed, interval=3600)
+        queues = [hub.subscribe([BITCOIN]) for _ in range(1000)]
+        other = hub.subscribe([ETHEREUM])
+
+        changes = await asyncio.wait_for(
+            asyncio.gather(*(queue.get() for queue in queues + [other])),
+            1,
+        )
+
+        self.assertEqual(feed.fetches, [[BITCOIN, ETHEREUM]])
+        self.assertEqual(changes[0], {BITCOIN: Decimal('100')})
+        self.assertEqual(changes[-1], {ETHEREUM: Decimal('10')})
+        for queue in queues + [other]:
+            hub.unsubscribe(queue)
+        self.assertEqual(hub.subscribers, {})
+        hub._task.cancel()
+
+    async def test_only_changes_pushed(self):
+        """Test subscribers only receive prices that changed."""
+        feed = FakeFeed({BITCOIN: Decimal('100'), ETHEREUM: Decimal('10')})
+        hub = PriceHub(fetch=feed, interval=3600)
+        queue = hub.subscribe([BITCOIN, ETHEREUM])
+        await asyncio.wait_for(queue.get(), 1)
+
+        feed.prices[BITCOIN] = Decimal('101')
+        await hub.poll()
+
+        self.assertEqual(queue.get_nowait(), {BITCOIN: Decimal('101')})
+        await hub.poll()
+        self.assertTrue(queue.empty())
+
+        late = hub.subscribe([BITCOIN])
+        self.assertEqual(late.get_nowait(), {BITCOIN: Decimal('101')})
+        hub.unsubscribe(queue)
+        hub.unsubscribe(late)
+        hub._task.cancel()
+
+
+class PriceStreamApiTests(TestCase):
+    """Test the live price stream API."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.get(user=self.user)
+        for quantity in [1, 2]:
+            Investment.objects.create(
+                user=self.user,
+                asset_name='bitcoin',
+                type='cc',
+                quantity=quantity,
+                purchase_price=90,
+                current_price=90,
+            )
+        Investment.objects.create(
+            user=self.user,
+            asset_name='ethereum',
+            type='cc',
+            quantity=10,
+            purchase_price=5,
+            current_price=5,
+        )
+
+    async def test_auth_required(self):
+        """Test a token is required to open the stream."""
+        res = await AsyncClient().get(PRICE_STREAM_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_stream_snapshot_and_deltas(self):
+        """Test the stream starts with a snapshot and pushes valuation deltas."""
+        feed = FakeFeed({BITCOIN: Decimal('100'), ETHEREUM: Decimal('5')})
+        hub = PriceHub(fetch=feed, interval=3600)
+        headers = {'Authorization': f'Token {self.token.key}'}
+
+        with patch('investment.streams.price_hub', hub):
+            res = await AsyncClient().get(PRICE_STREAM_URL, headers=headers)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res['Content-Type'], 'text/event-stream')
+            events = aiter(res.streaming_content)
+
+            event, data = parse_event((await anext(events)).decode())
+            self.assertEqual(event, 'snapshot')
+            self.assertEqual(data['portfolio_value'], 3 * 90 + 10 * 5)
+            self.assertEqual([position['quantity'] for position in data['positions']], [3, 10])
+
+            event, data = parse_event((await asyncio.wait_for(anext(events), 1)).decode())
+            self.assertEqual(event, 'prices')
+            self.assertEqual(data['positions'], [{
+                'type': 'cc',
+                'asset_name': 'bitcoin',
+                'quantity': 3,
+                'price': 100,
+                'value': 300,
+            }, {
+                'type': 'cc',
+                'asset_name': 'ethereum',
+                'quantity': 10,
+                'price': 5,
+                'value': 50,
+            }])
+            self.assertEqual(data['portfolio_value'], 350)
+
+            # A client disconnect cancels the response while it waits.
+            pending = asyncio.ensure_future(anext(events))
+            await asyncio.sleep(0)
+            pending.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await pending
+        self.assertEqual(hub.subscribers, {})
+        hub._task.cancel()
+
+    def test_wsgi_rejected(self):
+        """Test the stream is refused outside ASGI rather than buffered."""
+        res = self.client.get(
+            PRICE_STREAM_URL,
+            headers={'Authorization': f'Token {self.token.key}'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    async def test_invalid_token(self):
+        """Test an unknown token is rejected."""
+        res = await AsyncClient().get(
+            PRICE_STREAM_URL,
+            headers={'Authorization': 'Token invalid'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
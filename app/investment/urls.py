@@ -5,7 +5,16 @@ from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
-from investment.views import InvestmentViewSet, TransactionHistoryView
+from investment.views import (
+    InvestmentViewSet,
+    TransactionHistoryView,
+    PortfolioSummaryView,
+    PortfolioHistoryView,
+    PortfolioRiskView,
+    RealizedGainsView,
+    PriceStreamView,
+    QuoteCacheStatsView,
+)
 
 router = DefaultRouter()
 router.register('investments', InvestmentViewSet, basename='investment')
@@ -16,4 +25,10 @@ app_name = 'investment'
 urlpatterns = [
     path('', include(router.urls)),
     path('investments/buy/', InvestmentViewSet.as_view({'post': 'buy'}), name='investment-buy'),
+    path('portfolio/summary/', PortfolioSummaryView.as_view(), name='portfolio-summary'),
+    path('portfolio/history/', PortfolioHistoryView.as_view(), name='portfolio-history'),
+    path('portfolio/risk/', PortfolioRiskView.as_view(), name='portfolio-risk'),
+    path('portfolio/gains/', RealizedGainsView.as_view(), name='realized-gains'),
+    path('stream/prices/', PriceStreamView.as_view(), name='price-stream'),
+    path('quotes/stats/', QuoteCacheStatsView.as_view(), name='quote-cache-stats'),
 ]
\ No newline at end of file
@@ -1,40 +1,196 @@
 """
 Utility functions for the investment app.
 """
-from alpha_vantage.timeseries import TimeSeries
-from pycoingecko import CoinGeckoAPI
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from core.constants import ALPHA_VANTAGE_API_KEY
+import requests
 
+from core import money
+from core.models import Investment, PriceSnapshot
+from investment.cache import quote_cache
+from investment.providers import get_provider
+from investment.singleflight import quote_flight
 
-def get_stock_price(symbol):
-    """Get current price for a stock or bond using Alpha Vantage."""
-    ts = TimeSeries(key=ALPHA_VANTAGE_API_KEY)
-    data, _ = ts.get_intraday(symbol=symbol, interval='5min', outputsize='compact')
 
-    if "Time Series (5min)" in data:
-        latest_timestamp = max(data["Time Series (5min)"].keys())
-        latest_data = data["Time Series (5min)"][latest_timestamp]
-        return float(latest_data['4. close'])
-    else:
-        raise KeyError(f"Key 'Time Series (5min)' not found in response: {data}")
+logger = logging.getLogger(__name__)
 
 
-def get_crypto_price(crypto_id):
-    """Get current price for a cryptocurrency using CoinGecko."""
-    cg = CoinGeckoAPI()
-    data = cg.get_price(ids=crypto_id, vs_currencies='usd')
-    if crypto_id in data:
-        return data[crypto_id]['usd']
-    else:
-        raise ValueError(f"Price for {crypto_id} not found")
+def fetch_current_price(investment_type, identifier):
+    """Fetch current price from the provider of the investment type."""
+    return get_provider(investment_type).get_quote(identifier)
+
+
+def fetch_current_prices(investment_type, identifiers):
+    """
+    Fetch current prices for many identifiers of one investment type.
+
+    Returns a dict of identifier to price. Identifiers that could not
+    be priced are left out of the result.
+    """
+    return get_provider(investment_type).get_quotes(identifiers)
+
+
+def load_current_price(investment_type, identifier):
+    """Fetch a price unless another call cached it meanwhile."""
+    price = quote_cache.get(investment_type, identifier, record=False)
+    if price is None:
+        price = money.to_money(fetch_current_price(investment_type, identifier))
+        quote_cache.set(investment_type, identifier, price)
+    return price
 
 
 def get_current_price(investment_type, identifier):
     """Get current price based on investment type."""
-    if investment_type == 'stock' or investment_type == 'bond':
-        return get_stock_price(identifier)
-    elif investment_type == 'cc':
-        return get_crypto_price(identifier)
-    else:
-        raise ValueError(f"Unknown investment type {investment_type}.")
\ No newline at end of file
+    price = quote_cache.get(investment_type, identifier)
+    if price is None:
+        price = quote_flight.do(
+            quote_cache.make_key(investment_type, identifier),
+            load_current_price,
+            investment_type,
+            identifier,
+        )
+    return price
+
+
+def load_current_quotes(investment_type, identifiers):
+    """Fetch the quotes other calls did not cache meanwhile."""
+    quotes = {}
+    missing = []
+    for identifier in identifiers:
+        entry = quote_cache.get_quote(investment_type, identifier, record=False)
+        if entry is None:
+            missing.append(identifier)
+        else:
+            quotes[identifier] = entry
+    if missing:
+        fetched = {
+            identifier: money.to_money(price)
+            for identifier, price in fetch_current_prices(investment_type, missing).items()
+        }
+        quotes.update(quote_cache.set_many(investment_type, fetched))
+    return quotes
+
+
+def get_current_quotes(investment_type, identifiers):
+    """Get current quotes for many identifiers of one investment type."""
+    quotes = quote_cache.get_quotes(investment_type, identifiers)
+    missing = [identifier for identifier in identifiers if identifier not in quotes]
+    if missing:
+        quotes.update(quote_flight.do(
+            quote_cache.make_batch_key(investment_type, missing),
+            load_current_quotes,
+            investment_type,
+            missing,
+        ))
+    return quotes
+
+
+def get_current_prices(investment_type, identifiers):
+    """Get current prices for many identifiers of one investment type."""
+    quotes = get_current_quotes(investment_type, identifiers)
+    return {identifier: quote.price for identifier, quote in quotes.items()}
+
+
+def record_snapshots(quotes):
+    """
+    Store quotes as price snapshots.
+
+    Takes a dict of investment type to a dict of identifier to Quote.
+    Snapshots are timestamped with the time the quote was fetched, so a
+    quote served again from the cache is not stored twice.
+    """
+    snapshots = [
+        PriceSnapshot(
+            asset_type=investment_type,
+            symbol=identifier,
+            price=quote.price,
+            timestamp=quote.fetched_at,
+        )
+        for investment_type, type_quotes in quotes.items()
+        for identifier, quote in type_quotes.items()
+    ]
+    PriceSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+    return len(snapshots)
+
+
+def quote_assets(assets):
+    """
+    Return current quotes of (investment_type, asset_name) pairs.
+
+    Every distinct pair is priced once and the quotes are stored with
+    one snapshot per asset. Pairs that could not be priced are left out.
+    """
+    positions = defaultdict(set)
+    for investment_type, asset_name in assets:
+        positions[investment_type].add(asset_name)
+
+    quotes = {}
+    for investment_type, asset_names in positions.items():
+        try:
+            quotes[investment_type] = get_current_quotes(investment_type, sorted(asset_names))
+        except ValueError as e:
+            logger.error(f"Error while retrieving current prices for {investment_type}: {e}")
+            continue
+
+        for asset_name in asset_names:
+            if asset_name not in quotes[investment_type]:
+                logger.error(f"Error while retrieving current price for {asset_name}")
+
+    record_snapshots(quotes)
+    return {
+        (investment_type, asset_name): quote
+        for investment_type, type_quotes in quotes.items()
+        for asset_name, quote in type_quotes.items()
+    }
+
+
+def refresh_prices(investments):
+    """
+    Refresh the price of the given investments.
+
+    The quotes are set on the investments as their latest price.
+    """
+    quotes = quote_assets((investment.type, investment.asset_name) for investment in investments)
+    for investment in investments:
+        quote = quotes.get((investment.type, investment.asset_name))
+        if quote is not None:
+            investment.latest_price = quote.price
+            investment.latest_price_at = quote.fetched_at
+    return investments
+
+
+def refresh_asset_prices(max_workers):
+    """
+    Refresh the price snapshots of every asset held by any user.
+
+    Quotes are fetched concurrently by at most max_workers threads, one
+    batch for all cryptocurrencies and one request per stock or bond,
+    and stored with a single insert. Returns the number of assets priced.
+    """
+    assets = defaultdict(list)
+    distinct_assets = Investment.objects.values_list('type', 'asset_name').distinct()
+    for investment_type, asset_name in distinct_assets:
+        assets[investment_type].append(asset_name)
+
+    batches = []
+    for investment_type, asset_names in assets.items():
+        if investment_type == 'cc':
+            batches.append((investment_type, asset_names))
+        else:
+            batches.extend((investment_type, [asset_name]) for asset_name in asset_names)
+
+    quotes = defaultdict(dict)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(get_current_quotes, investment_type, asset_names): investment_type
+            for investment_type, asset_names in batches
+        }
+        for future in as_completed(futures):
+            investment_type = futures[future]
+            try:
+                quotes[investment_type].update(future.result())
+            except (KeyError, ValueError, requests.RequestException) as e:
+                logger.error(f"Error while retrieving current prices for {investment_type}: {e}")
+    return record_snapshots(quotes)
@@ -1,47 +1,158 @@
 """
 Views for transaction API.
 """
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.db import transaction
+from django.db.models import F
+from django.views import View
 from rest_framework import (
     viewsets,
     permissions,
-    authentication,
     status,
 )
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.views import APIView
 
+from core import constants, money
 from core.models import Investment, TransactionHistory
-from investment.utils import get_current_price
+from investment.cache import quote_cache
+from investment.conditional import ConditionalListMixin
+from investment.export import EXPORT_FIELDS, iterate_async, stream_csv, stream_ndjson
+from investment.history import portfolio_history
+from investment.lots import realized_gains
+from investment.orders import InsufficientFunds, execute_orders
+from investment.pagination import NewestFirstCursorPagination
+from investment.portfolio import portfolio_summary
+from investment.renderers import CSVRenderer, NDJSONRenderer
+from investment.risk import portfolio_risk
+from investment.streams import stream_portfolio
+from investment.utils import get_current_price, quote_assets, refresh_prices
 from investment.serializers import (
+    BatchOrderSerializer,
+    InvestmentRowSerializer,
     InvestmentSerializer,
+    SellSerializer,
+    TransactionHistoryRowSerializer,
     TransactionHistorySerializer,
+    PortfolioSummarySerializer,
+    PortfolioHistorySerializer,
+    PortfolioRiskSerializer,
+    RealizedGainsSerializer,
 )
+from user.authentication import CachedTokenAuthentication, SignedTokenAuthentication
 import logging
 
 
 logger = logging.getLogger(__name__)
 
 
-class InvestmentViewSet(viewsets.ModelViewSet):
+class SparseFieldsViewMixin:
+    """
+    Narrow read responses to the comma separated output fields of ?fields=.
+
+    The serializer leaves out the other fields, and the queryset loads
+    only the model fields the selected ones read. The parameter is parsed
+    once per request.
+    """
+
+    def get_selected_fields(self):
+        """Return the requested output fields, or None for all of them."""
+        try:
+            return self._selected_fields
+        except AttributeError:
+            pass
+        value = self.request.query_params.get('fields')
+        if not value or self.request.method not in permissions.SAFE_METHODS:
+            fields = None
+        else:
+            fields = {name.strip() for name in value.split(',')} - {''}
+            unknown = fields - set(self.get_serializer_class()().fields)
+            if unknown:
+                raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}."})
+        self._selected_fields = fields or None
+        return self._selected_fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_selected_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_selected_fields()
+        if fields is None:
+            return queryset
+        return queryset.only(*self.get_serializer_class()(fields=fields).get_columns())
+
+
+class RowListMixin:
+    """List rows encoded by row_serializer_class rather than model instances."""
+    row_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        fields = self.get_selected_fields()
+        queryset = self.row_serializer_class.get_queryset(
+            self.filter_queryset(self.get_queryset()),
+            fields,
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.row_serializer_class(page, fields).data)
+
+
+class InvestmentViewSet(
+    ConditionalListMixin,
+    SparseFieldsViewMixin,
+    RowListMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet for managing investment."""
+    row_serializer_class = InvestmentRowSerializer
     serializer_class = InvestmentSerializer
     queryset = Investment.objects.all()
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
+    pagination_class = NewestFirstCursorPagination
 
     def get_queryset(self):
         """Retrieve investments for the authenticated user."""
-        investments = Investment.objects.filter(user=self.request.user).order_by('-id')
-        for investment in investments:
-            try:
-                investment.current_price = get_current_price(investment.type, investment.asset_name)
-                investment.save()
-            except ValueError as e:
-                logger.error(f"Error while retrieving current price for {investment.asset_name}: {e}")
-                investment.current_price = investment.current_price or 0
-        return investments
+        return Investment.objects.with_latest_price().filter(
+            user=self.request.user
+        ).order_by('-id')
+
+    @property
+    def depends_on_prices(self):
+        """Whether the listed fields change with prices."""
+        return self.row_serializer_class.is_quoted(self.get_selected_fields())
+
+    def get_object(self):
+        """Retrieve an investment, priced live if configured."""
+        investment = super().get_object()
+        quoted = self.row_serializer_class.is_quoted(self.get_selected_fields())
+        if settings.PRICING_MODE == 'live' and quoted:
+            refresh_prices([investment])
+        return investment
+
+    def paginate_queryset(self, queryset):
+        """Return a page of investment rows, priced live if configured."""
+        page = super().paginate_queryset(queryset)
+        quoted = self.row_serializer_class.is_quoted(self.get_selected_fields())
+        if settings.PRICING_MODE == 'live' and quoted:
+            self.row_serializer_class.set_quotes(
+                page,
+                quote_assets((row['type'], row['asset_name']) for row in page),
+            )
+        return page
 
     def perform_create(self, serializer):
         """Create a new investment."""
@@ -52,7 +163,20 @@ class InvestmentViewSet(viewsets.ModelViewSet):
                                                validated_data['asset_name'])
                                            )
         purchase_price = validated_data.get('purchase_price', current_price)
-        serializer.save(user=self.request.user, purchase_price=purchase_price, current_price=current_price)
+        with transaction.atomic():
+            investment = serializer.save(
+                user=self.request.user,
+                purchase_price=purchase_price,
+                current_price=current_price,
+            )
+            investment.buy_transaction().save()
+            get_user_model().objects.touch_portfolio(self.request.user.pk)
+
+    def perform_update(self, serializer):
+        """Update an investment."""
+        with transaction.atomic():
+            serializer.save()
+            get_user_model().objects.touch_portfolio(self.request.user.pk)
 
     @action(detail=False, methods=['post'])
     def buy(self, request):
@@ -67,58 +191,325 @@ class InvestmentViewSet(viewsets.ModelViewSet):
         asset_name = serializer.validated_data['asset_name']
         quantity = serializer.validated_data['quantity']
         current_price = get_current_price(type, asset_name)
-        total_cost = current_price * quantity
+        total_cost = money.total(current_price, quantity)
 
-        if user.cash_balance < total_cost:
+        with transaction.atomic():
+            if not user.debit(total_cost, kind='buy'):
+                return Response(
+                    {'detail': 'Insufficient funds.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            investment = serializer.save(
+                user=user,
+                purchase_price=current_price,
+                current_price=current_price,
+            )
+            investment.buy_transaction().save()
+            get_user_model().objects.touch_portfolio(user.pk)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], serializer_class=BatchOrderSerializer)
+    def orders(self, request):
+        """Execute a batch of buy and sell orders in one transaction."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            results = execute_orders(request.user, serializer.validated_data['orders'])
+        except InsufficientFunds:
             return Response(
                 {'detail': 'Insufficient funds.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        with transaction.atomic():
-            user.cash_balance -= total_cost
-            user.save()
-            serializer.save(user=user, purchase_price=current_price, current_price=current_price)
-
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(
+            {'cash_balance': request.user.cash_balance, 'results': results},
+            status=status.HTTP_200_OK
+        )
 
     def destroy(self, request, *args, **kwargs):
         """Delete an investment and update the user's cash balance."""
         instance = self.get_object()
         user = self.request.user
-        amount_to_add = instance.current_price * instance.quantity
+        sale_price = instance.market_price
 
         with transaction.atomic():
-            TransactionHistory.objects.create(
-                investment=instance,
-                user=user,
-                transaction_id=instance.transaction_id,
-                transaction_type='sell',
-                type=instance.type,
-                quantity=instance.quantity,
-                purchase_price=instance.purchase_price,
-                sale_price=instance.current_price,
-                purchase_date=instance.created_at,
-                sale_date=timezone.now(),
-            )
-
-            instance.sale_price = instance.current_price
-            instance.sale_date = timezone.now()
-            user.cash_balance += amount_to_add
-            user.save()
-            instance.save()
+            # Sell what is held once locked, a concurrent sell may have
+            # taken part of the quantity read above.
+            instance = Investment.objects.select_for_update().filter(id=instance.id).first()
+            if instance is None:
+                raise Http404
+            amount_to_add = money.total(sale_price, instance.quantity)
+            instance.sell_transaction(instance.quantity, sale_price).save()
+            user.credit(amount_to_add, kind='sell')
             self.perform_destroy(instance)
+            get_user_model().objects.touch_portfolio(user.pk)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, methods=['post'], serializer_class=SellSerializer)
+    def sell(self, request, pk=None):
+        """Sell part or all of an investment and update the user's cash balance."""
+        instance = self.get_object()
+        user = request.user
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantity = serializer.validated_data['quantity']
+        sale_price = instance.market_price
+        amount_to_add = money.total(sale_price, quantity)
+
+        with transaction.atomic():
+            updated = Investment.objects.filter(
+                id=instance.id,
+                quantity__gte=quantity,
+            ).update(quantity=F('quantity') - quantity)
+            if not updated:
+                return Response(
+                    {'quantity': 'Quantity exceeds the quantity held.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            instance.sell_transaction(quantity, sale_price).save()
+            user.credit(amount_to_add, kind='sell')
+            Investment.objects.filter(id=instance.id, quantity=0).delete()
+            get_user_model().objects.touch_portfolio(user.pk)
+
+        instance.quantity -= quantity
+        return Response(
+            {
+                'quantity': instance.quantity,
+                'sale_price': sale_price,
+                'amount': amount_to_add,
+                'cash_balance': user.cash_balance,
+            },
+            status=status.HTTP_200_OK
+        )
+
 
-class TransactionHistoryView(viewsets.ReadOnlyModelViewSet):
+class TransactionHistoryView(
+    ConditionalListMixin,
+    SparseFieldsViewMixin,
+    RowListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """Viewset for retrieving transaction history."""
+    row_serializer_class = TransactionHistoryRowSerializer
     serializer_class = TransactionHistorySerializer
     queryset = Investment.objects.all()
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
+    pagination_class = NewestFirstCursorPagination
 
     def get_queryset(self):
         """Retrieve transaction history for the authenticated user."""
         return TransactionHistory.objects.filter(user=self.request.user).order_by('-id')
+
+    def _parse_bound(self, name, end=False):
+        """Parse a from/to query parameter given as a date or datetime."""
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+            moment = None if day is not None else parse_datetime(value)
+        except ValueError:
+            day = moment = None
+        if day is not None:
+            moment = datetime.combine(day + timedelta(days=end), time.min)
+        elif moment is None:
+            raise ValidationError({name: 'Enter a valid date or datetime.'})
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[CSVRenderer, NDJSONRenderer],
+    )
+    def export(self, request):
+        """
+        Stream the transaction history as CSV or NDJSON.
+
+        Transactions sold from `from` up to `to` are exported oldest
+        first. A date-only `to` includes the whole day. Under ASGI the
+        rows are streamed through an async iterator, under WSGI through
+        a plain one.
+        """
+        start = self._parse_bound('from')
+        end = self._parse_bound('to', end=True)
+
+        transactions = TransactionHistory.objects.filter(user=request.user)
+        if start is not None:
+            transactions = transactions.filter(sale_date__gte=start)
+        if end is not None:
+            transactions = transactions.filter(sale_date__lt=end)
+        rows = transactions.order_by('sale_date', 'id').values_list(
+            *EXPORT_FIELDS
+        ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+        renderer = request.accepted_renderer
+        stream = stream_csv if renderer.format == 'csv' else stream_ndjson
+        lines = stream(rows)
+        if isinstance(request._request, ASGIRequest):
+            lines = iterate_async(lines, settings.EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            lines,
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="transactions.{renderer.format}"'
+        )
+        return response
+
+
+class PortfolioSummaryView(APIView):
+    """View for the valuation and P&L of the user's portfolio."""
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
+
+    def get(self, request):
+        serializer = PortfolioSummarySerializer(portfolio_summary(request.user))
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class RealizedGainsView(APIView):
+    """View for the realized gains of the user's sells, matched to lots."""
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
+
+    def get(self, request):
+        method = request.query_params.get('method', settings.LOT_METHOD)
+        if method not in dict(constants.LOT_METHOD):
+            raise ValidationError({'method': f'"{method}" is not a valid lot method.'})
+        serializer = RealizedGainsSerializer(realized_gains(request.user, method))
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class PortfolioHistoryView(APIView):
+    """View for the daily value of the user's portfolio over a date range."""
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
+    intervals = {'1d': 1, '1w': 7}
+
+    def get_day(self, name, default):
+        """Return the date of a query parameter, or default if missing."""
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: 'Enter a valid date.'})
+        return day
+
+    def get(self, request):
+        interval = request.query_params.get('interval', '1d')
+        if interval not in self.intervals:
+            raise ValidationError({'interval': f'"{interval}" is not a valid interval.'})
+        last_day = self.get_day('to', timezone.localdate())
+        first_day = self.get_day(
+            'from',
+            last_day - timedelta(days=settings.PORTFOLIO_HISTORY_DAYS - 1),
+        )
+        if first_day > last_day:
+            raise ValidationError({'from': 'Must not be after "to".'})
+        if (last_day - first_day).days >= settings.PORTFOLIO_HISTORY_MAX_DAYS:
+            raise ValidationError(
+                {'from': f'Ranges are limited to {settings.PORTFOLIO_HISTORY_MAX_DAYS} days.'}
+            )
+
+        points = portfolio_history(request.user, first_day, last_day)
+        # Sample back from the last day so it is always included.
+        points = points[::-1][::self.intervals[interval]][::-1]
+        serializer = PortfolioHistorySerializer({
+            'from': first_day,
+            'to': last_day,
+            'interval': interval,
+            'points': [{'date': day, 'value': value} for day, value in points],
+        })
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class PortfolioRiskView(APIView):
+    """View for the risk analytics of the user's portfolio over a window."""
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
+
+    def get(self, request):
+        window = request.query_params.get('window', settings.RISK_WINDOW_DAYS)
+        try:
+            window = int(window)
+        except ValueError:
+            window = 0
+        if not 3 <= window <= settings.RISK_MAX_WINDOW_DAYS:
+            raise ValidationError(
+                {'window': f'Enter a number of days from 3 to {settings.RISK_MAX_WINDOW_DAYS}.'}
+            )
+        serializer = PortfolioRiskSerializer(portfolio_risk(request.user, window))
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class PriceStreamView(View):
+    """
+    Server-sent event stream of the live valuation of the user's portfolio.
+
+    An async view served through config.asgi; positions are read once
+    when the stream opens, so clients reconnect after trading. Under
+    WSGI the endless response would be read into memory, so the view
+    answers 501 there.
+    """
+
+    def authenticate(self, request):
+        """Return the user and credentials of the first matching scheme."""
+        for authenticator in [CachedTokenAuthentication(), SignedTokenAuthentication()]:
+            credentials = authenticator.authenticate(request)
+            if credentials is not None:
+                return credentials
+        return None
+
+    def get_portfolio(self, user):
+        """Return the user's holdings and last known price per asset."""
+        holdings, prices = {}, {}
+        for investment in Investment.objects.with_latest_price().filter(user=user):
+            asset = (investment.type, investment.asset_name)
+            holdings[asset] = holdings.get(asset, 0) + investment.quantity
+            prices[asset] = investment.market_price
+        return holdings, prices
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {'detail': 'Price streams need an ASGI server.'},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+        try:
+            credentials = await sync_to_async(self.authenticate)(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({'detail': e.detail}, status=status.HTTP_401_UNAUTHORIZED)
+        if credentials is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        holdings, prices = await sync_to_async(self.get_portfolio)(credentials[0])
+        response = StreamingHttpResponse(
+            stream_portfolio(holdings, prices),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class QuoteCacheStatsView(APIView):
+    """View for the quote cache counters of this worker."""
+    permission_classes = [permissions.IsAdminUser]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
+
+    def get(self, request):
+        return Response(quote_cache.stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,156 @@
+"""
+Authentication for the API.
+"""
+import hashlib
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework import authentication, exceptions
+from rest_framework.authtoken.models import Token
+
+from core.models import RefreshToken
+
+
+access_signer = signing.Signer(salt='user.access-token')
+
+
+def hash_key(key):
+    """Return the SHA-256 hex digest of a token."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def make_key(key):
+    """Return the cache key of a token, without the token in clear."""
+    return f'auth-token:{hash_key(key)}'
+
+
+def forget_token(key):
+    """Drop a token from the authentication cache."""
+    caches[settings.TOKEN_CACHE_ALIAS].delete(make_key(key))
+
+
+class CachedTokenAuthentication(authentication.TokenAuthentication):
+    """
+    Token authentication caching each token with its user.
+
+    Tokens are kept for at most TOKEN_CACHE_TTL seconds in the cache
+    named by TOKEN_CACHE_ALIAS, so repeated requests with a token skip
+    the token and user query. Signals drop a token when its user is
+    saved, such as on a password change or deactivation, and when the
+    token is deleted or rotated. Unknown tokens are never cached.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = caches[settings.TOKEN_CACHE_ALIAS]
+        token = cache.get(make_key(key))
+        if token is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            cache.set(make_key(key), token, settings.TOKEN_CACHE_TTL)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (token.user, token)
+
+
+def issue_tokens(user):
+    """
+    Return a signed access token and a new refresh token for a user.
+
+    The access token carries the user id and its expiry, signed with
+    SECRET_KEY. Only a hash of the refresh token is stored.
+    """
+    expires = int(time.time()) + settings.ACCESS_TOKEN_TTL
+    refresh = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user,
+        key_hash=hash_key(refresh),
+        expires_at=timezone.now() + timedelta(seconds=settings.REFRESH_TOKEN_TTL),
+    )
+    return {
+        'access': access_signer.sign_object({'user': user.pk, 'exp': expires}),
+        'refresh': refresh,
+        'token_type': SignedTokenAuthentication.keyword,
+        'expires_in': settings.ACCESS_TOKEN_TTL,
+    }
+
+
+def revoke_refresh_token(key):
+    """Revoke a refresh token, returning whether it was usable."""
+    return bool(RefreshToken.objects.filter(
+        key_hash=hash_key(key),
+        revoked_at__isnull=True,
+        expires_at__gt=timezone.now(),
+    ).update(revoked_at=timezone.now()))
+
+
+def revoke_user_refresh_tokens(user):
+    """Revoke every usable refresh token of a user, e.g. on a new password."""
+    return RefreshToken.objects.filter(
+        user=user,
+        revoked_at__isnull=True,
+    ).update(revoked_at=timezone.now())
+
+
+def rotate_refresh_token(key):
+    """
+    Exchange a refresh token for new tokens, or return None if unusable.
+
+    The refresh token is revoked with a conditional UPDATE, so it can be
+    used at most once even by concurrent requests.
+    """
+    token = RefreshToken.objects.select_related('user').filter(
+        key_hash=hash_key(key),
+        revoked_at__isnull=True,
+        expires_at__gt=timezone.now(),
+    ).first()
+    if token is None or not token.user.is_active:
+        return None
+    if not RefreshToken.objects.filter(
+        pk=token.pk,
+        revoked_at__isnull=True,
+    ).update(revoked_at=timezone.now()):
+        return None
+    return issue_tokens(token.user)
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authentication with signed access tokens, without any query.
+
+    Clients send "Authorization: Bearer <access token>". The signature
+    and expiry are checked in memory, and the user is a model instance
+    with only its id loaded; other fields are fetched when first used.
+    Revoking the refresh token or deactivating the user takes effect
+    once the access token expires, after at most ACCESS_TOKEN_TTL.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        try:
+            payload = access_signer.unsign_object(auth[1].decode())
+        except (signing.BadSignature, UnicodeError, ValueError):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if payload['exp'] <= time.time():
+            raise exceptions.AuthenticationFailed('Token expired.')
+
+        User = get_user_model()
+        user = User.from_db(None, [User._meta.pk.attname], [payload['user']])
+        return (user, payload)
+
+    def authenticate_header(self, request):
+        return self.keyword
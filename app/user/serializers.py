@@ -5,13 +5,22 @@ from django.contrib.auth import (
     get_user_model,
     authenticate,
 )
+from django.db import transaction
 from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core import money
+from user.authentication import revoke_user_refresh_tokens
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the user object."""
+    cash_balance = serializers.DecimalField(
+        max_digits=money.MAX_DIGITS,
+        decimal_places=money.MONEY_PLACES,
+        read_only=True,
+    )
 
     class Meta:
         model = get_user_model()
@@ -23,15 +32,21 @@ class UserSerializer(serializers.ModelSerializer):
         return get_user_model().objects.create_user(**validated_data)
 
     def update(self, instance, validated_data):
-        """Update and return a user."""
+        """Update and return a user, revoking its refresh tokens on a new password."""
         password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        update_fields = list(validated_data)
 
         if password:
-            user.set_password(password)
-            user.save()
+            instance.set_password(password)
+            update_fields.append('password')
 
-        return user
+        with transaction.atomic():
+            instance.save(update_fields=update_fields)
+            if password:
+                revoke_user_refresh_tokens(instance)
+        return instance
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -41,6 +56,10 @@ class AuthTokenSerializer(serializers.Serializer):
         style={'input_type': 'password'},
         trim_whitespace=False,
     )
+    token_type = serializers.ChoiceField(
+        choices=['token', 'signed'],
+        default='token',
+    )
 
     def validate(self, attrs):
         """Validate and authenticate the user."""
@@ -58,9 +77,18 @@ class AuthTokenSerializer(serializers.Serializer):
         attrs['user'] = user
         return attrs
 
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer for a refresh token."""
+    refresh = serializers.CharField()
+
+
 class DepositWithdrawSerializer(serializers.Serializer):
     """Serializer for deposit and withdraw operations."""
-    amount = serializers.FloatField()
+    amount = serializers.DecimalField(
+        max_digits=money.MAX_DIGITS,
+        decimal_places=money.MONEY_PLACES,
+    )
 
     def validate_amount(self, value):
         if value <= 0:
@@ -1,12 +1,28 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import get_user_model
 
+from user.authentication import forget_token
+
 
 @receiver(post_save, sender=get_user_model())
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     """Create a auth token for new user."""
     if created:
-        Token.objects.create(user=instance)
\ No newline at end of file
+        Token.objects.create(user=instance)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_user_tokens(sender, instance=None, created=False, **kwargs):
+    """Drop the cached tokens of a changed user, e.g. a new password."""
+    if not created:
+        for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+            forget_token(key)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance=None, **kwargs):
+    """Drop a deleted or rotated token from the authentication cache."""
+    forget_token(instance.key)
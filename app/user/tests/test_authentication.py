@@ -0,0 +1,288 @@
+"""
+Tests for cached token and signed token authentication.
+"""
+import time
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import Investment, RefreshToken
+from investment.views import InvestmentViewSet
+from user.authentication import (
+    SignedTokenAuthentication,
+    access_signer,
+    hash_key,
+    issue_tokens,
+)
+
+
+ME_URL = reverse('user:me')
+
+
+def create_user(**kwargs):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**kwargs)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test tokens are cached until their user or the token changes."""
+
+    def setUp(self):
+        caches[settings.TOKEN_CACHE_ALIAS].clear()
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.get(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def token_queries(self):
+        """Request the profile and return the queries made on tokens."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [query for query in queries if Token._meta.db_table in query['sql']]
+
+    def test_token_cached(self):
+        """Test only the first request with a token queries it."""
+        self.assertEqual(len(self.token_queries()), 1)
+        self.assertEqual(self.token_queries(), [])
+
+    def test_password_change_invalidates(self):
+        """Test a password change drops the cached token."""
+        self.token_queries()
+
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        self.assertEqual(len(self.token_queries()), 1)
+
+    def test_profile_update_not_stale(self):
+        """Test the profile reflects an update made through the API."""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'New Name'})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user is rejected on the next request."""
+        self.token_queries()
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_token_rejected(self):
+        """Test a deleted token is rejected even after it was cached."""
+        self.token_queries()
+
+        self.token.delete()
+        new_token = Token.objects.create(user=self.user)
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {new_token.key}')
+        self.assertEqual(len(self.token_queries()), 1)
+
+    def test_invalid_token_not_cached(self):
+        """Test unknown tokens are rejected on every request."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(ME_URL)
+
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(len(queries), 1)
+
+
+TOKEN_URL = reverse('user:token')
+TOKEN_REFRESH_URL = reverse('user:token-refresh')
+TOKEN_REVOKE_URL = reverse('user:token-revoke')
+INVESTMENT_URL = reverse('investment:investment-list')
+
+
+class SignedTokenAuthenticationTests(TestCase):
+    """Test signed access tokens and their refresh tokens."""
+
+    def setUp(self):
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.client = APIClient()
+        res = self.client.post(TOKEN_URL, {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+            'token_type': 'signed',
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.tokens = res.data
+
+    def test_issue_tokens(self):
+        """Test signed mode issues an access and a hashed refresh token."""
+        self.assertEqual(self.tokens['token_type'], 'Bearer')
+        self.assertEqual(self.tokens['expires_in'], settings.ACCESS_TOKEN_TTL)
+        refresh_token = RefreshToken.objects.get(user=self.user)
+        self.assertEqual(refresh_token.key_hash, hash_key(self.tokens['refresh']))
+
+    def test_default_token_unchanged(self):
+        """Test the token endpoint still returns a token by default."""
+        res = self.client.post(TOKEN_URL, {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+        })
+
+        self.assertEqual(res.data, {'token': Token.objects.get(user=self.user).key})
+
+    def test_access_token_without_queries(self):
+        """Test access tokens are verified without any query."""
+        request = APIRequestFactory().get(
+            INVESTMENT_URL,
+            HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}',
+        )
+
+        with self.assertNumQueries(0):
+            user, payload = SignedTokenAuthentication().authenticate(request)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(payload['user'], self.user.pk)
+
+    def test_access_token_on_endpoints(self):
+        """Test access tokens authenticate API requests."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], 'test@example.com')
+        self.assertEqual(self.client.get(INVESTMENT_URL).status_code, status.HTTP_200_OK)
+
+    def test_invalid_access_tokens_rejected(self):
+        """Test tampered and expired access tokens are rejected."""
+        expired = access_signer.sign_object({'user': self.user.pk, 'exp': int(time.time()) - 1})
+        forged = signing.Signer(key='other', salt='user.access-token').sign_object(
+            {'user': self.user.pk, 'exp': int(time.time()) + 60}
+        )
+        for token in [expired, forged, self.tokens['access'] + 'x', 'a b']:
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+            res = self.client.get(INVESTMENT_URL)
+
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED, token)
+
+    def test_refresh_rotates(self):
+        """Test a refresh token is exchanged once for new tokens."""
+        res = self.client.post(TOKEN_REFRESH_URL, {'refresh': self.tokens['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['refresh'], self.tokens['refresh'])
+
+        res = self.client.post(TOKEN_REFRESH_URL, {'refresh': self.tokens['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoked_refresh_rejected(self):
+        """Test a revoked refresh token cannot be used."""
+        res = self.client.post(TOKEN_REVOKE_URL, {'refresh': self.tokens['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        res = self.client.post(TOKEN_REFRESH_URL, {'refresh': self.tokens['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_refresh(self):
+        """Test a new password revokes the refresh tokens issued before it."""
+        other = issue_tokens(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+
+        res = self.client.patch(ME_URL, {'password': 'newpass123'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.credentials()
+
+        for refresh in [self.tokens['refresh'], other['refresh']]:
+            res = self.client.post(TOKEN_REFRESH_URL, {'refresh': refresh})
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_name_change_keeps_refresh(self):
+        """Test a profile update without a password keeps refresh tokens."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+        self.client.patch(ME_URL, {'name': 'New Name'})
+        self.client.credentials()
+
+        res = self.client.post(TOKEN_REFRESH_URL, {'refresh': self.tokens['refresh']})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_inactive_user_cannot_refresh(self):
+        """Test deactivated users get no new access tokens."""
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(TOKEN_REFRESH_URL, {'refresh': self.tokens['refresh']})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@tag('benchmark')
+@override_settings(PRICING_MODE='background')
+class AuthenticationBenchmarkTests(TestCase):
+    """Benchmark listing investments with token and signed authentication."""
+    requests = 300
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='testpass123')
+        Investment.objects.bulk_create(
+            Investment(
+                user=self.user,
+                asset_name='bitcoin',
+                type='cc',
+                quantity=1,
+                purchase_price=10,
+                current_price=10,
+            )
+            for _ in range(20)
+        )
+        self.token = Token.objects.get(user=self.user).key
+        self.access = issue_tokens(self.user)['access']
+
+    def measure(self, header):
+        """Return requests per second and queries per request of a header."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=header)
+        with CaptureQueriesContext(connection) as queries:
+            client.get(INVESTMENT_URL)
+        query_count = len(queries)
+        started = time.perf_counter()
+        for _ in range(self.requests):
+            res = client.get(INVESTMENT_URL)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return self.requests / elapsed, query_count
+
+    def test_signed_vs_token(self):
+        """Test signed tokens save the authentication query of every request."""
+        with patch.object(InvestmentViewSet, 'authentication_classes', [TokenAuthentication]):
+            token_rate, token_queries = self.measure(f'Token {self.token}')
+        signed_rate, signed_queries = self.measure(f'Bearer {self.access}')
+
+        print(
+            f'\ninvestment list: TokenAuthentication {token_rate:.0f} req/s '
+            f'({token_queries} queries), signed {signed_rate:.0f} req/s ({signed_queries} queries)'
+        )
+        self.assertEqual(signed_queries, token_queries - 1)
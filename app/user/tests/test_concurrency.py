@@ -0,0 +1,101 @@
+"""
+Concurrency stress tests for cash balance updates.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TransactionTestCase, tag
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+WITHDRAW_URL = reverse('user:withdraw')
+DEPOSIT_URL = reverse('user:deposit')
+
+THREADS = 8
+REQUESTS_PER_THREAD = 25
+
+
+class ConcurrentRequestsMixin:
+    """Send requests for one account from several threads."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            cash_balance=1000.0,
+        )
+
+    def post_many(self, url, amount, count):
+        """Post count requests from one thread and return the status codes."""
+        client = APIClient()
+        client.force_authenticate(user=get_user_model().objects.get(pk=self.user.pk))
+        try:
+            return [
+                client.post(url, {'amount': amount}).status_code
+                for _ in range(count)
+            ]
+        finally:
+            connections.close_all()
+
+    def run_threads(self, url, amount, threads):
+        """Run the requests on a number of threads and return the codes."""
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [
+                executor.submit(self.post_many, url, amount, REQUESTS_PER_THREAD)
+                for _ in range(threads)
+            ]
+            return [code for future in futures for code in future.result()]
+
+
+@skipUnless(
+    connection.features.test_db_allows_multiple_connections,
+    'Requires a database that allows concurrent connections.',
+)
+class CashBalanceConcurrencyTests(ConcurrentRequestsMixin, TransactionTestCase):
+    """Test concurrent deposits and withdrawals on one account."""
+
+    def test_concurrent_deposits_are_exact(self):
+        """Test no deposit is lost under concurrent requests."""
+        codes = self.run_threads(DEPOSIT_URL, 1, THREADS)
+
+        self.assertEqual(set(codes), {status.HTTP_200_OK})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cash_balance, 1000.0 + THREADS * REQUESTS_PER_THREAD)
+
+    def test_concurrent_withdrawals_never_overdraw(self):
+        """Test withdrawals stop exactly when the balance runs out."""
+        codes = self.run_threads(WITHDRAW_URL, 10, THREADS)
+
+        self.assertEqual(codes.count(status.HTTP_200_OK), 100)
+        self.assertEqual(codes.count(status.HTTP_400_BAD_REQUEST), len(codes) - 100)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cash_balance, 0.0)
+
+
+@tag('benchmark')
+@skipUnless(
+    connection.features.test_db_allows_multiple_connections,
+    'Requires a database that allows concurrent connections.',
+)
+class CashBalanceThroughputTests(ConcurrentRequestsMixin, TransactionTestCase):
+    """Benchmark deposits on one account from several threads."""
+
+    def test_throughput_with_threads(self):
+        """Report deposit throughput with one thread and with several."""
+        for threads in [1, THREADS]:
+            started = time.perf_counter()
+            codes = self.run_threads(DEPOSIT_URL, 1, threads)
+            elapsed = time.perf_counter() - started
+            print(f'\n{threads} threads: {len(codes) / elapsed:.0f} requests/s')
+
+        self.user.refresh_from_db()
+        self.assertEqual(
+            self.user.cash_balance,
+            1000.0 + (THREADS + 1) * REQUESTS_PER_THREAD,
+        )
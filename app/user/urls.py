@@ -11,6 +11,8 @@ app_name = 'user'
 urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
+    path('token/refresh/', views.RefreshTokenView.as_view(), name='token-refresh'),
+    path('token/revoke/', views.RevokeTokenView.as_view(), name='token-revoke'),
     path('me/', views.ManageUserView.as_view(), name='me'),
     path('deposit/', views.DepositView.as_view(), name='deposit'),
     path('withdraw/', views.WithdrawView.as_view(), name='withdraw'),
@@ -3,17 +3,25 @@ Views for the user API.
 """
 from rest_framework import (
     generics,
-    authentication,
     permissions, status
 )
 from rest_framework.response import Response
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.views import APIView
 from rest_framework.settings import api_settings
 
+from user.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+    issue_tokens,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
+    RefreshTokenSerializer,
     DepositWithdrawSerializer,
 )
 
@@ -24,15 +32,49 @@ class CreateUserView(generics.CreateAPIView):
 
 
 class CreateTokenView(ObtainAuthToken):
-    """Create a new auth token for user."""
+    """Create a new auth token for user, or signed tokens if requested."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        if serializer.validated_data['token_type'] == 'signed':
+            return Response(issue_tokens(user))
+        token, created = Token.objects.get_or_create(user=user)
+        return Response({'token': token.key})
+
+
+class RefreshTokenView(APIView):
+    """Exchange a refresh token for a new access and refresh token."""
+
+    def post(self, request):
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens = rotate_refresh_token(serializer.validated_data['refresh'])
+        if tokens is None:
+            return Response(
+                {'detail': 'Invalid or expired refresh token.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        return Response(tokens, status=status.HTTP_200_OK)
+
+
+class RevokeTokenView(APIView):
+    """Revoke a refresh token."""
+
+    def post(self, request):
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke_refresh_token(serializer.validated_data['refresh'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
@@ -42,15 +84,14 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
 
 class DepositView(APIView):
     """Deposit money to the user's account."""
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         serializer = DepositWithdrawSerializer(data=request.data)
         if serializer.is_valid():
             amount = serializer.validated_data['amount']
-            request.user.cash_balance += amount
-            request.user.save()
+            request.user.credit(amount)
             return Response(
                 {'cash_balance': request.user.cash_balance},
                 status=status.HTTP_200_OK)
@@ -59,18 +100,16 @@ class DepositView(APIView):
 
 class WithdrawView(APIView):
     """Withdraw money from the user's account."""
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         serializer = DepositWithdrawSerializer(data=request.data)
         if serializer.is_valid():
             amount = serializer.validated_data['amount']
-            if request.user.cash_balance >= amount:
-                request.user.cash_balance -= amount
-                request.user.save()
+            if request.user.debit(amount):
                 return Response(
-                    {'cash_balande': request.user.cash_balance},
+                    {'cash_balance': request.user.cash_balance},
                     status=status.HTTP_200_OK
                 )
             return Response(